@@ -0,0 +1,147 @@
+import sys, time, argparse, multiprocessing
+from dotenv import load_dotenv
+from utils.convert import ConvertTypes
+from utils.headless import ConsoleLogger, HeadlessExporter, convert_files
+from utils.resfileindex import CLIENTS, ResIndexError
+from utils.query import QueryError
+
+load_dotenv()
+
+
+def progress_printer(logger: ConsoleLogger, interval: float = 2.0):
+    last = [0.0]
+
+    def on_progress(done: int, total: int, name: str) -> None:
+        now = time.time()
+        if now - last[0] >= interval or done == total:
+            last[0] = now
+            logger.add(f"{done}/{total} {name}")
+
+    return on_progress
+
+
+def main(argv=None) -> int:
+    # accepted before or after the command, suppressed so a subcommand
+    # doesn't reset what was given before it back to the default
+    common = argparse.ArgumentParser(add_help=False, argument_default=argparse.SUPPRESS)
+    common.add_argument("--config")
+    common.add_argument("--shared-cache")
+    common.add_argument("-q", "--quiet", action="store_true")
+
+    parser = argparse.ArgumentParser(
+        prog="cyno-export", description="Headless Cyno Exporter", parents=[common]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "builds", help="list the current build of every server", parents=[common]
+    )
+
+    ls = commands.add_parser("ls", help="list resfile paths", parents=[common])
+    ls.add_argument("client", choices=list(CLIENTS))
+    ls.add_argument("patterns", nargs="*", help="glob, ex: dx9/model/ship/*.gr2")
+    ls.add_argument("--grep", help="regular expression matched against the path")
+    ls.add_argument("--query", help="search box syntax, ex: ext:dds size:>4mb")
+    ls.add_argument("-l", "--long", action="store_true", help="show hash and size")
+    ls.add_argument(
+        "--media", action="store_true", help="list the wems embedded in .bnk files"
+    )
+
+    export = commands.add_parser(
+        "export", help="export resfiles by glob", parents=[common]
+    )
+    export.add_argument("client", choices=list(CLIENTS))
+    export.add_argument("patterns", nargs="*")
+    export.add_argument("-o", "--out", required=True)
+    export.add_argument("--grep")
+    export.add_argument("--query")
+    export.add_argument(
+        "--convert", action="store_true", help="convert dds/gr2/wem/black after export"
+    )
+    export.add_argument(
+        "--models",
+        choices=[ConvertTypes.OBJ, ConvertTypes.GLB],
+        default=ConvertTypes.OBJ,
+        help="format gr2 models are converted to",
+    )
+    export.add_argument(
+        "--media", action="store_true", help="export the wems embedded in .bnk files"
+    )
+
+    convert = commands.add_parser(
+        "convert", help="convert exported files", parents=[common]
+    )
+    convert.add_argument("paths", nargs="+")
+    convert.add_argument(
+        "--type",
+        choices=[
+            ConvertTypes.PNG,
+            ConvertTypes.OBJ,
+            ConvertTypes.GLB,
+            ConvertTypes.OGG,
+            ConvertTypes.BLACK,
+        ],
+        help="defaults to the type matching each file extension",
+    )
+
+    args = parser.parse_args(
+        argv, argparse.Namespace(config="./config.json", shared_cache=None, quiet=False)
+    )
+    logger = ConsoleLogger(args.quiet)
+
+    try:
+        if args.command == "builds":
+            for key, build in HeadlessExporter.builds(logger).items():
+                print(f"{key}\t{build if build is not None else 'unavailable'}")
+            return 0
+
+        if args.command == "convert":
+            return 1 if convert_files(args.paths, args.type, logger) else 0
+
+        exporter = HeadlessExporter(
+            args.client,
+            config_file=args.config,
+            shared_cache_location=args.shared_cache,
+            event_logger=logger,
+        )
+
+        if args.command == "export" and not (args.patterns or args.query):
+            parser.error("export needs a glob pattern or --query")
+
+        files = exporter.files(args.patterns, args.grep, args.query)
+        if args.media:
+            files = exporter.media(files)
+
+        if args.command == "ls":
+            for file in files:
+                if args.long:
+                    print(f"{file.respath}\t{file.resfile_hash}\t{file.size}")
+                else:
+                    print(file.respath)
+            return 0
+
+        files = list(files)
+        if not files:
+            logger.add("No resfiles matched")
+            return 1
+        done, skipped, failed = exporter.export(
+            args.out,
+            files,
+            convert=args.convert,
+            models=args.models,
+            on_progress=progress_printer(logger),
+        )
+        logger.add(
+            f"Exported {done} resfiles to {args.out}"
+            f" ({skipped} already exported, {len(failed)} failed)"
+        )
+        return 1 if failed else 0
+    except (ResIndexError, QueryError) as e:
+        logger.add(str(e))
+        return 1
+
+
+if __name__ == "__main__":
+    # converter workers are spawned, a frozen build has to run them
+    multiprocessing.freeze_support()
+    sys.exit(main())
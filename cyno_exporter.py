@@ -1,13 +1,13 @@
 from datetime import datetime
 from pathlib import Path
-import sys, os, time, shutil, json, concurrent.futures, argparse
-import requests
+import sys, os, time, json, argparse, multiprocessing
 from dotenv import load_dotenv
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
     QTreeWidget,
     QTreeWidgetItem,
+    QTreeView,
     QMenu,
     QFileDialog,
     QProgressDialog,
@@ -26,19 +26,35 @@ from PyQt6.QtWidgets import (
     QTabWidget,
 )
 from PyQt6.QtGui import QIcon, QPixmap, QAction, QKeySequence, QShortcut
-from PyQt6.QtCore import Qt, QObject, pyqtSignal, QSettings, QTimer
-from utils.plugins import Revorb, Ww2Ogg, NvttExport, BlackReader
-from utils.obj import Wavefront
-import subprocess
-from typing import Any, List, Optional, Union, Dict, cast
-
-
-class ConvertTypes:
-    GENERIC = "generic"
-    PNG = "png"
-    OBJ = "obj"
-    OGG = "ogg"
-    BLACK = "json"
+from PyQt6.QtCore import (
+    Qt,
+    QObject,
+    pyqtSignal,
+    QSettings,
+    QTimer,
+    QThread,
+    QAbstractItemModel,
+    QModelIndex,
+)
+from utils.restrie import ResTrie, ResDirectory, ResFile, ResBank, ResBankMedia
+from utils.resfileindex import (
+    CLIENTS,
+    ResFileIndex,
+    ProtectedClientError,
+)
+from utils.resfiles import ResFileStore
+from utils.convert import ConvertTypes, Converter
+from utils.plugins import NvttExport
+from utils.dds import Dds
+from utils.bnk import Bnk, BnkError
+from utils.cdn import CDNSession
+from utils.rescache import ResFileCache
+from utils.export import ExportEngine
+from utils.search import SearchIndex
+from utils.query import QueryError
+from utils.resdb import ResDB
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Set, Union, Dict, cast
 
 
 load_dotenv()
@@ -46,168 +62,408 @@ load_dotenv()
 CONFIG_FILE = "./config.json"
 VERSION = "v2.1.1" 
 WINDOW_TITLE = f"Cyno Exporter {VERSION}"
-CLIENTS: Dict[str, Dict[str, Any]] = {
-    "tq": {"name": "Tranquility", "id": "TQ"},
-    "sisi": {"name": "Singularity", "id": "SISI"},
-    "serenity": {"name": "Serenity", "id": "SERENITY"},
-    "duality": {"name": "Duality", "id": "DUALITY"},
-    "infinity": {"name": "Infinity", "id": "INFINITY"},
-    "sharedCache": {"name": "Local", "id": None},
-}
 STYLE_SHEET = open(
     os.path.join(Path(__file__).parent, "style.qss"), "r", encoding="utf-8"
 ).read()
-DB = json.loads(open("./db.json", "r").read())
-
-try:
-    PROC: Any = subprocess.Popen(
-        ["cmd.exe"],
-        creationflags=subprocess.CREATE_NO_WINDOW,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
-except FileNotFoundError:
-    print("could not find cmd.exe")
-except Exception as e:
-    print(f"could not open cmd.exe: {e}")
+DB = ResDB.open()
 
 
-class EVEDirectory(QTreeWidgetItem):
-    def __init__(
-        self,
-        parent: Optional[Union[QTreeWidget, QTreeWidgetItem]],
-        icon: QIcon,
-        text: str = "",
-        filename: str = "",
-    ) -> None:
-        super().__init__(parent)  # type: ignore
-        self.setText(0, text)
-        self.setIcon(0, icon)
-        self.filename = filename
-        self.items: List[Any] = []
-        self.size = int()
+class ResTreeLoader(QThread):
+    progress = pyqtSignal(int, int)
+    status = pyqtSignal(str)
+    loaded = pyqtSignal(object, object)
+    protected = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, tree: "ResTree") -> None:
+        super().__init__(tree)
+        self.tree = tree
+
+    def run(self) -> None:
+        # anything escaping QThread.run aborts the whole app, so every
+        # error ends up in the failed dialog instead
+        try:
+            self._load()
+        except ProtectedClientError:
+            self.protected.emit()
+        except Exception as e:
+            self.failed.emit(str(e) or e.__class__.__name__)
+
+    def _load(self) -> None:
+        tree = self.tree
+        self.status.emit("downloading")
+        table = tree.resindex.load_table(
+            tree.client,
+            tree.config["SharedCacheLocation"],
+            tree.store.download_itemless,
+        )
+
+        tree.event_logger.add("Loading resfiles...")
+        root = ResTrie.build(table, on_progress=self.progress.emit)
+        self.status.emit("indexing")
+        self.loaded.emit(root, SearchIndex(root, DB))
 
-    def add(self, item: QTreeWidgetItem):
-        self.items.append(item)
 
+class FolderExportWorker(QThread):
+    progress = pyqtSignal(int, int, str)
+    exported = pyqtSignal(int, int, bool)
 
-class EVEFile(QTreeWidgetItem):
     def __init__(
         self,
-        parent: QTreeWidgetItem,
-        text: str = "",
-        filename: str = "",
-        description: str = "",
-        respath: str = "",
-        resfile_hash: str = "",
-        size: int = 0,
-        icon: QIcon = QIcon(),
-    ):
-        super().__init__(parent)  # type: ignore
-        self.setText(0, text)
-        self.setIcon(0, icon)
-        self.filename = filename
-        self.description = description
-        self.size = int(size)
-        self.respath = respath
-        self.resfile_hash = resfile_hash
-        self.setToolTip(0, description)
-
-
-class ResFileIndex:
-    def __init__(self, chinese_client: bool = False, event_logger: Any = None):
-        self.chinese_client = chinese_client
-        self.event_logger = event_logger
+        tree: "ResTree",
+        dest_folder: str,
+        files: List[Any],
+        type: str = ConvertTypes.GENERIC,
+        flat: bool = False,
+    ) -> None:
+        super().__init__(tree)
+        self.engine = ExportEngine(
+            dest_folder,
+            files,
+            fetch=lambda file, out_path: tree._fetch_file(file, out_path, type),
+            on_progress=self.progress.emit,
+            convert=(
+                (lambda file, out_path: tree._convert_file(file, out_path, type))
+                if type != ConvertTypes.GENERIC
+                else None
+            ),
+            flat=flat,
+        )
 
-        if not chinese_client:
-            self.binaries_url = "https://binaries.eveonline.com"
-            self.resources_url = "https://resources.eveonline.com"
-        else:
-            self.chinese_url = os.environ.get("CHINESE_RESINDEX_CDN")
-            self.binaries_url = f"{os.environ.get('CHINESE_CDN')}/binaries"
-            self.resources_url = f"{os.environ.get('CHINESE_CDN')}/resources"
+    def run(self) -> None:
+        done, skipped = self.engine.run()
+        self.exported.emit(done, skipped, self.engine.cancelled)
+
+
+class ResIcons:
+    ATLAS = "./icons/icons.png"
+    ROOT = "./icons/res.png"
+    # x offset of each 15x16 icon in the atlas
+    DIRECTORY = 16
+    DEFAULT = 161
+    EXTENSIONS: Dict[str, Any] = {
+        ".png": 97,
+        ".dds": 33,
+        ".jpg": 81,
+        ".gr2": 177,
+        ".txt": 130,
+        ".yaml": 130,
+        ".xml": 130,
+        ".json": 130,
+        ".wem": 65,
+        ".webm": 65,
+    }
+
+    # sliced once and shared by every tab, the view asks for these on
+    # every repaint
+    _atlas: Optional[QPixmap] = None
+    _icons: Dict[Any, QIcon] = {}
+    _by_extension: Dict[str, QIcon] = {}
 
-    def fetch_client(self, client: Dict[str, Any], timeout: int = 10):
-        base_url = self.chinese_url if self.chinese_client else self.binaries_url
-        response: Any = None
-        try:
-            response = requests.get(f"{base_url}/{client}", timeout=timeout)
-            if response.status_code == 200:
-                client = response.json()
-                self.event_logger.add(f"Requesting client: {response.url}")
-                if not self._is_protected(client):
-                    return self._get_build(client)
-                else:
-                    return None
-        except requests.exceptions.MissingSchema:
-            self.event_logger.add(f"Connection failed.")
-        except Exception:
-            self.event_logger.add(f"Connection failed to: {response.url}")
+    @staticmethod
+    def configure(config: Dict[str, Any]) -> None:
+        # "ExtensionIcons": {".fsdbinary": ".json", ".sm": 177, ".x": "a.png"}
+        # maps an extension to another extension's icon, an atlas offset or
+        # an image file
+        extensions = config.get("ExtensionIcons")
+        if not isinstance(extensions, dict):
+            return
+        for ext, icon in extensions.items():
+            ext = ext.lower() if ext.startswith(".") else f".{ext.lower()}"
+            if isinstance(icon, str) and icon.startswith("."):
+                icon = ResIcons.EXTENSIONS.get(icon.lower(), ResIcons.DEFAULT)
+            ResIcons.EXTENSIONS[ext] = icon
+        ResIcons._by_extension.clear()
 
     @staticmethod
-    def resindexfile_object(content: str):
-        resfile_list: List[Dict[str, Any]] = []
-        for line in sorted(filter(bool, content.lstrip().splitlines())):
-            data = line.lower().split(",")
-            resfile_list.append(
-                {
-                    "res_path": data[0].split(":/")[1],
-                    "resfile_hash": data[1],
-                    "size": data[3],
-                }
-            )
+    def _icon(source: Any) -> QIcon:
+        icon = ResIcons._icons.get(source)
+        if icon is None:
+            if isinstance(source, int):
+                if ResIcons._atlas is None:
+                    ResIcons._atlas = QPixmap(ResIcons.ATLAS)
+                icon = QIcon(ResIcons._atlas.copy(source, 0, 15, 16))
+            else:
+                icon = QIcon(source)
+            ResIcons._icons[source] = icon
+        return icon
 
-        return resfile_list
+    @staticmethod
+    def root() -> QIcon:
+        return ResIcons._icon(ResIcons.ROOT)
 
     @staticmethod
-    def get_soundbankinfo(content: Any) -> Union[str, None]:
-        return next(
-            (
-                bnk["resfile_hash"]
-                for bnk in content
-                if "soundbanksinfo.json" in bnk["res_path"]
-            ),
-            None,
-        )
+    def directory() -> QIcon:
+        return ResIcons._icon(ResIcons.DIRECTORY)
 
-    def fetch_resindexfile(self, build: int) -> str:
-        base_url = self.chinese_url if self.chinese_client else self.binaries_url
-        response = requests.get(f"{base_url}/eveonline_{build}.txt")
-        self.event_logger.add(f"Requesting resindex: {base_url}/eveonline_{build}.txt")
-        if response.status_code == 200:
-            resfileindex: Any = next(
-                (
-                    resfile
-                    for resfile in ResFileIndex.resindexfile_object(response.text)
-                    if resfile["res_path"].startswith("resfileindex.txt")
-                ),
-                None,
+    @staticmethod
+    def extension(ext: str) -> QIcon:
+        icon = ResIcons._by_extension.get(ext)
+        if icon is None:
+            icon = ResIcons._by_extension[ext] = ResIcons._icon(
+                ResIcons.EXTENSIONS.get(ext.lower(), ResIcons.DEFAULT)
             )
+        return icon
 
-            resfileindex_file = f"{build}_resfileindex.txt"
-
-            os.makedirs("resindex", exist_ok=True)
-            resfileindex_file_path = os.path.join("resindex", resfileindex_file)
-            content = requests.get(
-                f"{self.binaries_url}/{resfileindex['resfile_hash']}"
-            ).content
-
-            with open(resfileindex_file_path, "wb") as f:
-                f.write(content)
-
-            return resfileindex_file
-        return ""
+    @staticmethod
+    def for_file(name: str) -> QIcon:
+        return ResIcons.extension(os.path.splitext(name)[1])
+
+
+class ResTreeModel(QAbstractItemModel):
+    def __init__(self, tree: "ResTree") -> None:
+        super().__init__(tree)
+        self.tree = tree
+        self.root: Optional[ResDirectory] = None
+        self.header_label = ""
+        self.visible: Optional[Set[Any]] = None
+        self._visible_children: Dict[ResDirectory, List[Any]] = {}
+        self._visible_rows: Dict[Any, int] = {}
+        self._nonempty: Set[Any] = set()
+        self._size_labels: Dict[Any, str] = {}
+
+    def set_root(self, root: Optional[ResDirectory]) -> None:
+        self.beginResetModel()
+        self.root = root
+        self._size_labels.clear()
+        self.visible = None
+        self._visible_children.clear()
+        self._visible_rows.clear()
+        self.endResetModel()
+
+    def set_filter(self, visible: Optional[Set[Any]]) -> None:
+        if visible is None and self.visible is None:
+            return
+        # only directories the view has already asked about are diffed,
+        # everything else is filtered lazily the first time it is shown
+        seen = sorted(self._visible_children, key=ResTreeModel._depth)
+        current: Dict[ResDirectory, List[Any]] = {
+            node: list(children) for node, children in self._visible_children.items()
+        }
+        self._visible_children = current
+        self.visible = visible
+        self._nonempty = {node.parent for node in visible} if visible else set()
+
+        attached: Set[Any] = set()
+        for node in seen:
+            if node.parent is not None and (
+                node.parent not in attached
+                or (visible is not None and node not in visible)
+            ):
+                del current[node]
+                continue
+            attached.add(node)
+            self._apply_filter(node, current[node])
+
+        if visible is None:
+            # back to the unfiltered tree, rows are the trie's own again
+            for node in current:
+                current[node] = node.children
+            self._visible_rows.clear()
+        # expand arrows of rows that did not move may still have changed
+        self.tree.scheduleDelayedItemsLayout()
+
+    def _apply_filter(self, node: ResDirectory, children: List[Any]) -> None:
+        visible = self.visible
+        wanted = (
+            node.children
+            if visible is None
+            else [child for child in node.children if child in visible]
+        )
+        parent = self.index_for(node)
+        if not self.tree.isExpanded(parent):
+            # nothing under a collapsed directory is on screen, so it is
+            # cheaper to swap its rows wholesale than to diff them
+            if children != wanted:
+                if children:
+                    self.beginRemoveRows(parent, 0, len(children) - 1)
+                    children.clear()
+                    self.endRemoveRows()
+                if wanted:
+                    self.beginInsertRows(parent, 0, len(wanted) - 1)
+                    children.extend(wanted)
+                    self.endInsertRows()
+            return
 
-    def _is_protected(self, client: Any) -> bool:
-        return bool(client["protected"])
+        keep = set(wanted)
+        row = len(children) - 1
+        while row >= 0:
+            if children[row] in keep:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and children[row] not in keep:
+                row -= 1
+            self.beginRemoveRows(parent, row + 1, last)
+            del children[row + 1 : last + 1]
+            self.endRemoveRows()
+
+        present = set(children)
+        row = 0
+        while row < len(wanted):
+            if row < len(children) and children[row] is wanted[row]:
+                row += 1
+                continue
+            end = row
+            while end < len(wanted) and wanted[end] not in present:
+                end += 1
+            self.beginInsertRows(parent, row, end - 1)
+            children[row:row] = wanted[row:end]
+            self.endInsertRows()
+            row = end
+
+    def add_media(self, bank: ResBank, media: List[Any]) -> None:
+        # listed on demand under the bank's own row, and left visible even
+        # when a search filter is active
+        parent = self.index_for(bank)
+        if media:
+            self.beginInsertRows(parent, 0, len(media) - 1)
+        ResTrie.add_media(bank, media)
+        self._visible_children[bank] = bank.children
+        if media:
+            self.endInsertRows()
 
-    def _get_build(self, client: Any) -> int:
-        return int(client["build"])
+    @staticmethod
+    def _depth(node: Any) -> int:
+        depth = 0
+        while node.parent is not None:
+            node = node.parent
+            depth += 1
+        return depth
+
+    def set_header_label(self, text: str) -> None:
+        self.header_label = text
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, 0)
+
+    def node(self, index: QModelIndex) -> Any:
+        return index.internalPointer() if index.isValid() else None
+
+    def index_for(self, node: Any, column: int = 0) -> QModelIndex:
+        return self.createIndex(self._row(node), column, node)
+
+    def _children(self, node: ResDirectory) -> List[Any]:
+        children = self._visible_children.get(node)
+        if children is None:
+            if self.visible is None:
+                children = node.children
+            else:
+                children = [child for child in node.children if child in self.visible]
+            self._visible_children[node] = children
+        return children
+
+    def _row(self, node: Any) -> int:
+        if node.parent is None:
+            return 0
+        # rows are renumbered lazily, a stale entry is caught by checking
+        # it still points back at the node
+        children = self._children(node.parent)
+        row = self._visible_rows.get(node, node.row)
+        if row >= len(children) or children[row] is not node:
+            for i, child in enumerate(children):
+                self._visible_rows[child] = i
+            row = self._visible_rows[node]
+        return row
+
+    def index(  # type: ignore
+        self, row: int, column: int, parent: QModelIndex = QModelIndex()
+    ) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, self.root)
+        return self.createIndex(
+            row, column, self._children(parent.internalPointer())[row]
+        )
 
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:  # type: ignore
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None:
+            return QModelIndex()
+        return self.createIndex(self._row(parent), 0, parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        if not parent.isValid():
+            return 1 if self.root is not None else 0
+        node = parent.internalPointer()
+        if isinstance(node, ResFile) and not isinstance(node, ResBank):
+            return 0
+        return len(self._children(node))
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 2
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if not parent.isValid():
+            return self.root is not None
+        node = parent.internalPointer()
+        if not isinstance(node, (ResDirectory, ResBank)):
+            return False
+        # answered without filtering the children, so rows the view only
+        # draws an arrow for never need diffing
+        children = self._visible_children.get(node)
+        if children is not None:
+            return bool(children)
+        if self.visible is None:
+            return bool(node.children)
+        return node in self._nonempty
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def headerData(  # type: ignore
+        self,
+        section: int,
+        orientation: Qt.Orientation,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> Any:
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return self.header_label if section == 0 else "Size"
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if index.column() == 1:
+            if role == Qt.ItemDataRole.DisplayRole:
+                label = self._size_labels.get(node)
+                if label is None:
+                    label = self._size_labels[node] = self.tree._format_filesize(
+                        node.size
+                    )
+                return label
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return node.name
+        elif role == Qt.ItemDataRole.DecorationRole:
+            if node.parent is None:
+                return ResIcons.root()
+            elif isinstance(node, ResDirectory):
+                return ResIcons.directory()
+            return ResIcons.for_file(node.name)
+        elif role == Qt.ItemDataRole.ToolTipRole and isinstance(node, ResFile):
+            return DB.description(node.name) or None
+        elif role == Qt.ItemDataRole.UserRole and isinstance(node, ResFile):
+            return DB.aliases(node.name)
+        return None
+
+
+class ResTree(QTreeView):
+    status_changed = pyqtSignal(str)
+    # every tab shares the shared cache action, it is only enabled again
+    # once none of them is loading
+    loading: Set["ResTree"] = set()
 
-class ResTree(QTreeWidget):
     def __init__(
         self,
         parent: Any = None,
@@ -218,11 +474,13 @@ class ResTree(QTreeWidget):
     ):
         super().__init__(parent)
 
-        self.setHeaderLabel("res: ► ")
+        self.res_model = ResTreeModel(self)
+        self.setModel(self.res_model)
+        self.setUniformRowHeights(True)
+
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)  # type: ignore
-        self.itemSelectionChanged.connect(self._show_selected_item)  # type: ignore
-        self.setHeaderLabels(["", "Size"])  # type: ignore
+        self.selectionModel().selectionChanged.connect(self._show_selected_item)  # type: ignore
 
         self.setColumnWidth(0, 775)
         self.setColumnWidth(1, 50)
@@ -231,20 +489,32 @@ class ResTree(QTreeWidget):
         if self._header:
             self._header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
 
-        self.setSelectionMode(QTreeWidget.SelectionMode.ExtendedSelection)
+        self.setSelectionMode(QTreeView.SelectionMode.ExtendedSelection)
 
         self.last_saved_dir: str = ""
         self.settings = QSettings("cynostudios", "Cyno Exporter")
 
         self.chinese_client: bool = chinese_client
         self.client: Any = client
+        self.resindex = ResFileIndex(
+            chinese_client=chinese_client, event_logger=event_logger
+        )
+        self.store = ResFileStore(self.resindex.resources_url, event_logger)
+        self.converter = Converter(event_logger)
+        self.export_worker: Optional[FolderExportWorker] = None
 
         self.shared_cache: Any = shared_cache
         self.are_resfiles_loaded = False
         self.event_logger: Any = event_logger
 
+        self.loader: Optional[ResTreeLoader] = None
+        self.status = ""
+        self.search_index: Optional[SearchIndex] = None
+        self.search_results: List[ResFile] = []
+        self.progress_bar: Optional[ProgressBar] = None
+        self.load_start_time = 0.0
+
         self.protected_label = None
-        self.icon_atlas = QPixmap("./icons/icons.png")
         try:
             self.config = json.loads(open(CONFIG_FILE, "r", encoding="utf-8").read())
         except:
@@ -258,99 +528,28 @@ class ResTree(QTreeWidget):
     def mouseMoveEvent(self, e):  # type: ignore
         return
 
+    def selected_nodes(self) -> List[Any]:
+        return [
+            self.res_model.node(index)
+            for index in self.selectionModel().selectedRows(0)  # type: ignore
+        ]
+
     def _show_selected_item(self) -> Any:
         try:
-            print(f"Selected item: {cast(EVEFile, self.selectedItems()[0]).respath}")
-            self.setHeaderLabel(
+            print(f"Selected item: {cast(ResFile, self.selected_nodes()[0]).respath}")
+            self.res_model.set_header_label(
                 "res: ► "
-                + cast(EVEFile, self.selectedItems()[0]).respath.replace("/", " ► ")
+                + cast(ResFile, self.selected_nodes()[0]).respath.replace("/", " ► ")
             )
         except:
             pass
 
-    def _get_path_segments(self, item: Any) -> str:
-        path_segments: Any = []
-        try:
-            while item and item.text(0) != "res:":
-                path_segments.insert(0, item.text(0))
-                item = item.parent()
-
-            return cast(str, os.path.join(*path_segments))
-        except:
-            return ""
-
-    def _get_directory_size(self, directory: EVEDirectory) -> int:
-        total = 0
-        for child in directory.items:
-            if isinstance(child, EVEFile):
-                total += int(child.size)
-            elif isinstance(child, EVEDirectory):
-                total += int(self._get_directory_size(child))
-        directory.size = total
-        return total
-
-    def copy_folder_files(
-        self, folder_item: Any, base_path: str
-    ) -> List[QTreeWidgetItem]:
-        files: List[QTreeWidgetItem] = []
-        for i in range(folder_item.childCount()):
-            child = folder_item.child(i)
-            child_name = child.text(0)
-            child_path = os.path.join(base_path, child_name)
-
-            if child.childCount() > 0:
-                files.extend(self.copy_folder_files(child, child_path))
-            else:
-                files.append(child)
-
-        return files
-
-    def download_file_itemless(
-        self, resfile_hash: Union[str, None], dest_path: str
-    ) -> None:
-        resindex = ResFileIndex(
-            chinese_client=self.chinese_client, event_logger=self.event_logger
-        )
-        url = None
-        try:
-            url = f"{resindex.resources_url}/{resfile_hash}"
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                with open(dest_path, "wb") as f:
-                    f.write(response.content)
-            elif response.status_code == 404:
-                self.event_logger.add(f"404 error: {url}")
-                return
-        except:
-            self.event_logger.add(f"Request failed: {url}")
-
-    def download_file(self, item: EVEFile, dest_path: str, retries: int = 0) -> Any:
-        resindex = ResFileIndex(
-            chinese_client=self.chinese_client, event_logger=self.event_logger
-        )
-        url = None
-        try:
-            url = f"{resindex.resources_url}/{item.resfile_hash}"
-            response = requests.get(url)
-            if response.status_code == 200:
-                with open(dest_path, "wb") as f:
-                    f.write(response.content)
-                if os.path.getsize(dest_path) != item.size:
-                    self.event_logger.add(
-                        f"resfile size doesn't match: {dest_path}, re-trying..."
-                    )
-                    if retries < 3:
-                        self.download_file(item, dest_path, retries + 1)
-            elif response.status_code == 404:
-                self.event_logger.add(f"404 error: {item.filename}")
-                return
-            return item.filename
-        except:
-            self.event_logger.add(f"Request failed: {url}")
+    def copy_folder_files(self, folder: ResDirectory) -> List[ResFile]:
+        return list(ResTrie.iter_files(folder))
 
     def _save_file_dialog(
         self,
-        item: Union[Union[List[EVEFile], EVEFile], List[QTreeWidgetItem]],
+        item: Union[List[ResFile], ResFile],
         type: str,
         is_multi_select: bool = False,
     ):
@@ -359,6 +558,8 @@ class ResTree(QTreeWidget):
         self.last_saved_dir = self.settings.value("last_dir", "")
 
         if is_multi_select:
+            if self._export_running():
+                return
             destination_path = QFileDialog.getExistingDirectory(
                 self,
                 "Select Destination",
@@ -369,17 +570,16 @@ class ResTree(QTreeWidget):
             if not destination_path:
                 return
 
-            item = cast(List[EVEFile], item)
-            for file in item:
-                out_path = os.path.join(destination_path, file.text(0))
-                self._save_file(file, out_path, type)
+            self._save_files_command(
+                cast(List[ResFile], item), type, flat=True, dest_folder=destination_path
+            )
             return
 
-        item = cast(EVEFile, item)
+        item = cast(ResFile, item)
         destination_path, _ = QFileDialog.getSaveFileName(
             self,
             "Save File",
-            os.path.join(self.last_saved_dir, item.text(0)),
+            os.path.join(self.last_saved_dir, item.name),
             "All Files(*.)",
             options=options,
         )
@@ -390,120 +590,139 @@ class ResTree(QTreeWidget):
 
         self._save_file(item, destination_path, type)
 
-    def _save_file(self, item: QTreeWidgetItem, out_path: str, type: Any):
-        if not isinstance(item, EVEFile):
+    def _save_file(self, item: Any, out_path: str, type: Any):
+        if not isinstance(item, ResFile):
             return
 
+        if isinstance(item, ResBankMedia):
+            with self._bank_file(item.parent) as bank_path:
+                if bank_path is None:
+                    return
+                if self.converter.convert_media(bank_path, item, out_path, type):
+                    return
+            return item.name
+
         if self.client is None:
-            folder, resfile_hash = item.resfile_hash.split("/", 1)
-            shutil.copy(
-                os.path.join(
-                    self.config["SharedCacheLocation"], "ResFiles", folder, resfile_hash
-                ),
-                out_path,
-            )
-        else:
-            self.download_file(item, out_path)
-
-        if type == ConvertTypes.OBJ:
-            Wavefront.to_obj(out_path)
-            self.event_logger.add(f"OBJ exported: {out_path}")
-        elif type == ConvertTypes.PNG:
-            NvttExport(PROC).run(out_path)
-            self.event_logger.add(f"DDS exported: {out_path}")
-        elif type == ConvertTypes.OGG:
-            stdout, wem = Ww2Ogg().run(out_path)
-            temp = os.path.join(
-                os.path.dirname(out_path), f"{out_path.split('.')[0]}.temp"
+            ResFileStore.copy_shared(
+                self.config["SharedCacheLocation"], item, out_path
             )
+        elif self.store.download(item, out_path) is None:
+            return
 
-            if stdout is not None:
-                self.event_logger.add(f"Could not convert: {out_path}\n\n{str(stdout)}")
+        error = self.converter.convert(out_path, type)
+        if error is not None:
+            if type != ConvertTypes.BLACK:
                 return
-
-            os.remove(out_path)
-            Revorb().run(wem, temp)
-            os.remove(wem)
-            os.rename(
-                temp,
-                os.path.join(
-                    os.path.dirname(out_path), f"{out_path.split('.')[0]}.ogg"
-                ),
-            )
-            self.event_logger.add(f"WEM exported: {out_path}")
-        elif type == ConvertTypes.BLACK:
-            stdout: Any = BlackReader().run(out_path)
-
-            if stdout:
-                QMessageBox.warning(self, "Error", stdout)
-            else:
-                os.remove(out_path)
-
-        return item.text(0)
-
-    def _save_folder_command(self, item: EVEDirectory):
-        options = (
-            QFileDialog.Option.DontUseNativeDialog | QFileDialog.Option.ShowDirsOnly
-        )
-        dest_folder = QFileDialog.getExistingDirectory(
-            self, "Select Destination", self.last_saved_dir, options=options
-        )
-        if not dest_folder:
+            QMessageBox.warning(self, "Error", error)
+
+        return item.name
+
+    def _fetch_file(self, item: Any, out_path: str, type: str) -> Any:
+        # soundbank media that get converted are read from the bank by the
+        # conversion, all that is fetched is the bank itself
+        if isinstance(item, ResBankMedia) and type != ConvertTypes.GENERIC:
+            with self._bank_file(item.parent) as bank_path:
+                return item.name if bank_path is not None else None
+        return self._save_file(item, out_path, ConvertTypes.GENERIC)
+
+    def _convert_file(self, item: Any, out_path: str, type: str) -> Optional[str]:
+        if isinstance(item, ResBankMedia):
+            with self._bank_file(item.parent) as bank_path:
+                if bank_path is None:
+                    return "soundbank unavailable"
+                return self.converter.convert_media(bank_path, item, out_path, type)
+        return self.converter.convert(out_path, type)
+
+    @contextmanager
+    def _bank_file(self, bank: Any) -> Iterator[Optional[str]]:
+        # banks are mapped where they are, in the shared or download cache
+        if self.client is None:
+            yield ResFileStore.shared_path(self.config["SharedCacheLocation"], bank)
             return
+        with self.store.cached(bank) as bank_path:
+            if bank_path is None:
+                self.event_logger.add(f"Could not fetch soundbank: {bank.name}")
+            yield bank_path
+
+    def _list_media_command(self, bank: ResBank) -> None:
+        with self._bank_file(bank) as bank_path:
+            if bank_path is None:
+                return
+            try:
+                media = Bnk.read(bank_path)
+            except (BnkError, OSError) as e:
+                QMessageBox.warning(self, "Error", f"Could not read {bank.name}: {e}")
+                return
+        self.res_model.add_media(bank, media)
+        self.expand(self.res_model.index_for(bank))
+        self.event_logger.add(f"{len(media)} embedded media in {bank.name}")
 
-        path_segments: str = self._get_path_segments(item)
-        files = self.copy_folder_files(item, path_segments)
-
-        loading = LoadingScreenWindow(files, stay_on_top=True)
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as worker:
-            futures: List[Any] = []
-
-            for file in files:
-                if isinstance(file, EVEFile):
-                    file_path = os.path.normpath(
-                        os.path.join(dest_folder, file.respath)
-                    )
-                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                    futures.append(
-                        worker.submit(
-                            self._save_file, file, file_path, ConvertTypes.GENERIC
-                        )
-                    )
-
-            for future in concurrent.futures.as_completed(futures):
-                loading.label.setText(future.result())
-                loading.setValue(loading.value() + 1)
-                QApplication.processEvents()
-
-        self.event_logger.add(f"Exported {len(files)} resfiles to {dest_folder}")
-        loading.close()
+    def _save_folder_command(self, item: ResDirectory):
+        self._save_files_command(self.copy_folder_files(item))
 
-    def _start_loading(self, root: Any, resfileindex_path: str, bnk_path: str):
-        with open(resfileindex_path, "r", encoding="utf-8") as f:
-            resfileindex: List[Dict[str, Any]] = ResFileIndex.resindexfile_object(
-                f.read()
+    def _save_files_command(
+        self,
+        files: List[ResFile],
+        type: str = ConvertTypes.GENERIC,
+        flat: bool = False,
+        dest_folder: str = "",
+    ):
+        # downloads and conversions both run off the gui thread, see
+        # ExportEngine
+        if self._export_running():
+            return
+        if not dest_folder:
+            options = (
+                QFileDialog.Option.DontUseNativeDialog
+                | QFileDialog.Option.ShowDirsOnly
             )
+            dest_folder = QFileDialog.getExistingDirectory(
+                self, "Select Destination", self.last_saved_dir, options=options
+            )
+        if not dest_folder:
+            return
 
-        bnk_hash: Union[str, None] = ResFileIndex.get_soundbankinfo(resfileindex)
-        self.download_file_itemless(bnk_hash, bnk_path)
-
-        with open(bnk_path, "r", encoding="utf-8") as f:
-            bnk = json.load(f)
-
-        start_time = time.time()
-
-        self.event_logger.add("Loading resfiles...")
-        self._load_file_tree(root, resfileindex, bnk)
-        self.event_logger.add(f"Took {time.time() - start_time:.2f}s to load resfiles")
-
-    def load_resfiles(self, parent: QTreeWidget, client: Any = None) -> None:
-        self.shared_cache.setEnabled(False)
-        if self.are_resfiles_loaded:
+        loading = LoadingScreenWindow(files, stay_on_top=True, cancellable=True)
+        worker = FolderExportWorker(self, dest_folder, files, type, flat)
+        loading.canceled.connect(worker.engine.cancel)
+
+        def on_progress(done: int, total: int, name: str) -> None:
+            if name:
+                loading.label.setText(name)
+            loading.setValue(done)
+
+        def on_exported(done: int, skipped: int, cancelled: bool) -> None:
+            message = f"Exported {done} resfiles to {dest_folder}"
+            if skipped:
+                message += f" ({skipped} already exported)"
+            if cancelled:
+                message += ", cancelled"
+            if worker.engine.failed:
+                message += f", {len(worker.engine.failed)} failed"
+            self.event_logger.add(message)
+            loading.close()
+            self.export_worker = None
+
+        worker.progress.connect(on_progress)
+        worker.exported.connect(on_exported)
+        self.export_worker = worker
+        worker.start()
+
+    def _export_running(self) -> bool:
+        # one export per tab, asked before a destination is picked
+        if self.export_worker is None:
+            return False
+        message = "An export is already running, wait for it to finish or cancel it"
+        self.event_logger.add(message)
+        QMessageBox.information(self, "Export", message)
+        return True
+
+    def load_resfiles(self, parent: QTreeView, client: Any = None) -> None:
+        if self.are_resfiles_loaded or self.loader is not None:
             return
-        parent.clear()
-        root = EVEDirectory(parent, text="res:", icon=QIcon("./icons/res.png"))
-        root.setExpanded(True)
+        ResTree.loading.add(self)
+        self.shared_cache.setEnabled(False)
+        self.res_model.set_root(None)
 
         if self.protected_label is not None:
             self.protected_label.close()
@@ -514,171 +733,66 @@ class ResTree(QTreeWidget):
 
         if self.client is None:
             self.config = json.loads(open(CONFIG_FILE, "r").read())
-            try:
-                shared_cache_path = os.path.join(
-                    self.config["SharedCacheLocation"], "tq", "resfileindex.txt"
-                )
-                resfileindex_path = os.path.join(shared_cache_path, "resfileindex.txt")
-                bnk_path = "./resindex/soundbanksinfo.json"
-                self._start_loading(root, shared_cache_path, bnk_path)
-            except OSError:
-                QMessageBox.warning(
-                    self, "Error", f"Invalid Shared Cache location. Check config.json"
-                )
-        else:
-            resindex = ResFileIndex(
-                chinese_client=self.chinese_client, event_logger=self.event_logger
-            )
-            build = resindex.fetch_client(client)
-            if build is not None:
-                resfileindex_file: str = resindex.fetch_resindexfile(build=build)
-                resfileindex_path: str = os.path.join("resindex", resfileindex_file)
-
-                bnk_path = f"./resindex/{build}_soundbanksinfo.json"
-
-                self._start_loading(root, resfileindex_path, bnk_path)
-            else:
-                root.setHidden(True)
-                self.protected_label.setGeometry(25, 25, 300, 50)
-                self.protected_label.show()
-                self.event_logger.add(
-                    "Could not load resfiles due to client protection"
-                )
-
-        self.shared_cache.setEnabled(True)
-
-    def add_directory(
-        self, part: str, parent: EVEDirectory, path: str, dir_map: Dict[str, Any]
-    ):
-        if path not in dir_map:
-            dir_item = EVEDirectory(
-                parent,
-                text=part,
-                filename=part,
-                icon=QIcon(self.icon_atlas.copy(16, 0, 15, 16)),
-            )
-            dir_map[path] = dir_item
-            parent.add(dir_item)
-            parent.setText(1, self._format_filesize(self._get_directory_size(parent)))
-        return dir_map[path]
-
-    def add_resfile_filter(self, i: int, name: str) -> bool:
-        if "_lowdetail" in name or "_mediumdetail" in name:
-            i += 1
-            return True
-        return False
-
-    def _load_file_tree(
-        self, root: Any, resfiles: List[Dict[str, Any]], bankfileinfo: Any
-    ):
-        dir_map: Dict[str, Any] = {}
-
-        loading = ProgressBar(resfiles, self)
-        # loading_label = QLabel("Building tree...", self)
-        # loading_label.setGeometry(5, 770, 900, 15)
-        # loading_label.setStyleSheet("font-weight: bold;")
-        # loading_label.show()
-
-        for i, resfile in enumerate(resfiles):
-            soundbank_directory = ""
-            if ".wem" in resfile["res_path"]:
-                search_id = os.path.basename(resfile["res_path"]).split(".")[0]
-                if "StreamedFiles" in bankfileinfo["SoundBanksInfo"]:
-                    for bank in bankfileinfo["SoundBanksInfo"]["StreamedFiles"]:
-                        if search_id == bank["Id"]:
-                            resfiles[i]["res_path"] = (
-                                bank["Path"].replace("\\", "/").lower()
-                            )
-                        else:
-                            resfiles[i]["res_path"] = resfile["res_path"]
-                else:
-                    for bank in bankfileinfo["SoundBanksInfo"]["SoundBanks"]:
-                        if "Media" in bank:
-                            for mediaFile in bank["Media"]:
-                                if search_id == mediaFile["Id"]:
-                                    soundbank_directory = bank["ShortName"]
-                                    resfiles[i]["res_path"] = mediaFile[
-                                        "CachePath"
-                                    ].lower()
-                                else:
-                                    resfiles[i]["res_path"] = resfile["res_path"]
-
-            path_segments = resfile["res_path"].split("/")
-            parent = root
-            full_path = ""
-
-            file_name = path_segments[-1]
-            ext = os.path.splitext(file_name)
-            icon = self.set_icon_from_extension(ext[1])
-
-            # filter junk
-            if self.add_resfile_filter(i, file_name):
-                continue
-
-            if soundbank_directory:
-                parent = self.add_directory("soundbanks", root, full_path, dir_map)
-            if resfile["res_path"].lower().startswith("sfx") and soundbank_directory:
-                full_path = os.path.join(full_path, soundbank_directory)
-                parent = self.add_directory(
-                    soundbank_directory, parent, full_path, dir_map
-                )
 
-            for segment in path_segments[:-1]:
-                full_path = os.path.join(full_path, segment)
-                parent = self.add_directory(segment, parent, full_path, dir_map)
+        self.load_start_time = time.time()
+        self.progress_bar = ProgressBar([], self)
+
+        self.loader = ResTreeLoader(self)
+        self.loader.status.connect(self._set_status)
+        self.loader.progress.connect(self._on_load_progress)
+        self.loader.loaded.connect(self._on_loaded)
+        self.loader.protected.connect(self._on_protected)
+        self.loader.failed.connect(self._on_load_failed)
+        self.loader.start()
+
+    def _set_status(self, status: str) -> None:
+        if status != self.status:
+            self.status = status
+            self.status_changed.emit(status)
+
+    def _on_load_progress(self, value: int, total: int) -> None:
+        if self.progress_bar is not None:
+            self.progress_bar.setMaximum(total)
+            self.progress_bar.setValue(value)
+        if total:
+            self._set_status(f"{value * 100 // total}%")
+
+    def _on_protected(self) -> None:
+        if self.protected_label is not None:
+            self.protected_label.setGeometry(25, 25, 300, 50)
+            self.protected_label.show()
+        self.event_logger.add("Could not load resfiles due to client protection")
+        self._finish_loading("protected")
+
+    def _on_load_failed(self, message: str) -> None:
+        if self.isVisible():
+            QMessageBox.warning(self, "Error", message)
+        else:
+            self.event_logger.add(message)
+        self._finish_loading("failed")
 
-            if not file_name in DB:
-                db = DB.setdefault(
-                    file_name, {"description": "", "aliases": [file_name]}
-                )
-            else:
-                db = DB[file_name]
-
-            description = db.get("description", "")
-            aliases = db.get("aliases", [])
-            file_item = EVEFile(
-                parent,
-                text=file_name,
-                filename=file_name,
-                description=description,
-                size=resfile["size"],
-                respath=resfile["res_path"],
-                resfile_hash=resfile["resfile_hash"],
-                icon=icon,
-            )
-            file_item.setData(0, Qt.ItemDataRole.UserRole, aliases)
-            file_size = int(resfile["size"])
-            file_item.setText(1, self._format_filesize(file_size))
-            parent.add(file_item)
-
-            current = parent
-            while current:
-                current.size = int(current.size) + file_size
-                current.setText(1, self._format_filesize(current.size))
-                current = current.parent()
-
-            loading.setValue(i + 1)
-            QApplication.processEvents()
-
-        loading.close()
-        # loading_label.close()
+    def _on_loaded(self, trie: ResDirectory, search_index: SearchIndex) -> None:
+        self.res_model.set_root(trie)
+        self.search_index = search_index
+        self.expand(self.res_model.index_for(trie))
         self.are_resfiles_loaded = True
+        self.event_logger.add(
+            f"Took {time.time() - self.load_start_time:.2f}s to load resfiles"
+        )
+        self._finish_loading()
+
+    def _finish_loading(self, status: str = "") -> None:
+        if self.progress_bar is not None:
+            self.progress_bar.close()
+            self.progress_bar = None
+        self.loader = None
+        ResTree.loading.discard(self)
+        if not ResTree.loading:
+            self.shared_cache.setEnabled(True)
+        self._set_status(status)
 
     def set_icon_from_extension(self, ext: str) -> QIcon:
-        if ext == ".png":
-            return QIcon(self.icon_atlas.copy(97, 0, 15, 16))
-        elif ext == ".dds":
-            return QIcon(self.icon_atlas.copy(33, 0, 15, 16))
-        elif ext == ".jpg":
-            return QIcon(self.icon_atlas.copy(81, 0, 15, 16))
-        elif ext == ".gr2":
-            return QIcon(self.icon_atlas.copy(177, 0, 15, 16))
-        elif ext in (".txt", ".yaml", ".xml", ".json"):
-            return QIcon(self.icon_atlas.copy(130, 0, 15, 16))
-        elif ext in (".wem", ".webm"):
-            return QIcon(self.icon_atlas.copy(65, 0, 15, 16))
-        else:
-            return QIcon(self.icon_atlas.copy(161, 0, 15, 16))
+        return ResIcons.extension(ext)
 
     def _format_filesize(self, size: Union[float, int]):
         size = float(size)
@@ -688,11 +802,11 @@ class ResTree(QTreeWidget):
                 return f"{size:.2f} {unit}"
 
     def show_context_menu(self, point: Any) -> Any:
-        item = self.itemAt(point)
+        item = self.res_model.node(self.indexAt(point))
         if item:
             menu: Any = QMenu(self)
 
-            if isinstance(item, EVEDirectory) and item.text(0) != "res:":
+            if isinstance(item, ResDirectory) and item.parent is not None:
                 menu.addAction("Save folder").triggered.connect(
                     lambda: self._save_folder_command(item)
                 )
@@ -703,18 +817,18 @@ class ResTree(QTreeWidget):
                 # save_folder_and_convert_dds_action.triggered.connect(
                 #     lambda: self._save_folder_command(item)
                 # )
-            elif isinstance(item, EVEFile):
+            elif isinstance(item, ResFile):
                 sub_menu: Any = QMenu("Export...", menu)
                 sub_menu.installEventFilter(ContextMenuFilter(sub_menu))
                 menu.addMenu(sub_menu)
-                if len(self.selectedItems()) > 1:
-                    items: List[QTreeWidgetItem] = self.selectedItems()
+                if len(self.selected_nodes()) > 1:
+                    items: List[Any] = self.selected_nodes()
 
                     def ctx() -> str:
-                        ALL_DDS = all(f.text(0).lower().endswith(".dds") for f in items)
-                        ALL_GR2 = all(f.text(0).lower().endswith(".gr2") for f in items)
-                        ALL_WEM = all(f.text(0).lower().endswith(".wem") for f in items) 
-                        ALL_BLACK = all(f.text(0).lower().endswith(".black") for f in items)
+                        ALL_DDS = all(f.name.lower().endswith(".dds") for f in items)
+                        ALL_GR2 = all(f.name.lower().endswith(".gr2") for f in items)
+                        ALL_WEM = all(f.name.lower().endswith(".wem") for f in items) 
+                        ALL_BLACK = all(f.name.lower().endswith(".black") for f in items)
 
                         if ALL_DDS:
                             return ConvertTypes.PNG
@@ -731,7 +845,7 @@ class ResTree(QTreeWidget):
 
                     sub_menu.addAction("Save selected files").triggered.connect(
                         lambda: self._save_file_dialog(
-                            cast(List[EVEFile], items),
+                            cast(List[ResFile], items),
                             ConvertTypes.GENERIC,
                             is_multi_select=True,
                         )
@@ -745,33 +859,65 @@ class ResTree(QTreeWidget):
                                 items, _ctx, is_multi_select=True
                             )
                         )
+                    if _ctx == ConvertTypes.OBJ:
+                        sub_menu.addAction("Save selected as .glb").triggered.connect(
+                            lambda: self._save_file_dialog(
+                                items, ConvertTypes.GLB, is_multi_select=True
+                            )
+                        )
                 else:
                     sub_menu.addAction("Save file").triggered.connect(
                         lambda: self._save_file_dialog(item, ConvertTypes.GENERIC)
                     )
                     sub_menu.addSeparator()
-                    if item.text(0).endswith(".gr2"):
+                    if item.name.endswith(".gr2"):
                         sub_menu.addSeparator()
                         sub_menu.addAction("Save as .obj").triggered.connect(
                             lambda: self._save_file_dialog(item, ConvertTypes.OBJ)
                         )
-                    elif item.text(0).endswith(".dds"):
+                        sub_menu.addAction("Save as .glb").triggered.connect(
+                            lambda: self._save_file_dialog(item, ConvertTypes.GLB)
+                        )
+                    elif item.name.endswith(".dds"):
                         sub_menu.addSeparator()
                         sub_menu.addAction("Save as .png").triggered.connect(
                             lambda: self._save_file_dialog(item, ConvertTypes.PNG)
                         )
-                    elif item.text(0).endswith(".wem"):
+                    elif item.name.endswith(".wem"):
                         sub_menu.addSeparator()
                         sub_menu.addAction("Save as .ogg").triggered.connect(
                             lambda: self._save_file_dialog(item, ConvertTypes.OGG)
                         )
-                    elif item.text(0).endswith(".black"):
+                    elif item.name.endswith(".black"):
                         sub_menu.addSeparator()
                         sub_menu.addAction("Save as .json").triggered.connect(
                             lambda: self._save_file_dialog(item, ConvertTypes.BLACK)
                         )
+                    if isinstance(item, ResBank) and item.children:
+                        sub_menu.addSeparator()
+                        sub_menu.addAction("Save embedded media").triggered.connect(
+                            lambda: self._save_files_command(list(item.children))
+                        )
+                        sub_menu.addAction(
+                            "Save embedded media as .ogg"
+                        ).triggered.connect(
+                            lambda: self._save_files_command(
+                                list(item.children), ConvertTypes.OGG
+                            )
+                        )
+                    elif isinstance(item, ResBank):
+                        menu.addAction("List embedded media").triggered.connect(
+                            lambda: self._list_media_command(item)
+                        )
+
+                menu.addAction(f"{item.name}").setEnabled(False)
 
-                menu.addAction(f"{item.filename}").setEnabled(False)
+            if self.search_results:
+                results = list(self.search_results)
+                menu.addSeparator()
+                menu.addAction(
+                    f"Save search results ({len(results)} files)"
+                ).triggered.connect(lambda: self._save_files_command(results))
 
             menu.installEventFilter(ContextMenuFilter(menu))
 
@@ -848,11 +994,38 @@ class CynoExporterWindow(QMainWindow):
             shared_cache=self.set_shared_cache_action,
         )
 
-        self.tab_widget.addTab(self.shared_cache_tq, CLIENTS["sharedCache"]["name"])
-        self.tab_widget.addTab(self.tranquility, CLIENTS["tq"]["name"])
-        self.tab_widget.addTab(self.singularity, CLIENTS["sisi"]["name"])
-        self.tab_widget.addTab(self.serenity, CLIENTS["serenity"]["name"])
-        self.tab_widget.addTab(self.infinity, CLIENTS["infinity"]["name"])
+        config = self.shared_cache_tq.config
+        ResIcons.configure(config)
+        NvttExport.configure(config.get("TextureJobs"))
+        Dds.configure(config.get("TextureDecoder"), config.get("PngCompression"))
+        CDNSession.configure(
+            pool_size=config.get("HttpPoolSize"), retries=config.get("HttpRetries")
+        )
+        self.download_cache = ResFileCache(
+            config.get("DownloadCacheLocation", "./cache"),
+            int(config.get("DownloadCacheSize", 2048)) * 1024 * 1024,
+            config.get("SharedCacheLocation", ""),
+        )
+        for tree in (
+            self.tranquility,
+            self.singularity,
+            self.serenity,
+            self.infinity,
+        ):
+            tree.store.cache = self.download_cache
+
+        self.client_trees: Dict[str, ResTree] = {
+            "sharedCache": self.shared_cache_tq,
+            "tq": self.tranquility,
+            "sisi": self.singularity,
+            "serenity": self.serenity,
+            "infinity": self.infinity,
+        }
+        for key, tree in self.client_trees.items():
+            self.tab_widget.addTab(tree, CLIENTS[key]["name"])
+            tree.status_changed.connect(
+                lambda status, key=key: self._update_tab_status(key, status)
+            )
 
         self.menu_bar = QMenuBar()
         self.setMenuBar(self.menu_bar)
@@ -873,7 +1046,9 @@ class CynoExporterWindow(QMainWindow):
         self.tab_widget.currentChanged.connect(self.on_tab_change)
 
         self.text_box = QLineEdit()
-        self.text_box.setPlaceholderText("Search... ex: af3_t1.gr2, Punisher")
+        self.text_box.setPlaceholderText(
+            "Search... ex: af3_t1.gr2, Punisher, ext:dds size:>4mb path:dx9/model/ship"
+        )
         self.timer = QTimer()
         self.timer.setSingleShot(True)
         self.timer.timeout.connect(self._search)
@@ -899,48 +1074,9 @@ class CynoExporterWindow(QMainWindow):
         self.timer.stop()
         self.timer.start(400)
 
-    def _show_all_items(self, item: Any) -> None:
-        item.setHidden(False)
-        for i in range(item.childCount()):
-            if item:
-                self._show_all_items(item.child(i))
-
-    def _filter_items(self, item: EVEFile, search_str: str) -> Union[bool, str]:
-        text_lower = item.text(0).lower()
-        filename_lower = item.filename.lower()
-
-        aliases: List[Any] = item.data(0, Qt.ItemDataRole.UserRole) or []
-        found_alias = next(
-            (x for x in aliases if isinstance(x, str) and search_str in x.lower()), None
-        )
-
-        found = search_str in text_lower or search_str in filename_lower or found_alias
-        found_child = False
-        for i in range(item.childCount()):
-            found_child = self._filter_items(item.child(i), search_str) or found_child  # type: ignore
-        if item.text(0) != "res:":
-            item.setHidden(not (found or found_child))
-        return found or found_child
-
     def _search_shortcut(self):
         self.text_box.setFocus()
 
-    def _get_searches(self, item: QTreeWidgetItem, search_str: str) -> List[Any]:
-        results: List[QTreeWidgetItem] = []
-        aliases: List[Any] = item.data(0, Qt.ItemDataRole.UserRole) or []
-        found_alias = next(
-            (x for x in aliases if isinstance(x, str) and search_str in x.lower()), None
-        )
-        if isinstance(item, EVEFile) and (
-            found_alias or search_str in item.text(0).lower()
-        ):
-            results.append(item)
-
-        for i in range(item.childCount()):
-            results.extend(self._get_searches(item.child(i), search_str))  # type: ignore
-
-        return list(sorted(results, key=lambda x: len(x.text(0))))
-
     def _search(self):
 
         search_str = self.pending_query
@@ -950,23 +1086,29 @@ class CynoExporterWindow(QMainWindow):
         if not isinstance(tree, ResTree):
             return
 
-        self.search_results.clear()
+        self.search_results = []
         self.search_index = -1
 
-        root: Optional[EVEFile] = cast(EVEFile, tree.topLevelItem(0))
-        if not root:
+        root: Optional[ResDirectory] = tree.res_model.root
+        if not root or tree.search_index is None:
             return
 
+        tree.search_results = []
         if not search_str:
-            self._show_all_items(root)
             tree.collapseAll()
-            root.setExpanded(True)
+            tree.res_model.set_filter(None)
+            tree.expand(tree.res_model.index_for(root))
             return
 
-        search_str = search_str.lower()
-
-        self._filter_items(root, search_str)
-        self.search_results = self._get_searches(root, search_str)
+        try:
+            self.search_results = tree.search_index.search(search_str)
+        except QueryError as e:
+            self.search_label.setText(f"Invalid query: {e}")
+            return
+        tree.search_results = self.search_results
+        tree.res_model.set_filter(
+            tree.search_index.visible(search_str, self.search_results)
+        )
 
         if self.search_results:
             self.search_index = 0
@@ -977,21 +1119,22 @@ class CynoExporterWindow(QMainWindow):
             self.search_label.setText("")
 
     def _next_search_item(self):
-        tree: QTreeWidget = cast(QTreeWidget, self.tab_widget.currentWidget())
+        tree: ResTree = cast(ResTree, self.tab_widget.currentWidget())
         if not self.search_results:
             self._search()
             return
         self.search_index = (self.search_index + 1) % len(self.search_results)
         self._select_search_item(tree)
 
-    def _select_search_item(self, tree: QTreeWidget):
+    def _select_search_item(self, tree: ResTree):
         item = self.search_results[self.search_index]
-        parent = item.parent()
-        while parent:
-            tree.expandItem(parent)
+        index = tree.res_model.index_for(item)
+        parent = index.parent()
+        while parent.isValid():
+            tree.expand(parent)
             parent = parent.parent()
-        tree.setCurrentItem(item)
-        tree.scrollToItem(item, QTreeWidget.ScrollHint.PositionAtCenter)
+        tree.setCurrentIndex(index)
+        tree.scrollTo(index, QTreeView.ScrollHint.PositionAtCenter)
         self.search_label.setText(
             f"{self.search_index + 1} of {len(self.search_results)}"
         )
@@ -1002,8 +1145,11 @@ class CynoExporterWindow(QMainWindow):
         )
         if not folder:
             return
-        with open("./config.json", "w", encoding="utf-8") as f:
-            json.dump({"SharedCacheLocation": folder}, f, indent=4)
+        config = dict(self.shared_cache_tq.config)
+        config["SharedCacheLocation"] = folder
+        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=4)
+        self.download_cache.set_shared_cache(folder)
 
         self.tab_widget.tabBar().setEnabled(False)
         self.shared_cache_tq.are_resfiles_loaded = False
@@ -1015,10 +1161,28 @@ class CynoExporterWindow(QMainWindow):
     def closeEvent(self, event):
         # i do this because if you exit while its still loading resfiles
         # the app will persist due to how the loading widget operates
-        PROC.stdin.write("\nexit\n")
-        PROC.terminate()
         os.system('taskkill /F /IM "Cyno Exporter.exe"')
 
+    def _update_tab_status(self, key: str, status: str) -> None:
+        # "Tranquility (42%)" while loading, the plain name once it's ready
+        tree = self.client_trees[key]
+        name = CLIENTS[key]["name"]
+        index = self.tab_widget.indexOf(tree)
+        self.tab_widget.setTabText(index, f"{name} ({status})" if status else name)
+        self.tab_widget.setTabToolTip(
+            index, "Loaded" if tree.are_resfiles_loaded else status.capitalize()
+        )
+
+    def prefetch(self, keys: Any = True) -> None:
+        # loads every server's index in the background so switching tabs
+        # doesn't wait on it, keys is True for all of them or a list of
+        # CLIENTS keys
+        for key, tree in self.client_trees.items():
+            if tree.client is None:
+                continue
+            if keys is True or (isinstance(keys, list) and key in keys):
+                tree.load_resfiles(tree, tree.client)
+
     def on_tab_change(self, i):
         self.tab_widget.tabBar().setEnabled(False)
         self.event_logger.add(f"Switching server to: {self.tab_widget.tabText(i)}")
@@ -1198,11 +1362,16 @@ class ProgressBar(QProgressBar):
 
 
 class LoadingScreenWindow(QProgressDialog):
-    def __init__(self, files: List[Any], stay_on_top: bool = False):
+    def __init__(
+        self, files: List[Any], stay_on_top: bool = False, cancellable: bool = False
+    ):
         super().__init__()
         self.setLabelText("Loading...")
         self.setWindowTitle(WINDOW_TITLE)
-        self.setCancelButton(None)
+        if cancellable:
+            self.setCancelButtonText("Cancel")
+        else:
+            self.setCancelButton(None)
         self.setValue(0)
 
         self.label = QLabel("", self)
@@ -1226,9 +1395,16 @@ class LoadingScreenWindow(QProgressDialog):
 
 
 if __name__ == "__main__":
+    # converter workers are spawned, a frozen build has to run them
+    multiprocessing.freeze_support()
 
     parser = argparse.ArgumentParser()
     parser.add_argument("--dev", action="store_true")
+    parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        help="load every server's resfiles in the background at startup",
+    )
     args = parser.parse_args()
 
     app = QApplication(sys.argv)
@@ -1245,6 +1421,9 @@ if __name__ == "__main__":
         window.shared_cache_tq.load_resfiles(
             window.shared_cache_tq, window.shared_cache_tq.client
         )
+        prefetch = args.prefetch or window.shared_cache_tq.config.get("Prefetch")
+        if prefetch:
+            window.prefetch(prefetch)
         if tab_bar:
             tab_bar.setEnabled(True)
         sys.exit(app.exec())
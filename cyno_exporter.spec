@@ -1,6 +1,9 @@
 # -*- mode: python ; coding: utf-8 -*-
 
-import os, shutil
+import os, sys, shutil
+
+sys.path.insert(0, os.path.abspath("."))
+from utils.resdb import ResDB
 
 
 def copy_folders(folder, rootFolder):
@@ -21,7 +24,7 @@ os.makedirs("./dist/Cyno Exporter", exist_ok=True)
 copy_folders("./icons", "Cyno Exporter")
 copy_folders("./tools", "Cyno Exporter")
 shutil.copy("./icon.ico", "./dist/Cyno Exporter/icon.ico")
-shutil.copy("./db.json", "./dist/Cyno Exporter/db.json")
+ResDB.build("./db.json", "./dist/Cyno Exporter/db.sqlite")
 
 a = Analysis(
     ["cyno_exporter.py"],
@@ -33,7 +36,6 @@ a = Analysis(
     hooksconfig={},
     runtime_hooks=[],
     excludes=[
-        "numpy",
         "pkg_resources",
     ],
     noarchive=False,
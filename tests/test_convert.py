@@ -0,0 +1,53 @@
+import os
+import pytest
+import utils.convert
+from utils.convert import Converter
+
+
+class FakeWw2Ogg:
+    def run(self, path: str):
+        ogg = f"{os.path.splitext(path)[0]}.ogg"
+        with open(ogg, "wb") as f:
+            f.write(b"ww2ogg")
+        return None, ogg
+
+
+class FakeRevorb:
+    error = None
+
+    def run(self, ogg: str, temp: str) -> None:
+        with open(ogg, "rb") as f, open(temp, "wb") as out:
+            out.write(f.read() + b" revorb")
+        if FakeRevorb.error is not None:
+            raise FakeRevorb.error
+
+
+@pytest.fixture
+def wem(tmp_path, monkeypatch):
+    # a wem Wem can't read, so it always takes the plugin fallback, converted
+    # in this process rather than on the worker pool
+    monkeypatch.setattr(utils.convert, "Ww2Ogg", FakeWw2Ogg)
+    monkeypatch.setattr(utils.convert, "Revorb", FakeRevorb)
+    monkeypatch.setattr(
+        Converter,
+        "run_in_process",
+        staticmethod(lambda function, *args: function(*args)),
+    )
+    monkeypatch.setattr(FakeRevorb, "error", None)
+    path = tmp_path / "sound.wem"
+    path.write_bytes(b"RIFF" + bytes(40))
+    return path
+
+
+def test_wem_fallback(wem):
+    assert Converter._wem_to_ogg(str(wem)) is None
+    assert sorted(os.listdir(wem.parent)) == ["sound.ogg"]
+    assert (wem.parent / "sound.ogg").read_bytes() == b"ww2ogg revorb"
+
+
+def test_wem_fallback_revorb_fails(wem):
+    FakeRevorb.error = FileNotFoundError(2, "No such file or directory")
+    error = Converter._wem_to_ogg(str(wem))
+    assert error is not None and "could not run revorb" in error
+    # the wem is kept, the temp file and the unfinished ogg are gone
+    assert sorted(os.listdir(wem.parent)) == ["sound.wem"]
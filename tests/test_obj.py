@@ -0,0 +1,66 @@
+import json
+import numpy as np
+import pytest
+from utils.obj import Wavefront
+
+
+def baseline_obj(gr2_json: str) -> str:
+    # the writer Wavefront.to_obj started from, fed by json.load
+    with open(gr2_json, "r") as f:
+        meshes = json.load(f)["meshes"]
+    plaintext = []
+    model_offset = 1
+    for mesh in meshes:
+        vertex = mesh["vertex"]
+        plaintext.append(f"o {mesh['name']}")
+        for i in range(0, len(vertex["position"]), 3):
+            plaintext.append(f"v {' '.join(map(str, vertex['position'][i : i + 3]))}")
+        for i in range(0, len(vertex["texcoord0"]), 2):
+            plaintext.append(f"vt {' '.join(map(str, vertex['texcoord0'][i : i + 2]))}")
+        if vertex.get("normal"):
+            for i in range(0, len(vertex["normal"]), 3):
+                plaintext.append(
+                    f"vn {' '.join(map(str, vertex['normal'][i : i + 3]))}"
+                )
+        plaintext.append("s 1")
+        for indice in mesh["indices"]:
+            plaintext.append(f"usemtl {indice['name']}")
+            faces = indice["faces"]
+            for i in range(0, len(faces), 3):
+                v1, v2, v3 = (face + model_offset for face in faces[i : i + 3])
+                plaintext.append(f"f {v1}/{v1}/{v1} {v2}/{v2}/{v2} {v3}/{v3}/{v3}")
+        model_offset += len(vertex["position"]) // 3
+    return "\n".join(plaintext)
+
+
+def floats(values: np.ndarray) -> str:
+    # gr2tojson prints the shortest text of each float32
+    return f"[{','.join(values.astype(np.float32).astype(str))}]"
+
+
+@pytest.mark.parametrize("normals", [True, False])
+def test_matches_baseline(tmp_path, normals):
+    rng = np.random.default_rng(3)
+    meshes = []
+    for m, n in enumerate((50, 1, 200)):
+        # every magnitude, both exponent cut-offs and exact values
+        position = rng.uniform(-1, 1, 3 * n) * 10.0 ** rng.integers(-12, 20, 3 * n)
+        position[:3] = [0.001, 1e-4, 1e16][: len(position)]
+        texcoord = rng.random(2 * n)
+        texcoord[:2] = [0.5, -0.0]
+        faces = rng.integers(0, n, 3 * (n + 1))
+        normal = f', "normal": {floats(rng.uniform(-1, 1, 3 * n))}' if normals else ""
+        meshes.append(
+            f'{{"name": "mesh{m}", "vertex": {{"position": {floats(position)}, '
+            f'"texcoord0": {floats(texcoord)}{normal}}}, "indices": ['
+            f'{{"name": "mat{m}", "faces": [{",".join(map(str, faces))}]}}]}}'
+        )
+    path = tmp_path / "model.gr2"
+    with open(f"{path}.gr2_json", "w") as f:
+        f.write(f'{{"version": 1, "meshes": [{",".join(meshes)}]}}')
+
+    Wavefront.write_obj(Wavefront.from_gr2_json(str(path)), str(tmp_path / "model.obj"))
+    with open(tmp_path / "model.obj") as f:
+        written = f.read()
+    assert "0.001 " in written
+    assert written.splitlines() == baseline_obj(f"{path}.gr2_json").splitlines()
@@ -0,0 +1,155 @@
+import hashlib, http.server, json, os, threading
+from collections import Counter
+import pytest
+from utils.cdn import CDNSession
+from utils.resfileindex import ResFileIndex
+
+SOUNDBANKS = json.dumps({"SoundBanksInfo": {"SoundBanks": []}}).encode("utf-8")
+RESFILEINDEX = (
+    "res:/graphics/a.dds,ab/a,00000000000000000000000000000000,5\n"
+    f"res:/audio/soundbanksinfo.json,ab/sb,{hashlib.md5(SOUNDBANKS).hexdigest()},"
+    f"{len(SOUNDBANKS)}\n"
+).encode("utf-8")
+MANIFEST = (
+    f"app:/resfileindex.txt,ab/index,{hashlib.md5(RESFILEINDEX).hexdigest()},"
+    f"{len(RESFILEINDEX)}\n"
+).encode("utf-8")
+CLIENT = json.dumps({"build": 1234, "protected": False}).encode("utf-8")
+
+
+class Logger:
+    def __init__(self) -> None:
+        self.events = []
+
+    def add(self, event: str) -> None:
+        self.events.append(event)
+
+
+@pytest.fixture
+def cdn(tmp_path, monkeypatch):
+    # counts every request by path, the client json answers 304 to a
+    # matching ETag like the real CDN
+    requests = Counter()
+    conditional = []
+    bodies = {
+        "/eveclient_TQ.json": CLIENT,
+        "/eveonline_1234.txt": MANIFEST,
+        "/ab/index": RESFILEINDEX,
+    }
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            requests[self.path] += 1
+            if self.path == "/eveclient_TQ.json":
+                conditional.append(
+                    (
+                        self.headers.get("If-None-Match"),
+                        self.headers.get("If-Modified-Since"),
+                    )
+                )
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+            body = bodies.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", '"v1"')
+            self.send_header("Last-Modified", "Tue, 01 Sep 2026 00:00:00 GMT")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(CDNSession, "backoff", staticmethod(lambda attempt: 0))
+    resindex = ResFileIndex(event_logger=Logger())
+    resindex.binaries_url = f"http://127.0.0.1:{server.server_port}"
+    yield resindex, requests, conditional, bodies
+    server.shutdown()
+    server.server_close()
+
+
+def download(downloads):
+    def download(resfile_hash, path, size, md5):
+        downloads.append(resfile_hash)
+        with open(path, "wb") as f:
+            f.write(SOUNDBANKS)
+
+    return download
+
+
+def test_load_twice(cdn):
+    resindex, requests, conditional, _ = cdn
+    downloads = []
+    first = resindex.load_table("eveclient_TQ.json", "", download(downloads))
+    second = resindex.load_table("eveclient_TQ.json", "", download(downloads))
+
+    assert len(first) == len(second) == 2
+    # the client is revalidated, the manifest and resfileindex are only
+    # fetched once and the second table comes from the cache
+    assert requests == {
+        "/eveclient_TQ.json": 2,
+        "/eveonline_1234.txt": 1,
+        "/ab/index": 1,
+    }
+    assert conditional == [
+        (None, None),
+        ('"v1"', "Tue, 01 Sep 2026 00:00:00 GMT"),
+    ]
+    assert downloads == ["ab/sb"]
+    assert "Client not modified" in " ".join(resindex.event_logger.events)
+    assert "Using cached resfileindex" in resindex.event_logger.events[-1]
+
+
+def test_corrupt_manifest(cdn):
+    resindex, requests, _, bodies = cdn
+    # an error page served with a 200 is never written to disk
+    bodies["/eveonline_1234.txt"] = b"<html>maintenance</html>"
+    assert resindex.fetch_resindexfile(1234) == ""
+    bodies["/eveonline_1234.txt"] = MANIFEST
+    assert resindex.fetch_resindexfile(1234) == "1234_resfileindex.txt"
+    assert requests["/eveonline_1234.txt"] == 2
+
+    # a manifest corrupted on disk is fetched again, the resfileindex it
+    # names is still on disk and verified
+    with open("resindex/eveonline_1234.txt", "wb") as f:
+        f.write(MANIFEST[:20])
+    assert resindex.fetch_resindexfile(1234) == "1234_resfileindex.txt"
+    assert requests == {"/eveonline_1234.txt": 3, "/ab/index": 1}
+    with open("resindex/eveonline_1234.txt", "rb") as f:
+        assert f.read() == MANIFEST
+
+
+def test_cached_table_skips_hash(cdn, monkeypatch):
+    resindex, requests, _, _ = cdn
+    hashed = []
+    is_verified = ResFileIndex.is_verified
+
+    def counting(path, resfile):
+        hashed.append(os.path.basename(path))
+        return is_verified(path, resfile)
+
+    monkeypatch.setattr(ResFileIndex, "is_verified", staticmethod(counting))
+    resindex.load_table("eveclient_TQ.json", "", download([]))
+    hashed.clear()
+
+    # the cached table still matches the resfileindex mtime and size
+    resindex.load_table("eveclient_TQ.json", "", download([]))
+    assert hashed == []
+
+    # touched, so it is hashed again, still verifies and isn't downloaded,
+    # the table is parsed again along with the soundbank info
+    path = "resindex/1234_resfileindex.txt"
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    resindex.load_table("eveclient_TQ.json", "", download([]))
+    assert hashed == ["1234_resfileindex.txt", "1234_soundbanksinfo.json"]
+    assert requests["/ab/index"] == 1
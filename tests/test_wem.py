@@ -0,0 +1,91 @@
+import struct
+from typing import List, Tuple
+import pytest
+from utils.wem import OggWriter, Wem
+
+
+def read_pages(data: bytes) -> List[Tuple[int, int, bytes, bytes]]:
+    # (header_type, granule, segment table, body) of every page, checking
+    # the capture pattern, sequence numbers and crc on the way
+    pages = []
+    offset = 0
+    while offset < len(data):
+        magic, version, flags, granule, serial, sequence, crc, count = (
+            struct.unpack_from("<4sBBqIIIB", data, offset)
+        )
+        assert magic == b"OggS" and version == 0
+        assert sequence == len(pages)
+        lacing = data[offset + 27 : offset + 27 + count]
+        end = offset + 27 + count + sum(lacing)
+        page = bytearray(data[offset:end])
+        page[22:26] = bytes(4)
+        assert OggWriter.crc(page) == crc
+        pages.append((flags, granule, bytes(lacing), data[offset + 27 + count : end]))
+        offset = end
+    return pages
+
+
+def read_packets(pages: List[Tuple[int, int, bytes, bytes]]) -> List[bytes]:
+    packets: List[bytes] = []
+    partial = b""
+    for flags, _, lacing, body in pages:
+        # a page is flagged continued exactly when a packet is carried over
+        assert bool(flags & Wem.CONTINUED) == bool(partial)
+        offset = 0
+        for value in lacing:
+            partial += body[offset : offset + value]
+            offset += value
+            if value < 255:
+                packets.append(partial)
+                partial = b""
+    assert not partial
+    return packets
+
+
+def write(packets: List[bytes]) -> bytes:
+    ogg = OggWriter(1)
+    for granule, packet in enumerate(packets):
+        ogg.packet(packet, granule)
+    ogg.flush(eos=True)
+    return ogg.getvalue()
+
+
+@pytest.mark.parametrize(
+    "packets",
+    [
+        [bytes([i]) * 10 for i in range(256)],
+        [bytes([i % 256]) * 10 for i in range(255 * 3 + 1)],
+        [bytes(255)] * 300,
+        [bytes(255 * 2)] * 200,
+        [bytes(255 * 254), bytes(3)],
+        [bytes(255 * 255)],
+        [bytes(255 * 256), bytes(1)],
+        [bytes(7), bytes(255 * 300), bytes(255 * 255 + 1), bytes(0)],
+    ],
+    ids=[
+        "256x10",
+        "766x10",
+        "300x255",
+        "200x510",
+        "fills-page",
+        "255x255",
+        "255x256",
+        "mixed",
+    ],
+)
+def test_pages(packets: List[bytes]) -> None:
+    pages = read_pages(write(packets))
+    assert read_packets(pages) == packets
+    assert pages[0][0] & Wem.BOS and pages[-1][0] & Wem.EOS
+    for flags, granule, lacing, _ in pages:
+        assert 0 < len(lacing) <= 255 or flags & Wem.EOS
+        assert not flags & ~(Wem.BOS | Wem.EOS | Wem.CONTINUED)
+        # pages where no packet ends carry no granule
+        assert (granule == -1) == all(value == 255 for value in lacing)
+
+
+def test_full_page_boundary() -> None:
+    pages = read_pages(write([bytes(10)] * 256))
+    assert [len(lacing) for _, _, lacing, _ in pages] == [255, 1]
+    assert [flags for flags, _, _, _ in pages] == [Wem.BOS, Wem.EOS]
+    assert [granule for _, granule, _, _ in pages] == [254, 255]
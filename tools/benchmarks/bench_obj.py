@@ -0,0 +1,104 @@
+# obj writing: the original one-string-per-line writer, against
+# Wavefront.write_obj, both handed already parsed meshes
+#
+#   python tools/benchmarks/bench_obj.py [--vertices 400000] [--memory]
+
+import os, sys, time, argparse, tempfile, tracemalloc
+import numpy as np
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+from utils.obj import Wavefront
+
+
+def meshes(vertices: int, count: int = 4) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(1)
+    n = vertices // count
+    return [
+        {
+            "name": f"mesh{m}",
+            "position": rng.uniform(-5000, 5000, 3 * n).astype(np.float32),
+            "tangent": [],
+            "normal": rng.uniform(-1, 1, 3 * n).astype(np.float32),
+            "texcoord0": rng.random(2 * n).astype(np.float32),
+            "indices": [{"name": "mat", "faces": rng.integers(0, n, 6 * n)}],
+        }
+        for m in range(count)
+    ]
+
+
+def as_lists(meshes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # the original parser handed json lists to the writer
+    return [
+        {
+            **mesh,
+            "position": mesh["position"].tolist(),
+            "normal": mesh["normal"].tolist(),
+            "texcoord0": mesh["texcoord0"].tolist(),
+            "indices": [
+                {"name": i["name"], "faces": i["faces"].tolist()}
+                for i in mesh["indices"]
+            ],
+        }
+        for mesh in meshes
+    ]
+
+
+def write_lines(meshes: List[Dict[str, Any]], obj_path: str) -> None:
+    # the body of the original Wavefront.to_obj
+    plaintext = []
+    model_offset = 1
+    for mesh in meshes:
+        plaintext.append(Wavefront.o(mesh["name"]))
+        for i in range(0, len(mesh["position"]), 3):
+            plaintext.append(f"v {' '.join(map(str, mesh['position'][i : i + 3]))}")
+        for i in range(0, len(mesh["texcoord0"]), 2):
+            plaintext.append(f"vt {' '.join(map(str, mesh['texcoord0'][i : i + 2]))}")
+        for i in range(0, len(mesh["normal"]), 3):
+            plaintext.append(f"vn {' '.join(map(str, mesh['normal'][i : i + 3]))}")
+        plaintext.append(Wavefront.s())
+        for indice in mesh["indices"]:
+            plaintext.append(Wavefront.usemtl(indice["name"]))
+            faces = indice["faces"]
+            for i in range(0, len(faces), 3):
+                v1, v2, v3 = (face + model_offset for face in faces[i : i + 3])
+                plaintext.append(f"f {v1}/{v1}/{v1} {v2}/{v2}/{v2} {v3}/{v3}/{v3}")
+        model_offset += len(mesh["position"]) // 3
+    with open(obj_path, "w") as f:
+        f.write("\n".join(plaintext))
+
+
+def timed(function: Any, data: Any, obj_path: str, memory: bool) -> str:
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    function(data, obj_path)
+    elapsed = time.perf_counter() - start
+    peak = ""
+    if memory:
+        peak = f", peak {tracemalloc.get_traced_memory()[1] / 2**20:.0f} MB"
+        tracemalloc.stop()
+    return f"{elapsed:.2f}s{peak}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertices", type=int, default=400000)
+    parser.add_argument(
+        "--memory", action="store_true", help="trace the peak allocation"
+    )
+    args = parser.parse_args()
+
+    arrays = meshes(args.vertices)
+    lists = as_lists(arrays)
+    with tempfile.TemporaryDirectory() as folder:
+        old, new = os.path.join(folder, "old.obj"), os.path.join(folder, "new.obj")
+        print(f"lines:     {timed(write_lines, lists, old, args.memory)}")
+        print(f"write_obj: {timed(Wavefront.write_obj, arrays, new, args.memory)}")
+        with open(old) as a, open(new) as b:
+            same = sum(1 for _ in a) == sum(1 for _ in b)
+        print(f"{args.vertices} vertices, same line count: {same}")
+
+
+if __name__ == "__main__":
+    main()
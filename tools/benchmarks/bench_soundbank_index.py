@@ -0,0 +1,71 @@
+# wem path resolution: the original scan over every soundbank's Media for
+# each .wem, against ResIndexTable.from_resfiles with the flattened index
+#
+#   python tools/benchmarks/bench_soundbank_index.py [--scan 2000] [--index 100000]
+
+import os, sys, time, argparse
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+from utils.resfileindex import ResFileIndex
+from utils.resindex import ResIndexTable
+
+
+def soundbanksinfo(count: int, banks: int = 50) -> Dict[str, Any]:
+    return {
+        "SoundBanksInfo": {
+            "SoundBanks": [
+                {
+                    "ShortName": f"bank{b}",
+                    "Media": [
+                        {"Id": str(i), "CachePath": f"sfx/bank{b}/{i}.wem"}
+                        for i in range(b, count, banks)
+                    ],
+                }
+                for b in range(banks)
+            ]
+        }
+    }
+
+
+def resfiles(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"res_path": f"{i}.wem", "resfile_hash": f"ab/{i}", "size": "1"}
+        for i in range(count)
+    ]
+
+
+def scan(info: Dict[str, Any], files: List[Dict[str, Any]]) -> None:
+    # the per-file search _load_file_tree did before the index
+    for resfile in files:
+        search_id = os.path.basename(resfile["res_path"]).split(".")[0]
+        for bank in info["SoundBanksInfo"]["SoundBanks"]:
+            for media in bank.get("Media", []):
+                if search_id == media["Id"]:
+                    resfile["res_path"] = media["CachePath"].lower()
+
+
+def index(info: Dict[str, Any], files: List[Dict[str, Any]]) -> None:
+    ResIndexTable.from_resfiles(files, ResFileIndex.get_soundbank_index(info))
+
+
+def timed(function: Any, count: int) -> float:
+    info, files = soundbanksinfo(count), resfiles(count)
+    start = time.perf_counter()
+    function(info, files)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scan", type=int, nargs="*", default=[2000, 5000])
+    parser.add_argument("--index", type=int, nargs="*", default=[5000, 100000])
+    args = parser.parse_args()
+    for count in args.scan:
+        print(f"scan  {count:>7} wems: {timed(scan, count):.3f}s")
+    for count in args.index:
+        print(f"index {count:>7} wems: {timed(index, count):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# directory sizes: the original walk that added every file's size to all of
+# its ancestors (formatting each label on the way), against the single
+# pass of ResTrie.compute_sizes
+#
+#   python tools/benchmarks/bench_trie_sizes.py [--files 50000 100000 ...]
+
+import os, sys, time, argparse
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+from utils.resindex import ResIndexTable
+from utils.restrie import ResTrie
+
+
+def resfiles(count: int) -> List[Dict[str, Any]]:
+    # 4 levels deep, spread like the res: tree
+    return [
+        {
+            "res_path": f"a{i % 7}/b{i % 97}/c{i % 1013}/f{i}.dds",
+            "resfile_hash": f"ab/{i}",
+            "size": str(i % 4096 + 1),
+        }
+        for i in range(count)
+    ]
+
+
+def format_filesize(size: float) -> str:
+    for unit in ["KB", "MB", "GB"]:
+        size /= 1024
+        if size <= 1024:
+            return f"{size:.2f} {unit}"
+    return ""
+
+
+def walk(root: Any) -> None:
+    # what _load_file_tree did for every file it added
+    for file in ResTrie.iter_files(root):
+        current = file.parent
+        while current is not None:
+            current.size += file.size
+            format_filesize(current.size)
+            current = current.parent
+
+
+def reset(root: Any) -> None:
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node.size = 0
+        stack.extend(node.dirs.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--files", type=int, nargs="*", default=[50000, 100000, 200000, 400000]
+    )
+    args = parser.parse_args()
+    for count in args.files:
+        files = resfiles(count)
+        total = sum(int(file["size"]) for file in files)
+        root = ResTrie.build(ResIndexTable.from_resfiles(files, {}))
+
+        reset(root)
+        start = time.perf_counter()
+        walk(root)
+        walked = time.perf_counter() - start
+        assert root.size == total
+
+        reset(root)
+        start = time.perf_counter()
+        ResTrie.compute_sizes(root)
+        computed = time.perf_counter() - start
+        assert root.size == total
+
+        print(
+            f"{count:>7} files: walk {walked * 1000:.0f}ms,"
+            f" compute_sizes {computed * 1000:.0f}ms"
+            f" ({computed / count * 1e9:.0f}ns/file)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import os, mmap, struct
+from typing import Dict, List, Tuple
+from utils.wem import Wem
+
+
+class BnkError(ValueError):
+    pass
+
+
+class Bnk:
+    CHUNK = struct.Struct("<4sI")
+    MEDIA = struct.Struct("<III")
+
+    @staticmethod
+    def map(path: str) -> memoryview:
+        # the mapping is never closed explicitly, it goes away with the last
+        # view into it, so slices handed out stay valid as long as they live
+        try:
+            with open(path, "rb") as f:
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except ValueError:
+            raise BnkError("empty soundbank")
+
+    @staticmethod
+    def read(path: str) -> List[Tuple[int, int, int]]:
+        return Bnk.media(Bnk.map(path))
+
+    @staticmethod
+    def media(data: memoryview) -> List[Tuple[int, int, int]]:
+        # (id, offset, size) of every wem embedded in the bank, DIDX offsets
+        # are relative to the DATA chunk and made absolute here
+        chunks = Bnk._chunks(data)
+        if b"DIDX" not in chunks:
+            return []
+        if b"DATA" not in chunks:
+            raise BnkError("DIDX without a DATA chunk")
+        index, index_size = chunks[b"DIDX"]
+        start, data_size = chunks[b"DATA"]
+
+        media: List[Tuple[int, int, int]] = []
+        for media_id, offset, size in Bnk.MEDIA.iter_unpack(
+            data[index : index + index_size - index_size % Bnk.MEDIA.size]
+        ):
+            if offset + size > data_size:
+                raise BnkError(f"media {media_id} is out of the DATA chunk")
+            media.append((media_id, start + offset, size))
+        return media
+
+    @staticmethod
+    def extract(path: str, offset: int, size: int, out_path: str) -> str:
+        with open(out_path, "wb") as f:
+            f.write(Bnk.map(path)[offset : offset + size])
+        return out_path
+
+    @staticmethod
+    def to_ogg(path: str, offset: int, size: int, out_path: str) -> str:
+        # rebuilt straight from the mapped bank, the wem is never written
+        ogg = Wem.convert(Bnk.map(path)[offset : offset + size])
+        out = f"{os.path.splitext(out_path)[0]}.ogg"
+        with open(out, "wb") as f:
+            f.write(ogg)
+        return out
+
+    @staticmethod
+    def _chunks(data: memoryview) -> Dict[bytes, Tuple[int, int]]:
+        if len(data) < 8 or data[:4] != b"BKHD":
+            raise BnkError("not a soundbank")
+        chunks: Dict[bytes, Tuple[int, int]] = {}
+        offset = 0
+        while offset + 8 <= len(data):
+            tag, size = Bnk.CHUNK.unpack_from(data, offset)
+            if offset + 8 + size > len(data):
+                raise BnkError(f"truncated {tag.decode('latin-1')} chunk")
+            chunks[tag] = (offset + 8, size)
+            offset += 8 + size
+        return chunks
@@ -0,0 +1,119 @@
+import os, hashlib, threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class VerificationError(Exception):
+    pass
+
+
+class CDNSession:
+    POOL_SIZE = 16
+    RETRIES = 3
+    BACKOFF = 0.5
+    TIMEOUT: Tuple[float, float] = (5, 30)
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+    CHUNK_SIZE = 1 << 16
+
+    _sessions: Dict[str, requests.Session] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def configure(
+        pool_size: Optional[int] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+    ) -> None:
+        with CDNSession._lock:
+            if pool_size is not None:
+                CDNSession.POOL_SIZE = int(pool_size)
+            if retries is not None:
+                CDNSession.RETRIES = int(retries)
+            if backoff is not None:
+                CDNSession.BACKOFF = float(backoff)
+            if timeout is not None:
+                CDNSession.TIMEOUT = tuple(timeout)  # type: ignore
+            for session in CDNSession._sessions.values():
+                session.close()
+            CDNSession._sessions.clear()
+
+    @staticmethod
+    def backoff(attempt: int) -> float:
+        return CDNSession.BACKOFF * (2**attempt)
+
+    @staticmethod
+    def session(url: str) -> requests.Session:
+        # one keep-alive pool per CDN host, shared by every tab and worker
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with CDNSession._lock:
+            session = CDNSession._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=CDNSession.POOL_SIZE,
+                    max_retries=Retry(
+                        total=CDNSession.RETRIES,
+                        backoff_factor=CDNSession.BACKOFF,
+                        status_forcelist=CDNSession.RETRY_STATUS,
+                        allowed_methods=frozenset(["GET", "HEAD"]),
+                        raise_on_status=False,
+                    ),
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                CDNSession._sessions[host] = session
+            return session
+
+    @staticmethod
+    def get(url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", CDNSession.TIMEOUT)
+        return CDNSession.session(url).get(url, **kwargs)
+
+    @staticmethod
+    def download(
+        url: str,
+        dest_path: str,
+        size: Optional[int] = None,
+        md5: Optional[str] = None,
+        **kwargs: Any,
+    ) -> int:
+        # streams into a .part file next to the destination, checking size
+        # and md5 as chunks arrive, and only renames it into place once the
+        # whole body is verified
+        with CDNSession.get(url, stream=True, **kwargs) as response:
+            if response.status_code != 200:
+                return response.status_code
+
+            # named per thread, two tabs loading the same build fetch the
+            # same files at the same time
+            temp = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.part"
+            digest = hashlib.md5()
+            received = 0
+            try:
+                with open(temp, "wb") as f:
+                    for chunk in response.iter_content(CDNSession.CHUNK_SIZE):
+                        received += len(chunk)
+                        if size is not None and received > size:
+                            raise VerificationError(f"expected {size} bytes, got more")
+                        digest.update(chunk)
+                        f.write(chunk)
+
+                if size is not None and received != size:
+                    raise VerificationError(f"expected {size} bytes, got {received}")
+                if md5 and digest.hexdigest() != md5:
+                    raise VerificationError(
+                        f"expected md5 {md5}, got {digest.hexdigest()}"
+                    )
+            except BaseException:
+                if os.path.exists(temp):
+                    os.remove(temp)
+                raise
+
+            os.replace(temp, dest_path)
+            return response.status_code
@@ -0,0 +1,159 @@
+import os, threading, multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from utils.plugins import Revorb, Ww2Ogg, NvttExport, BlackReader
+from utils.obj import Wavefront
+from utils.glb import Glb
+from utils.bnk import Bnk
+from utils.dds import Dds, DdsError
+from utils.wem import Wem, WemError
+
+
+class ConvertTypes:
+    GENERIC = "generic"
+    PNG = "png"
+    OBJ = "obj"
+    GLB = "glb"
+    OGG = "ogg"
+    BLACK = "json"
+
+    EXTENSIONS: Dict[str, str] = {
+        ".dds": PNG,
+        ".gr2": OBJ,
+        ".wem": OGG,
+        ".black": BLACK,
+    }
+
+    @staticmethod
+    def for_path(path: str, models: str = OBJ) -> str:
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".gr2":
+            return models
+        return ConvertTypes.EXTENSIONS.get(ext, ConvertTypes.GENERIC)
+
+
+class Converter:
+    # the in-process converters are pure python and numpy and hold the gil
+    # most of the time, so they run on worker processes; the threads that
+    # call convert only wait on those and on the external tools
+    _pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+    _pool_lock = threading.Lock()
+
+    def __init__(self, event_logger: Any) -> None:
+        self.event_logger = event_logger
+
+    @staticmethod
+    def run_in_process(function: Callable[..., Any], *args: Any) -> Any:
+        with Converter._pool_lock:
+            pool = Converter._pool
+            if pool is None:
+                # spawned rather than forked, forking a process running qt
+                # and download threads isn't safe
+                pool = Converter._pool = concurrent.futures.ProcessPoolExecutor(
+                    os.cpu_count() or 4,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=Dds.configure,
+                    initargs=("nvtt" if not Dds.ENABLED else None, Dds.COMPRESSION),
+                )
+        try:
+            return pool.submit(function, *args).result()
+        except BrokenProcessPool:
+            # a worker died, the next conversion starts a new pool
+            with Converter._pool_lock:
+                if Converter._pool is pool:
+                    Converter._pool = None
+            raise
+
+    @staticmethod
+    def shutdown() -> None:
+        with Converter._pool_lock:
+            pool, Converter._pool = Converter._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def convert(self, out_path: str, type: str) -> Optional[str]:
+        if type == ConvertTypes.OBJ:
+            Converter.run_in_process(Wavefront.to_obj, out_path)
+            self.event_logger.add(f"OBJ exported: {out_path}")
+        elif type == ConvertTypes.GLB:
+            Converter.run_in_process(Glb.to_glb, out_path)
+            self.event_logger.add(f"GLB exported: {out_path}")
+        elif type == ConvertTypes.PNG:
+            error = Converter._dds_to_png(out_path)
+            if error is not None:
+                self.event_logger.add(f"Could not convert: {out_path}\n\n{error}")
+                return error
+            self.event_logger.add(f"DDS exported: {out_path}")
+        elif type == ConvertTypes.OGG:
+            error = Converter._wem_to_ogg(out_path)
+            if error is not None:
+                self.event_logger.add(f"Could not convert: {out_path}\n\n{error}")
+                return error
+            self.event_logger.add(f"WEM exported: {out_path}")
+        elif type == ConvertTypes.BLACK:
+            stdout: Any = BlackReader().run(out_path)
+
+            if stdout:
+                self.event_logger.add(f"Could not convert: {out_path}\n\n{stdout}")
+                return stdout
+            os.remove(out_path)
+        return None
+
+    def convert_media(
+        self, bank_path: str, media: Any, out_path: str, type: str
+    ) -> Optional[str]:
+        # media embedded in a soundbank are rebuilt from a slice of the
+        # mapped bank, the wem is only written out when that fails or when
+        # it is what was asked for
+        if type == ConvertTypes.OGG:
+            try:
+                Converter.run_in_process(
+                    Bnk.to_ogg, bank_path, media.offset, media.size, out_path
+                )
+                self.event_logger.add(f"WEM exported: {out_path}")
+                return None
+            except WemError:
+                pass
+        Bnk.extract(bank_path, media.offset, media.size, out_path)
+        if type == ConvertTypes.GENERIC:
+            return None
+        return self.convert(out_path, type)
+
+    @staticmethod
+    def _dds_to_png(path: str) -> Optional[str]:
+        # decoded in process, nvtt_export only gets what Dds can't read
+        # (bc6h, volume textures...) or everything when configured to
+        if not Dds.ENABLED:
+            return NvttExport().run(path)
+        try:
+            Converter.run_in_process(Dds.to_png, path)
+            return None
+        except DdsError as e:
+            error = NvttExport().run(path)
+            return f"{e}, {error}" if error is not None else None
+
+    @staticmethod
+    def _wem_to_ogg(path: str) -> Optional[str]:
+        # rebuilt in process, ww2ogg and revorb only get the layouts Wem
+        # doesn't read (header triads, full setups, big endian...)
+        try:
+            Converter.run_in_process(Wem.to_ogg, path)
+            return None
+        except WemError as e:
+            reason = str(e)
+        stdout, ogg = Ww2Ogg().run(path)
+        if stdout is not None:
+            return f"{reason}, {stdout}"
+        temp = f"{os.path.splitext(path)[0]}.temp"
+        try:
+            Revorb().run(ogg, temp)
+            os.replace(temp, ogg)
+        except OSError as e:
+            # the wem is kept for the next attempt, the half done ogg isn't
+            for leftover in (temp, ogg):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            return f"{reason}, could not run revorb: {e}"
+        os.remove(path)
+        return None
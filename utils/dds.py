@@ -0,0 +1,540 @@
+import os, struct, zlib
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+
+class DdsError(ValueError):
+    pass
+
+
+class Dds:
+    MAGIC = b"DDS "
+    HEADER = struct.Struct("<7I44x2I4s5I5I")
+    DX10_HEADER = struct.Struct("<5I")
+    DDPF_ALPHAPIXELS = 0x1
+    DDPF_ALPHA = 0x2
+    DDPF_FOURCC = 0x4
+    DDPF_RGB = 0x40
+    DDPF_LUMINANCE = 0x20000
+    DDPF_ALPHAS = DDPF_ALPHAPIXELS | DDPF_ALPHA
+    DDPF_UNCOMPRESSED = DDPF_RGB | DDPF_LUMINANCE | DDPF_ALPHA
+    DDSCAPS2_CUBEMAP = 0x200
+    DDSCAPS2_CUBEMAP_FACES = 0xFC00
+    DDSCAPS2_VOLUME = 0x200000
+    DIMENSION_TEXTURE3D = 4
+    MISC_TEXTURECUBE = 0x4
+
+    CHUNK_BLOCKS = 1 << 16
+    PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+    PNG_COLOR_TYPES = {1: 0, 3: 2, 4: 6}
+    PNG_CHUNK_SIZE = 1 << 20
+    # zlib level, on "up" filtered rows 1 is within a few percent of 6 and
+    # several times faster
+    COMPRESSION = 1
+    # nvtt_export is only used for what the decoder can't read, see configure
+    ENABLED = True
+
+    # bytes per 4x4 block, and the channels each block format decodes to
+    BLOCK_SIZE = {"BC1": 8, "BC2": 16, "BC3": 16, "BC4": 8, "BC5": 16, "BC7": 16}
+    BLOCK_CHANNELS = {"BC4": 1, "BC5": 3}
+    FOURCC = {
+        b"DXT1": "BC1",
+        b"DXT2": "BC2",
+        b"DXT3": "BC2",
+        b"DXT4": "BC3",
+        b"DXT5": "BC3",
+        b"ATI1": "BC4",
+        b"BC4U": "BC4",
+        b"ATI2": "BC5",
+        b"BC5U": "BC5",
+    }
+    DXGI_BLOCKS = {
+        71: "BC1",
+        72: "BC1",
+        74: "BC2",
+        75: "BC2",
+        77: "BC3",
+        78: "BC3",
+        80: "BC4",
+        83: "BC5",
+        98: "BC7",
+        99: "BC7",
+    }
+    # uncompressed formats as bits per pixel and r, g, b, a masks, "L" is
+    # written as grayscale
+    DXGI_MASKS = {
+        28: ("RGBA", (32, 0xFF, 0xFF00, 0xFF0000, 0xFF000000)),
+        29: ("RGBA", (32, 0xFF, 0xFF00, 0xFF0000, 0xFF000000)),
+        87: ("RGBA", (32, 0xFF0000, 0xFF00, 0xFF, 0xFF000000)),
+        91: ("RGBA", (32, 0xFF0000, 0xFF00, 0xFF, 0xFF000000)),
+        88: ("RGBA", (32, 0xFF0000, 0xFF00, 0xFF, 0)),
+        93: ("RGBA", (32, 0xFF0000, 0xFF00, 0xFF, 0)),
+        61: ("L", (8, 0xFF, 0, 0, 0)),
+        65: ("RGBA", (8, 0, 0, 0, 0xFF)),
+    }
+
+    # bc7 modes: subsets, partition bits, rotation bits, index selection
+    # bits, color bits, alpha bits, endpoint p-bits, shared p-bits, index
+    # bits and secondary index bits
+    BC7_MODES = (
+        (3, 4, 0, 0, 4, 0, 1, 0, 3, 0),
+        (2, 6, 0, 0, 6, 0, 0, 1, 3, 0),
+        (3, 6, 0, 0, 5, 0, 0, 0, 2, 0),
+        (2, 6, 0, 0, 7, 0, 1, 0, 2, 0),
+        (1, 0, 2, 1, 5, 6, 0, 0, 2, 3),
+        (1, 0, 2, 0, 7, 8, 0, 0, 2, 2),
+        (1, 0, 0, 0, 7, 7, 1, 0, 4, 0),
+        (2, 6, 0, 0, 5, 5, 1, 0, 2, 0),
+    )
+    BC7_WEIGHTS = {
+        2: np.array([0, 21, 43, 64], np.int32),
+        3: np.array([0, 9, 18, 27, 37, 46, 55, 64], np.int32),
+        4: np.array(
+            [0, 4, 9, 13, 17, 21, 26, 30, 34, 38, 43, 47, 51, 55, 60, 64], np.int32
+        ),
+    }
+    # subset of every texel per partition, one bit per texel for two
+    # subsets and two bits for three, plus the anchor texel of each subset
+    BC7_PARTITIONS_2 = """
+        cccc 8888 eeee ecc8 c880 feec fec8 ec80 c800 ffec fe80 e800 ffe8 ff00 fff0 f000
+        f710 008e 7100 08ce 008c 7310 3100 8cce 088c 3110 6666 366c 17e8 0ff0 718e 399c
+        aaaa f0f0 5a5a 33cc 3c3c 55aa 9696 a55a 73ce 13c8 324c 3bdc 6996 c33c 9966 0660
+        0272 04e4 4e40 2720 c936 936c 39c6 639c 9336 9cc6 817e e718 ccf0 0fcc 7744 ee22
+    """
+    BC7_PARTITIONS_3 = """
+        aa685050 6a5a5040 5a5a4200 5450a0a8 a5a50000 a0a05050 5555a0a0 5a5a5050
+        aa550000 aa555500 aaaa5500 90909090 94949494 a4a4a4a4 a9a59450 2a0a4250
+        a5945040 0a425054 a5a5a500 55a0a0a0 a8a85454 6a6a4040 a4a45000 1a1a0500
+        0050a4a4 aaa59090 14696914 69691400 a08585a0 aa821414 50a4a450 6a5a0200
+        a9a58000 5090a0a8 a8a09050 24242424 00aa5500 24924924 24499224 50a50a50
+        500aa550 aaaa4444 66660000 a5a0a5a0 50a050a0 69286928 44aaaa44 66666600
+        aa444444 54a854a8 95809580 96969600 a85454a8 80959580 aa141414 96960000
+        aaaa1414 a05050a0 a0a5a5a0 96000000 40804080 a9a8a9a8 aaaaaa44 2a4a5254
+    """
+    BC7_ANCHORS_2 = """
+        15 15 15 15 15 15 15 15 15 15 15 15 15 15 15 15
+        15  2  8  2  2  8  8 15  2  8  2  2  8  8  2  2
+        15 15  6  8  2  8 15 15  2  8  2  2  2 15 15  6
+         6  2  6  8 15 15  2  2 15 15 15 15 15  2  2 15
+    """
+    BC7_ANCHORS_3 = """
+         3  3 15 15  8  3 15 15  8  8  6  6  6  5  3  3
+         3  3  8 15  3  3  6 10  5  8  8  6  8  5 15 15
+         8 15  3  5  6 10  8 15 15  3 15  5 15 15 15 15
+         3 15  5  5  5  8  5 10  5 10  8 13 15 12  3  3
+        15  8  8  3 15 15  3  8 15 15 15 15 15 15 15  8
+        15  8 15  3 15  8 15  8  3 15  6 10 15 15 10  8
+        15  3 15 10 10  8  9 10  6 15  8 15  3  6  6  8
+        15  3 15 15 15 15 15 15 15 15 15 15  3 15 15  8
+    """
+    _layouts: Dict[Tuple[int, int], Tuple[np.ndarray, ...]] = {}
+
+    @staticmethod
+    def configure(
+        decoder: Optional[str] = None, compression: Optional[int] = None
+    ) -> None:
+        # "nvtt" hands every texture to nvtt_export like before
+        if decoder:
+            Dds.ENABLED = str(decoder).lower() != "nvtt"
+        if compression is not None:
+            Dds.COMPRESSION = min(9, max(0, int(compression)))
+
+    @staticmethod
+    def to_png(path: str, mip: int = 0, layer: int = 0) -> str:
+        # the dds is only removed once the png has been written
+        image = Dds.decode(path, mip, layer)
+        if image.shape[2] == 4 and (image[:, :, 3] == 255).all():
+            image = image[:, :, :3]
+        out = f"{os.path.splitext(path)[0]}.png"
+        try:
+            Dds.write_png(image, out)
+        except BaseException:
+            if os.path.exists(out):
+                os.remove(out)
+            raise
+        os.remove(path)
+        return out
+
+    @staticmethod
+    def decode(path: str, mip: int = 0, layer: int = 0) -> np.ndarray:
+        # returns one mip of one array slice (or cube face) as a height x
+        # width x channels uint8 array
+        with open(path, "rb") as f:
+            data = f.read()
+        name, masks, width, height, mips, layers, offset = Dds._header(data)
+        if not 0 <= mip < mips:
+            raise DdsError(f"mip {mip} out of range, the texture has {mips}")
+        if not 0 <= layer < layers:
+            raise DdsError(f"layer {layer} out of range, the texture has {layers}")
+
+        # every slice carries its own mip chain
+        sizes = [
+            Dds._level_size(name, masks, max(1, width >> i), max(1, height >> i))
+            for i in range(mips)
+        ]
+        offset += layer * sum(sizes) + sum(sizes[:mip])
+        if offset + sizes[mip] > len(data):
+            raise DdsError("truncated dds")
+        level = np.frombuffer(data, np.uint8, sizes[mip], offset)
+        width, height = max(1, width >> mip), max(1, height >> mip)
+        if name in Dds.BLOCK_SIZE:
+            return Dds._decode_blocks(name, level, width, height)
+        return Dds._decode_masks(name, masks, level, width, height)
+
+    @staticmethod
+    def _header(data: bytes) -> Tuple[str, Tuple[int, ...], int, int, int, int, int]:
+        if len(data) < 128 or data[:4] != Dds.MAGIC:
+            raise DdsError("not a dds file")
+        header = Dds.HEADER.unpack_from(data, 4)
+        height, width, _, depth, mips = header[2:7]
+        flags, fourcc, bits = header[8:11]
+        caps2 = header[16]
+        offset, layers = 128, 1
+        masks: Tuple[int, ...] = ()
+
+        if flags & Dds.DDPF_FOURCC and fourcc == b"DX10":
+            if len(data) < 148:
+                raise DdsError("truncated dds")
+            dxgi, dimension, misc, size, _ = Dds.DX10_HEADER.unpack_from(data, 128)
+            offset = 148
+            if dimension == Dds.DIMENSION_TEXTURE3D:
+                raise DdsError("volume textures are not supported")
+            layers = max(1, size) * (6 if misc & Dds.MISC_TEXTURECUBE else 1)
+            if dxgi in Dds.DXGI_BLOCKS:
+                name = Dds.DXGI_BLOCKS[dxgi]
+            elif dxgi in Dds.DXGI_MASKS:
+                name, masks = Dds.DXGI_MASKS[dxgi]
+            else:
+                raise DdsError(f"unsupported dxgi format {dxgi}")
+        else:
+            if caps2 & Dds.DDSCAPS2_VOLUME and depth > 1:
+                raise DdsError("volume textures are not supported")
+            if caps2 & Dds.DDSCAPS2_CUBEMAP:
+                layers = bin(caps2 & Dds.DDSCAPS2_CUBEMAP_FACES).count("1") or 6
+            if flags & Dds.DDPF_FOURCC:
+                if fourcc not in Dds.FOURCC:
+                    # d3d formats without a fourcc are stored as their number
+                    label = (
+                        fourcc.decode("ascii")
+                        if fourcc.isalnum()
+                        else struct.unpack("<I", fourcc)[0]
+                    )
+                    raise DdsError(f"unsupported dds format {label}")
+                name = Dds.FOURCC[fourcc]
+            elif flags & Dds.DDPF_UNCOMPRESSED and bits in (8, 16, 24, 32):
+                name = "L" if flags & Dds.DDPF_LUMINANCE else "RGBA"
+                masks = (
+                    bits,
+                    *header[11:14],
+                    header[14] if flags & Dds.DDPF_ALPHAS else 0,
+                )
+            else:
+                raise DdsError("unsupported dds pixel format")
+
+        if not width or not height:
+            raise DdsError("empty dds")
+        return name, masks, width, height, max(1, mips), layers, offset
+
+    @staticmethod
+    def _level_size(name: str, masks: Tuple[int, ...], width: int, height: int) -> int:
+        if name in Dds.BLOCK_SIZE:
+            return (width + 3) // 4 * ((height + 3) // 4) * Dds.BLOCK_SIZE[name]
+        return (width * masks[0] + 7) // 8 * height
+
+    @staticmethod
+    def _decode_blocks(
+        name: str, level: np.ndarray, width: int, height: int
+    ) -> np.ndarray:
+        # blocks are decoded a chunk at a time, each chunk as a whole
+        columns, rows = (width + 3) // 4, (height + 3) // 4
+        blocks = level.reshape(columns * rows, Dds.BLOCK_SIZE[name])
+        decode = getattr(Dds, f"_{name.lower()}")
+        channels = Dds.BLOCK_CHANNELS.get(name, 4)
+        texels = np.empty((len(blocks), 16, channels), np.uint8)
+        for start in range(0, len(blocks), Dds.CHUNK_BLOCKS):
+            end = start + Dds.CHUNK_BLOCKS
+            texels[start:end] = decode(blocks[start:end])
+        image = texels.reshape(rows, columns, 4, 4, channels).transpose(0, 2, 1, 3, 4)
+        return image.reshape(rows * 4, columns * 4, channels)[:height, :width]
+
+    @staticmethod
+    def _decode_masks(
+        name: str, masks: Tuple[int, ...], level: np.ndarray, width: int, height: int
+    ) -> np.ndarray:
+        bits, *channels = masks
+        size = bits // 8
+        rows = level.reshape(height, -1)[:, : width * size].reshape(height, width, size)
+        pixels = np.zeros((height, width), np.uint64)
+        for i in range(size):
+            pixels |= rows[:, :, i].astype(np.uint64) << np.uint64(8 * i)
+        if name == "L":
+            return Dds._channel(pixels, channels[0])[:, :, None]
+        image = np.zeros((height, width, 4 if channels[3] else 3), np.uint8)
+        for i, mask in enumerate(channels):
+            if mask:
+                image[:, :, i] = Dds._channel(pixels, mask)
+        return image
+
+    @staticmethod
+    def _channel(pixels: np.ndarray, mask: int) -> np.ndarray:
+        shift = (mask & -mask).bit_length() - 1
+        top = mask >> shift
+        values = (pixels & np.uint64(mask)) >> np.uint64(shift)
+        if top == 255:
+            return values.astype(np.uint8)
+        return ((values * 255 + top // 2) // top).astype(np.uint8)
+
+    @staticmethod
+    def _color(blocks: np.ndarray, punchthrough: bool = True) -> np.ndarray:
+        # bc1 color block as rgba, bc2/bc3 always use the four color palette
+        ends = np.ascontiguousarray(blocks[:, :4]).view("<u2").astype(np.int32)
+        palette = np.empty((len(blocks), 4, 4), np.int32)
+        for i in range(2):
+            c = ends[:, i]
+            palette[:, i, 0] = (c >> 8 & 0xF8) | (c >> 13)
+            palette[:, i, 1] = (c >> 3 & 0xFC) | (c >> 9 & 3)
+            palette[:, i, 2] = (c << 3 & 0xF8) | (c >> 2 & 7)
+        palette[:, :2, 3] = 255
+        c0, c1 = palette[:, 0], palette[:, 1]
+        four = ends[:, :1] > ends[:, 1:] if punchthrough else True
+        palette[:, 2] = np.where(four, (2 * c0 + c1) // 3, (c0 + c1) // 2)
+        palette[:, 3] = np.where(four, (c0 + 2 * c1) // 3, 0)
+
+        codes = np.ascontiguousarray(blocks[:, 4:8]).view("<u4")
+        indices = codes >> np.arange(0, 32, 2, dtype=np.uint32) & 3
+        return np.take_along_axis(palette, indices[:, :, None].astype(np.intp), axis=1)
+
+    @staticmethod
+    def _alpha(blocks: np.ndarray) -> np.ndarray:
+        # bc3 alpha / bc4 channel block, two endpoints and 3 bit indices
+        a0 = blocks[:, 0:1].astype(np.int32)
+        a1 = blocks[:, 1:2].astype(np.int32)
+        steps = np.arange(1, 7, dtype=np.int32)
+        eight = ((7 - steps) * a0 + steps * a1) // 7
+        six = ((5 - steps[:4]) * a0 + steps[:4] * a1) // 5
+        six = np.hstack([six, np.zeros_like(a0), np.full_like(a0, 255)])
+        palette = np.hstack([a0, a1, np.where(a0 > a1, eight, six)])
+
+        codes = np.zeros(len(blocks), np.uint64)
+        for i in range(6):
+            codes |= blocks[:, 2 + i].astype(np.uint64) << np.uint64(8 * i)
+        indices = codes[:, None] >> np.arange(0, 48, 3, dtype=np.uint64) & np.uint64(7)
+        return np.take_along_axis(palette, indices.astype(np.intp), axis=1)
+
+    @staticmethod
+    def _bc1(blocks: np.ndarray) -> np.ndarray:
+        return Dds._color(blocks)
+
+    @staticmethod
+    def _bc2(blocks: np.ndarray) -> np.ndarray:
+        texels = Dds._color(blocks[:, 8:], punchthrough=False)
+        alpha = blocks[:, :8]
+        texels[:, :, 3] = (
+            np.stack([alpha & 15, alpha >> 4], axis=2).reshape(-1, 16) * 17
+        )
+        return texels
+
+    @staticmethod
+    def _bc3(blocks: np.ndarray) -> np.ndarray:
+        texels = Dds._color(blocks[:, 8:], punchthrough=False)
+        texels[:, :, 3] = Dds._alpha(blocks[:, :8])
+        return texels
+
+    @staticmethod
+    def _bc4(blocks: np.ndarray) -> np.ndarray:
+        return Dds._alpha(blocks)[:, :, None]
+
+    @staticmethod
+    def _bc5(blocks: np.ndarray) -> np.ndarray:
+        texels = np.zeros((len(blocks), 16, 3), np.int32)
+        texels[:, :, 0] = Dds._alpha(blocks[:, :8])
+        texels[:, :, 1] = Dds._alpha(blocks[:, 8:])
+        return texels
+
+    @staticmethod
+    def _bc7(blocks: np.ndarray) -> np.ndarray:
+        # the mode is the position of the first set bit, blocks of each mode
+        # share one bit layout and are decoded together
+        bits = np.unpackbits(blocks, axis=1, bitorder="little")
+        modes = np.argmax(bits[:, :8], axis=1)
+        modes[~bits[:, :8].any(axis=1)] = len(Dds.BC7_MODES)
+        texels = np.zeros((len(blocks), 16, 4), np.uint8)
+        for mode in range(len(Dds.BC7_MODES)):
+            selected = np.flatnonzero(modes == mode)
+            if len(selected):
+                texels[selected] = Dds._bc7_mode(mode, bits[selected])
+        return texels
+
+    @staticmethod
+    def _bc7_mode(mode: int, bits: np.ndarray) -> np.ndarray:
+        (
+            subsets,
+            partition_bits,
+            rotation_bits,
+            selection_bits,
+            color_bits,
+            alpha_bits,
+            endpoint_pbits,
+            shared_pbits,
+            index_bits,
+            index2_bits,
+        ) = Dds.BC7_MODES[mode]
+        count = len(bits)
+        pos = mode + 1
+        partition = Dds._field(bits, pos, 1, partition_bits)[:, 0]
+        pos += partition_bits
+        rotation = Dds._field(bits, pos, 1, rotation_bits)[:, 0]
+        pos += rotation_bits
+        selection = Dds._field(bits, pos, 1, selection_bits)[:, 0]
+        pos += selection_bits
+
+        # endpoints as channel x (subset * 2 + endpoint)
+        ends = subsets * 2
+        channels = 4 if alpha_bits else 3
+        endpoints = np.full((count, 4, ends), 255, np.int32)
+        sizes = [color_bits] * 3 + [alpha_bits]
+        for channel in range(channels):
+            endpoints[:, channel] = Dds._field(bits, pos, ends, sizes[channel])
+            pos += ends * sizes[channel]
+        if endpoint_pbits or shared_pbits:
+            if endpoint_pbits:
+                pbits = Dds._field(bits, pos, ends, 1)
+                pos += ends
+            else:
+                pbits = np.repeat(Dds._field(bits, pos, subsets, 1), 2, axis=1)
+                pos += subsets
+            endpoints[:, :channels] = endpoints[:, :channels] << 1 | pbits[:, None]
+            sizes = [size + 1 for size in sizes]
+        for channel in range(channels):
+            value = endpoints[:, channel] << (8 - sizes[channel])
+            endpoints[:, channel] = value | value >> sizes[channel]
+
+        weights = Dds.BC7_WEIGHTS[index_bits][
+            Dds._bc7_indices(bits, pos, partition, subsets, index_bits)
+        ]
+        alpha_weights = weights
+        if index2_bits:
+            alpha_weights = Dds.BC7_WEIGHTS[index2_bits][
+                Dds._bc7_indices(
+                    bits, pos + 16 * index_bits - 1, partition, 1, index2_bits
+                )
+            ]
+            swap = selection[:, None] == 1
+            weights, alpha_weights = (
+                np.where(swap, alpha_weights, weights),
+                np.where(swap, weights, alpha_weights),
+            )
+        weights = np.stack([weights, weights, weights, alpha_weights], axis=1)
+
+        subset = Dds._bc7_layout(subsets, index_bits)[2][partition] * 2
+        subset = np.broadcast_to(subset[:, None], (count, 4, 16))
+        e0 = np.take_along_axis(endpoints, subset, axis=2)
+        e1 = np.take_along_axis(endpoints, subset + 1, axis=2)
+        texels = ((64 - weights) * e0 + weights * e1 + 32) >> 6
+
+        # rotation swaps alpha with one of the color channels
+        for channel in range(1, 4):
+            rotated = np.flatnonzero(rotation == channel)
+            if len(rotated):
+                pair = [channel - 1, 3]
+                texels[rotated[:, None], pair] = texels[rotated[:, None], pair[::-1]]
+        return texels.transpose(0, 2, 1)
+
+    @staticmethod
+    def _field(bits: np.ndarray, pos: int, count: int, size: int) -> np.ndarray:
+        # count consecutive little endian fields of size bits each
+        if not size:
+            return np.zeros((len(bits), count), np.int32)
+        fields = bits[:, pos : pos + count * size].reshape(-1, count, size)
+        return (fields.astype(np.int32) << np.arange(size, dtype=np.int32)).sum(axis=2)
+
+    @staticmethod
+    def _bc7_indices(
+        bits: np.ndarray, pos: int, partition: np.ndarray, subsets: int, size: int
+    ) -> np.ndarray:
+        # anchor texels store their index with one bit less, so the offset
+        # of every texel depends on the partition
+        offsets, widths, _ = Dds._bc7_layout(subsets, size)
+        shifts = np.arange(size, dtype=np.intp)
+        positions = pos + offsets[partition][:, :, None] + shifts
+        values = np.take_along_axis(
+            bits, np.minimum(positions, 127).reshape(len(bits), -1), axis=1
+        ).reshape(len(bits), 16, size)
+        values = values * (shifts < widths[partition][:, :, None])
+        return (values.astype(np.intp) << shifts).sum(axis=2)
+
+    @staticmethod
+    def _bc7_layout(subsets: int, size: int) -> Tuple[np.ndarray, ...]:
+        # index bit offsets, index widths and subsets of every texel, for
+        # each of the 64 partitions
+        key = (subsets, size)
+        if key not in Dds._layouts:
+            texels = np.arange(16)
+            anchors = np.zeros((64, 16), bool)
+            anchors[:, 0] = True
+            if subsets == 1:
+                subset = np.zeros((64, 16), np.intp)
+            elif subsets == 2:
+                table = Dds._table(Dds.BC7_PARTITIONS_2, 16)
+                subset = (table[:, None] >> texels & 1).astype(np.intp)
+                anchors[np.arange(64), Dds._table(Dds.BC7_ANCHORS_2, 10)] = True
+            else:
+                table = Dds._table(Dds.BC7_PARTITIONS_3, 16)
+                subset = (table[:, None] >> 2 * texels & 3).astype(np.intp)
+                for table in Dds._table(Dds.BC7_ANCHORS_3, 10).reshape(2, 64):
+                    anchors[np.arange(64), table] = True
+            widths = size - anchors.astype(np.intp)
+            offsets = np.cumsum(widths, axis=1) - widths
+            Dds._layouts[key] = (offsets, widths, subset)
+        return Dds._layouts[key]
+
+    @staticmethod
+    def _table(text: str, base: int) -> np.ndarray:
+        return np.array([int(value, base) for value in text.split()], np.int64)
+
+    @staticmethod
+    def write_png(image: np.ndarray, png_path: str) -> None:
+        # 8 bit gray, rgb or rgba, rows are filtered with "up" and deflated
+        # a slice at a time
+        height, width, channels = image.shape
+        stride = width * channels
+        pixels = np.ascontiguousarray(image).reshape(height, stride)
+        step = max(1, Dds.PNG_CHUNK_SIZE // (stride + 1))
+        compressor = zlib.compressobj(Dds.COMPRESSION)
+
+        with open(png_path, "wb") as f:
+            f.write(Dds.PNG_SIGNATURE)
+            Dds._png_chunk(
+                f,
+                b"IHDR",
+                struct.pack(
+                    ">IIBBBBB",
+                    width,
+                    height,
+                    8,
+                    Dds.PNG_COLOR_TYPES[channels],
+                    0,
+                    0,
+                    0,
+                ),
+            )
+            for start in range(0, height, step):
+                rows = np.empty((min(step, height - start), stride + 1), np.uint8)
+                rows[:, 0] = 2
+                rows[:, 1:] = pixels[start : start + len(rows)]
+                if start:
+                    rows[:, 1:] -= pixels[start - 1 : start + len(rows) - 1]
+                else:
+                    rows[1:, 1:] -= pixels[: len(rows) - 1]
+                data = compressor.compress(rows.data)
+                if data:
+                    Dds._png_chunk(f, b"IDAT", data)
+            Dds._png_chunk(f, b"IDAT", compressor.flush())
+            Dds._png_chunk(f, b"IEND", b"")
+
+    @staticmethod
+    def _png_chunk(f: Any, tag: bytes, data: bytes) -> None:
+        f.write(struct.pack(">I", len(data)))
+        f.write(tag)
+        f.write(data)
+        f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag))))
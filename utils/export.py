@@ -0,0 +1,273 @@
+import os, shutil, threading, time
+import concurrent.futures
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+
+class ExportEngine:
+    JOURNAL = ".cyno_export.journal"
+
+    def __init__(
+        self,
+        dest_folder: str,
+        files: List[Any],
+        fetch: Callable[[Any, str], Any],
+        on_progress: Optional[Callable[[int, int, str], Any]] = None,
+        min_workers: int = 2,
+        max_workers: int = 32,
+        window: float = 2.0,
+        convert: Optional[Callable[[Any, str], Optional[str]]] = None,
+        convert_workers: Optional[int] = None,
+        flat: bool = False,
+    ) -> None:
+        # downloads feed an optional conversion stage: convert(file, out_path)
+        # returns an error message or None, and runs on its own pool sized
+        # to the cpu count; flat exports every file straight into dest_folder.
+        # fetch returns None on failure, and doesn't have to write out_path
+        # for files the conversion reads from elsewhere (soundbank media)
+        self.dest_folder = dest_folder
+        self.files = files
+        self.fetch = fetch
+        self.convert = convert
+        self.convert_workers = convert_workers or os.cpu_count() or 4
+        self.flat = flat
+        self.on_progress = on_progress
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.workers = min(max(min_workers, 8), max_workers)
+        self.window = window
+        self.journal_path = os.path.join(dest_folder, ExportEngine.JOURNAL)
+        self.failed: List[str] = []
+        self._cancelled = threading.Event()
+        self._flat_names = ExportEngine._unique_names(files) if flat else {}
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def out_path(self, file: Any) -> str:
+        if self.flat:
+            return os.path.join(self.dest_folder, self._flat_names[file])
+        return os.path.normpath(os.path.join(self.dest_folder, file.respath))
+
+    @staticmethod
+    def _unique_names(files: List[Any]) -> Dict[Any, str]:
+        # files with the same name from different folders get a numbered
+        # suffix, in the order they were given so a resumed export maps
+        # every file to the same name again
+        names: Dict[Any, str] = {}
+        taken = {file.name.lower() for file in files}
+        used: Set[str] = set()
+        for file in files:
+            name = file.name
+            if name.lower() in used:
+                base, ext = os.path.splitext(name)
+                i = 1
+                while f"{base}_{i}{ext}".lower() in taken:
+                    i += 1
+                name = f"{base}_{i}{ext}"
+                taken.add(name.lower())
+            used.add(name.lower())
+            names[file] = name
+        return names
+
+    def _read_journal(self) -> Set[str]:
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                return set(filter(bool, f.read().splitlines()))
+        except OSError:
+            return set()
+
+    def _is_done(self, file: Any, journal: Set[str]) -> bool:
+        if file.respath not in journal:
+            return False
+        if self.convert is not None:
+            # converting replaces the export, so only the journal can tell
+            return True
+        try:
+            return os.path.getsize(self.out_path(file)) == file.size
+        except OSError:
+            return False
+
+    def _group(self) -> Dict[str, List[Any]]:
+        groups: Dict[str, List[Any]] = {}
+        for file in self.files:
+            groups.setdefault(file.resfile_hash, []).append(file)
+        return groups
+
+    def _export_group(self, files: List[Any], source: Optional[Any]) -> List[Any]:
+        # one fetch per hash, every other path in the folder with the same
+        # content becomes a hardlink (or a copy across filesystems)
+        if source is None:
+            source = files[0]
+            out_path = self.out_path(source)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            if self.fetch(source, out_path) is None:
+                return []
+
+        source_path = self.out_path(source)
+        exported = [source]
+        for file in files:
+            if file is source:
+                continue
+            out_path = self.out_path(file)
+            if os.path.normcase(out_path) == os.path.normcase(source_path):
+                exported.append(file)
+                continue
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            if os.path.exists(out_path):
+                os.remove(out_path)
+            try:
+                os.link(source_path, out_path)
+            except OSError:
+                shutil.copyfile(source_path, out_path)
+            exported.append(file)
+        return exported
+
+    def _convert(self, file: Any) -> Optional[str]:
+        try:
+            return self.convert(file, self.out_path(file))  # type: ignore
+        except Exception as e:
+            return str(e) or type(e).__name__
+
+    def _adjust_workers(self, throughput: float, last: float, step: int) -> int:
+        # hill climbing on bytes/s: keep moving the worker count in the same
+        # direction while throughput improves, turn around when it drops
+        if last and throughput < last * 0.95:
+            step = -step
+        self.workers = max(self.min_workers, min(self.max_workers, self.workers + step))
+        return step
+
+    def run(self) -> Tuple[int, int]:
+        os.makedirs(self.dest_folder, exist_ok=True)
+        journal = self._read_journal()
+        total = len(self.files)
+        done = 0
+        skipped = 0
+
+        pending: Deque[Tuple[List[Any], Optional[Any]]] = deque()
+        for files in self._group().values():
+            finished = [file for file in files if self._is_done(file, journal)]
+            if len(finished) == len(files):
+                done += len(files)
+                skipped += len(files)
+                continue
+            remaining = [file for file in files if file not in finished]
+            # a converted export no longer has the raw file to link from,
+            # so the rest of its group is fetched again
+            pending.append(
+                (remaining, None)
+                if not finished or self.convert is not None
+                else (remaining + finished[:1], finished[0])
+            )
+            done += len(finished)
+
+        if self.on_progress is not None:
+            self.on_progress(done, total, "")
+
+        window_start = time.time()
+        window_bytes = 0
+        last_throughput = 0.0
+        step = 2
+
+        # downloads stop being queued while the converters are this far
+        # behind, so finished downloads never pile up unbounded
+        backlog = self.convert_workers * 2
+        converting: Dict[Any, Any] = {}
+        # these threads only hand files to the converters, which run on
+        # worker processes or as external tools
+        convert_pool = (
+            concurrent.futures.ThreadPoolExecutor(self.convert_workers)
+            if self.convert is not None
+            else None
+        )
+
+        def finished(count: int, name: str) -> None:
+            nonlocal done
+            done += count
+            if self.on_progress is not None:
+                self.on_progress(done, total, name)
+
+        try:
+            with open(self.journal_path, "a", encoding="utf-8") as journal_file:
+                with concurrent.futures.ThreadPoolExecutor(self.max_workers) as pool:
+                    in_flight: Dict[Any, List[Any]] = {}
+                    while pending or in_flight or converting:
+                        while (
+                            pending
+                            and not self.cancelled
+                            and len(in_flight) < self.workers
+                            and len(converting) < backlog
+                        ):
+                            files, source = pending.popleft()
+                            future = pool.submit(self._export_group, files, source)
+                            in_flight[future] = files
+
+                        if not in_flight and not converting:
+                            break
+
+                        completed, _ = concurrent.futures.wait(
+                            [*in_flight, *converting],
+                            timeout=0.5,
+                            return_when=concurrent.futures.FIRST_COMPLETED,
+                        )
+                        for future in completed:
+                            if future in converting:
+                                file = converting.pop(future)
+                                if future.result() is not None:
+                                    self.failed.append(file.respath)
+                                else:
+                                    # only journaled once converted, a file that
+                                    # failed to convert is fetched again next time
+                                    journal_file.write(f"{file.respath}\n")
+                                    journal_file.flush()
+                                finished(1, file.name)
+                                continue
+
+                            files = in_flight.pop(future)
+                            try:
+                                exported = future.result()
+                            except Exception:
+                                exported = []
+                            if not exported:
+                                # a journaled link source was already counted
+                                lost = [f for f in files if f.respath not in journal]
+                                self.failed.extend(file.respath for file in lost)
+                                finished(len(lost), files[0].name)
+                                continue
+                            new = [
+                                file for file in exported if file.respath not in journal
+                            ]
+                            window_bytes += sum(file.size for file in new)
+                            if convert_pool is None:
+                                journal_file.write(
+                                    "".join(f"{file.respath}\n" for file in exported)
+                                )
+                                journal_file.flush()
+                                finished(len(new), exported[0].name)
+                                continue
+                            for file in new:
+                                converting[convert_pool.submit(self._convert, file)] = (
+                                    file
+                                )
+
+                        elapsed = time.time() - window_start
+                        if elapsed >= self.window:
+                            throughput = window_bytes / elapsed
+                            step = self._adjust_workers(
+                                throughput, last_throughput, step
+                            )
+                            last_throughput = throughput
+                            window_start = time.time()
+                            window_bytes = 0
+        finally:
+            if convert_pool is not None:
+                convert_pool.shutdown()
+
+        if not self.cancelled and not self.failed:
+            os.remove(self.journal_path)
+
+        return done, skipped
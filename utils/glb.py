@@ -0,0 +1,182 @@
+import os, json, shutil, struct
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional
+from utils.obj import Wavefront
+from utils.plugins import Gr2ToJson
+
+
+class Glb:
+    MAGIC = 0x46546C67  # "glTF"
+    VERSION = 2
+    JSON_CHUNK = 0x4E4F534A
+    BIN_CHUNK = 0x004E4942
+
+    FLOAT = 5126
+    UNSIGNED_INT = 5125
+    ARRAY_BUFFER = 34962
+    ELEMENT_ARRAY_BUFFER = 34963
+    TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4"}
+
+    @staticmethod
+    def to_glb(file_path: str) -> None:
+        Gr2ToJson().run(file_path)
+        meshes = Wavefront.from_gr2_json(file_path)
+        Glb.write_glb(meshes, f"{os.path.splitext(file_path)[0]}.glb")
+
+        os.remove(file_path)
+        os.remove(f"{file_path}.gr2_json")
+
+    @staticmethod
+    def write_glb(meshes: Iterator[Any], glb_path: str) -> None:
+        # vertex attributes and indices are written as they are into the
+        # binary chunk, one primitive per material group sharing the mesh's
+        # attributes; the chunk is staged in a temp file since the json that
+        # precedes it is only known once every mesh has been read
+        gltf: Dict[str, Any] = {
+            "asset": {"version": "2.0", "generator": "Cyno Exporter"},
+            "scene": 0,
+            "scenes": [{"nodes": []}],
+            "nodes": [],
+            "meshes": [],
+            "materials": [],
+            "accessors": [],
+            "bufferViews": [],
+        }
+        materials: Dict[str, int] = {}
+        temp = f"{glb_path}.bin"
+
+        try:
+            with open(temp, "wb") as buffer:
+                for mesh in meshes:
+                    position = Glb._rows(mesh["position"], 3, "<f4")
+                    count = len(position)
+                    if not count:
+                        continue
+
+                    attributes = {
+                        "POSITION": Glb._accessor(
+                            gltf, buffer, position, Glb.ARRAY_BUFFER, bounds=True
+                        )
+                    }
+                    normal = Glb._rows(mesh["normal"], 3, "<f4")
+                    if len(normal) == count:
+                        attributes["NORMAL"] = Glb._accessor(
+                            gltf, buffer, normal, Glb.ARRAY_BUFFER
+                        )
+                    tangent = Glb._tangent(mesh["tangent"], count)
+                    if tangent is not None:
+                        attributes["TANGENT"] = Glb._accessor(
+                            gltf, buffer, tangent, Glb.ARRAY_BUFFER
+                        )
+                    # granny keeps directx uv's, which is the gltf convention
+                    texcoord = Glb._rows(mesh["texcoord0"], 2, "<f4")
+                    if len(texcoord) == count:
+                        attributes["TEXCOORD_0"] = Glb._accessor(
+                            gltf, buffer, texcoord, Glb.ARRAY_BUFFER
+                        )
+
+                    primitives: List[Dict[str, Any]] = []
+                    for indice in mesh["indices"]:
+                        faces = Glb._rows(indice["faces"], 3, "<u4").ravel()
+                        if not len(faces):
+                            continue
+                        name = indice["name"]
+                        if name not in materials:
+                            materials[name] = len(gltf["materials"])
+                            gltf["materials"].append({"name": name})
+                        primitives.append(
+                            {
+                                "attributes": attributes,
+                                "indices": Glb._accessor(
+                                    gltf, buffer, faces, Glb.ELEMENT_ARRAY_BUFFER
+                                ),
+                                "material": materials[name],
+                            }
+                        )
+                    if not primitives:
+                        continue
+
+                    gltf["scenes"][0]["nodes"].append(len(gltf["nodes"]))
+                    gltf["nodes"].append(
+                        {"name": mesh["name"], "mesh": len(gltf["meshes"])}
+                    )
+                    gltf["meshes"].append(
+                        {"name": mesh["name"], "primitives": primitives}
+                    )
+
+                length = buffer.tell()
+
+            if length:
+                gltf["buffers"] = [{"byteLength": length}]
+            for key in ("materials", "accessors", "bufferViews"):
+                if not gltf[key]:
+                    del gltf[key]
+
+            header = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+            header += b" " * (-len(header) % 4)
+            total = 12 + 8 + len(header) + (8 + length if length else 0)
+            with open(glb_path, "wb") as f:
+                f.write(struct.pack("<III", Glb.MAGIC, Glb.VERSION, total))
+                f.write(struct.pack("<II", len(header), Glb.JSON_CHUNK))
+                f.write(header)
+                if length:
+                    f.write(struct.pack("<II", length, Glb.BIN_CHUNK))
+                    with open(temp, "rb") as buffer:
+                        shutil.copyfileobj(buffer, f, 1 << 20)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+    @staticmethod
+    def _rows(values: Any, columns: int, dtype: str) -> np.ndarray:
+        values = np.asarray(values).ravel()
+        values = values[: len(values) // columns * columns].astype(dtype, copy=False)
+        return values.reshape(-1, columns) if columns > 1 else values
+
+    @staticmethod
+    def _tangent(values: Any, count: int) -> Optional[np.ndarray]:
+        # gltf tangents are xyz plus a +1/-1 handedness in w
+        size = len(values)
+        if not count or size not in (3 * count, 4 * count):
+            return None
+        tangent = Glb._rows(values, size // count, "<f4")
+        if tangent.shape[1] == 3:
+            return np.hstack([tangent, np.ones((count, 1), dtype="<f4")])
+        tangent = tangent.copy()
+        tangent[:, 3] = np.where(tangent[:, 3] < 0, -1.0, 1.0)
+        return tangent
+
+    @staticmethod
+    def _accessor(
+        gltf: Dict[str, Any],
+        buffer: Any,
+        values: np.ndarray,
+        target: int,
+        bounds: bool = False,
+    ) -> int:
+        # every array is 4 byte components, so views stay 4 byte aligned
+        values = np.ascontiguousarray(values)
+        offset = buffer.tell()
+        buffer.write(values.data)
+        gltf["bufferViews"].append(
+            {
+                "buffer": 0,
+                "byteOffset": offset,
+                "byteLength": values.nbytes,
+                "target": target,
+            }
+        )
+        columns = values.shape[1] if values.ndim > 1 else 1
+        accessor: Dict[str, Any] = {
+            "bufferView": len(gltf["bufferViews"]) - 1,
+            "componentType": (
+                Glb.UNSIGNED_INT if values.dtype.kind == "u" else Glb.FLOAT
+            ),
+            "count": len(values),
+            "type": Glb.TYPES[columns],
+        }
+        if bounds:
+            accessor["min"] = values.min(axis=0).tolist()
+            accessor["max"] = values.max(axis=0).tolist()
+        gltf["accessors"].append(accessor)
+        return len(gltf["accessors"]) - 1
@@ -0,0 +1,186 @@
+import re
+import numpy as np
+from json.decoder import scanstring
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+
+class Gr2Json:
+    CHUNK_SIZE = 1 << 20
+    # gr2tojson prints non-finite floats the way msvc does, ex: -nan(ind)
+    NONFINITE = re.compile(r"[-+]?(?:nan(?:\(\w*\))?|inf(?:inity)?)", re.IGNORECASE)
+    SCALAR = re.compile(
+        r"[-+]?(?:nan(?:\(\w*\))?|inf(?:inity)?)|[-+0-9.eE]+|true|false|null",
+        re.IGNORECASE,
+    )
+    WHITESPACE = re.compile(r"[ \t\r\n]*")
+    NUMBER_START = "-+.0123456789nNiI"
+    INTEGER_KEYS = ("faces",)
+
+    def __init__(self, f: TextIO) -> None:
+        # a small pull parser: objects, strings and scalars are decoded as
+        # usual, numeric arrays go straight into typed numpy arrays chunk by
+        # chunk, so the text is never held in memory as a whole
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+
+    @staticmethod
+    def meshes(path: str) -> Iterator[Dict[str, Any]]:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            yield from Gr2Json(f).iter_array("meshes")
+
+    def iter_array(self, name: str) -> Iterator[Any]:
+        # yields the elements of a top level array one at a time, anything
+        # else in the document is parsed and dropped
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._string()
+            self._expect(":")
+            if key == name and self._peek() == "[":
+                self.pos += 1
+                if self._peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield self.value()
+                        if self._next() == "]":
+                            break
+            else:
+                self.value(key)
+            if self._next() == "}":
+                return
+
+    def value(self, key: Optional[str] = None) -> Any:
+        c = self._peek()
+        if c == "{":
+            return self._object()
+        elif c == "[":
+            return self._array(key)
+        elif c == '"':
+            return self._string()
+        return self._scalar()
+
+    def _fill(self) -> bool:
+        data = self.f.read(Gr2Json.CHUNK_SIZE)
+        if not data:
+            return False
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            self.pos = Gr2Json.WHITESPACE.match(self.buf, self.pos).end()  # type: ignore
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def _next(self) -> str:
+        c = self._peek()
+        if c not in (",", "]", "}"):
+            raise ValueError(f"unexpected {c!r} in gr2_json")
+        self.pos += 1
+        return c
+
+    def _expect(self, c: str) -> None:
+        if self._peek() != c:
+            raise ValueError(f"expected {c!r} in gr2_json")
+        self.pos += 1
+
+    def _object(self) -> Dict[str, Any]:
+        self.pos += 1
+        result: Dict[str, Any] = {}
+        if self._peek() == "}":
+            self.pos += 1
+            return result
+        while True:
+            key = self._string()
+            self._expect(":")
+            result[key] = self.value(key)
+            if self._next() == "}":
+                return result
+
+    def _array(self, key: Optional[str]) -> Any:
+        self.pos += 1
+        c = self._peek()
+        if c == "]":
+            self.pos += 1
+            return []
+        if c in Gr2Json.NUMBER_START:
+            return self._numbers(key)
+        items: List[Any] = []
+        while True:
+            items.append(self.value(key))
+            if self._next() == "]":
+                return items
+
+    def _numbers(self, key: Optional[str]) -> Any:
+        dtype = np.int64 if key in Gr2Json.INTEGER_KEYS else np.float32
+        chunks: List[Any] = []
+        while True:
+            end = self.buf.find("]", self.pos)
+            if end != -1:
+                chunks.append(Gr2Json._decode(self.buf[self.pos : end], dtype))
+                self.pos = end + 1
+                break
+            # only whole numbers are decoded, the tail waits for the next read
+            cut = self.buf.rfind(",", self.pos)
+            if cut != -1:
+                chunks.append(Gr2Json._decode(self.buf[self.pos : cut], dtype))
+                self.pos = cut + 1
+            if not self._fill():
+                raise ValueError("unterminated array in gr2_json")
+        if any(isinstance(chunk, list) for chunk in chunks):
+            return [value for chunk in chunks for value in chunk]
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+    @staticmethod
+    def _decode(text: str, dtype: Any) -> Any:
+        if "n" in text or "N" in text:
+            text = Gr2Json.NONFINITE.sub("0", text)
+        if not text.strip():
+            return np.empty(0, dtype=dtype)
+        try:
+            return np.array(text.split(","), dtype=np.float64).astype(dtype)
+        except ValueError:
+            # mixed with true/false/null, only seen outside of the meshes
+            return [Gr2Json._token(token.strip()) for token in text.split(",")]
+
+    def _string(self) -> str:
+        if self._peek() != '"':
+            raise ValueError("expected a string in gr2_json")
+        while True:
+            try:
+                value, self.pos = scanstring(self.buf, self.pos + 1)
+                return value
+            except ValueError:
+                if not self._fill():
+                    raise
+
+    def _scalar(self) -> Any:
+        while True:
+            match = Gr2Json.SCALAR.match(self.buf, self.pos)
+            if match is not None and match.end() < len(self.buf):
+                break
+            if not self._fill():
+                break
+        if match is None:
+            raise ValueError("invalid value in gr2_json")
+        self.pos = match.end()
+        return Gr2Json._token(match.group())
+
+    @staticmethod
+    def _token(token: str) -> Any:
+        lowered = token.lower()
+        if lowered in ("true", "false"):
+            return lowered == "true"
+        elif lowered == "null":
+            return None
+        elif Gr2Json.NONFINITE.fullmatch(token):
+            return 0
+        elif any(c in token for c in ".eE"):
+            return float(token)
+        return int(token)
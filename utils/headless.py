@@ -0,0 +1,254 @@
+import os, sys, json, re, fnmatch
+import concurrent.futures
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from utils.cdn import CDNSession
+from utils.convert import ConvertTypes, Converter
+from utils.plugins import NvttExport
+from utils.dds import Dds
+from utils.bnk import Bnk, BnkError
+from utils.export import ExportEngine
+from utils.rescache import ResFileCache
+from utils.resfileindex import CLIENTS, CHINESE_CLIENTS, ResFileIndex
+from utils.resfiles import ResFileStore
+from utils.restrie import ResTrie, ResDirectory, ResFile, ResBank, ResBankMedia
+from utils.search import SearchIndex
+from utils.resdb import ResDB
+
+
+class ConsoleLogger:
+    def __init__(self, quiet: bool = False) -> None:
+        self.quiet = quiet
+
+    def add(self, message: str) -> None:
+        if not self.quiet:
+            print(message, file=sys.stderr, flush=True)
+
+
+class HeadlessExporter:
+    def __init__(
+        self,
+        client: str = "tq",
+        config_file: str = "./config.json",
+        shared_cache_location: Optional[str] = None,
+        event_logger: Any = None,
+    ) -> None:
+        # same config.json as the GUI, but never created or rewritten here
+        try:
+            with open(config_file, "r", encoding="utf-8") as f:
+                self.config: Dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            self.config = {}
+
+        self.key = client
+        self.client = ResFileIndex.client_file(client)
+        self.shared_cache_location = (
+            shared_cache_location
+            if shared_cache_location is not None
+            else self.config.get("SharedCacheLocation", "")
+        )
+        self.event_logger = event_logger or ConsoleLogger()
+
+        CDNSession.configure(
+            pool_size=self.config.get("HttpPoolSize"),
+            retries=self.config.get("HttpRetries"),
+        )
+        NvttExport.configure(self.config.get("TextureJobs"))
+        Dds.configure(
+            self.config.get("TextureDecoder"), self.config.get("PngCompression")
+        )
+        self.resindex = ResFileIndex(
+            chinese_client=client in CHINESE_CLIENTS, event_logger=self.event_logger
+        )
+        self.store = ResFileStore(
+            self.resindex.resources_url,
+            self.event_logger,
+            ResFileCache(
+                self.config.get("DownloadCacheLocation", "./cache"),
+                int(self.config.get("DownloadCacheSize", 2048)) * 1024 * 1024,
+                self.shared_cache_location,
+            ),
+        )
+        self._root: Optional[ResDirectory] = None
+        self._search_index: Optional[SearchIndex] = None
+
+    @staticmethod
+    def builds(event_logger: Any = None) -> Dict[str, Optional[int]]:
+        event_logger = event_logger or ConsoleLogger()
+        builds: Dict[str, Optional[int]] = {}
+        for key in CLIENTS:
+            client = ResFileIndex.client_file(key)
+            if client is None:
+                continue
+            resindex = ResFileIndex(
+                chinese_client=key in CHINESE_CLIENTS, event_logger=event_logger
+            )
+            try:
+                builds[key] = resindex.fetch_client(client)
+            except Exception:
+                builds[key] = None
+        return builds
+
+    @property
+    def root(self) -> ResDirectory:
+        if self._root is None:
+            table = self.resindex.load_table(
+                self.client, self.shared_cache_location, self.store.download_itemless
+            )
+            self._root = ResTrie.build(table)
+        return self._root
+
+    @property
+    def search_index(self) -> SearchIndex:
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.root, ResDB.open())
+        return self._search_index
+
+    def files(
+        self,
+        patterns: Sequence[str] = (),
+        grep: Optional[str] = None,
+        query: Optional[str] = None,
+    ) -> Iterator[ResFile]:
+        # resfile paths are lowercase, so patterns are matched lowercased;
+        # "*" also matches across "/" like fnmatch does
+        globs = [pattern.lower().lstrip("/") for pattern in patterns]
+        regex = re.compile(grep, re.IGNORECASE) if grep else None
+        files = (
+            self.search_index.search(query) if query else ResTrie.iter_files(self.root)
+        )
+        for file in files:
+            respath = file.respath
+            if globs and not any(fnmatch.fnmatchcase(respath, g) for g in globs):
+                continue
+            if regex is not None and not regex.search(respath):
+                continue
+            yield file
+
+    def media(self, files: Iterator[ResFile]) -> Iterator[ResFile]:
+        # soundbanks are expanded into the media embedded in them, anything
+        # else is passed through
+        for file in files:
+            if not isinstance(file, ResBank):
+                yield file
+                continue
+            if not file.children:
+                with self.bank_file(file) as bank_path:
+                    if bank_path is None:
+                        self.event_logger.add(
+                            f"Could not fetch soundbank: {file.respath}"
+                        )
+                        continue
+                    try:
+                        ResTrie.add_media(file, Bnk.read(bank_path))
+                    except (BnkError, OSError) as e:
+                        self.event_logger.add(f"Could not read {file.respath} ({e})")
+                        continue
+            yield from file.children
+
+    @contextmanager
+    def bank_file(self, bank: ResFile) -> Iterator[Optional[str]]:
+        # banks are mapped where they are, in the shared or download cache
+        if self.client is None:
+            yield ResFileStore.shared_path(self.shared_cache_location, bank)
+            return
+        with self.store.cached(bank) as bank_path:
+            yield bank_path
+
+    def fetch(self, item: ResFile, out_path: str) -> Any:
+        if isinstance(item, ResBankMedia):
+            with self.bank_file(item.parent) as bank_path:  # type: ignore
+                if bank_path is None:
+                    return None
+                Bnk.extract(bank_path, item.offset, item.size, out_path)
+            return item.name
+        if self.client is None:
+            return ResFileStore.copy_shared(self.shared_cache_location, item, out_path)
+        return self.store.download(item, out_path)
+
+    def export(
+        self,
+        dest_folder: str,
+        files: List[ResFile],
+        convert: bool = False,
+        on_progress: Optional[Callable[[int, int, str], Any]] = None,
+        models: str = ConvertTypes.OBJ,
+    ) -> Tuple[int, int, List[str]]:
+        # with convert, every download is handed to the conversion pool as
+        # soon as it lands instead of after the whole export
+        converter = Converter(self.event_logger)
+
+        def fetch_export(file: ResFile, out_path: str) -> Any:
+            # converted soundbank media are read from the bank itself, only
+            # the bank has to be fetched
+            if convert and isinstance(file, ResBankMedia):
+                with self.bank_file(file.parent) as bank_path:  # type: ignore
+                    return file.name if bank_path is not None else None
+            return self.fetch(file, out_path)
+
+        def convert_export(file: ResFile, out_path: str) -> Optional[str]:
+            if isinstance(file, ResBankMedia):
+                with self.bank_file(file.parent) as bank_path:  # type: ignore
+                    if bank_path is None:
+                        return "soundbank unavailable"
+                    return converter.convert_media(
+                        bank_path, file, out_path, ConvertTypes.OGG
+                    )
+            path_type = ConvertTypes.for_path(out_path, models)
+            if path_type == ConvertTypes.GENERIC:
+                return None
+            return convert_file(converter, out_path, path_type)
+
+        engine = ExportEngine(
+            dest_folder,
+            files,
+            fetch_export,
+            on_progress=on_progress,
+            convert=convert_export if convert else None,
+        )
+        done, skipped = engine.run()
+        return done, skipped, list(engine.failed)
+
+    def convert(
+        self, paths: Any, type: Optional[str] = None, models: str = ConvertTypes.OBJ
+    ) -> List[str]:
+        return convert_files(paths, type, self.event_logger, models)
+
+
+def convert_file(
+    converter: Converter, path: str, type: Optional[str] = None
+) -> Optional[str]:
+    path_type = type or ConvertTypes.for_path(path)
+    if path_type == ConvertTypes.GENERIC or not os.path.isfile(path):
+        converter.event_logger.add(f"Nothing to convert: {path}")
+        return "nothing to convert"
+    # the converter logs the errors it reports itself
+    try:
+        return converter.convert(path, path_type)
+    except Exception as e:
+        error = str(e) or e.__class__.__name__
+        converter.event_logger.add(f"Could not convert: {path} ({error})")
+        return error
+
+
+def convert_files(
+    paths: Any,
+    type: Optional[str] = None,
+    event_logger: Any = None,
+    models: str = ConvertTypes.OBJ,
+    workers: Optional[int] = None,
+) -> List[str]:
+    # the converters run on worker processes or as external tools, the
+    # threads only wait on them, one per core keeps every core busy
+    converter = Converter(event_logger or ConsoleLogger())
+    paths = list(paths)
+    with concurrent.futures.ThreadPoolExecutor(workers or os.cpu_count() or 4) as pool:
+        errors = list(
+            pool.map(
+                lambda path: convert_file(
+                    converter, path, type or ConvertTypes.for_path(path, models)
+                ),
+                paths,
+            )
+        )
+    return [path for path, error in zip(paths, errors) if error is not None]
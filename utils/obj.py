@@ -1,93 +1,97 @@
-import os, json, re
+import os
+import numpy as np
 from utils.plugins import Gr2ToJson
-from typing import Any 
+from utils.gr2json import Gr2Json
+from typing import Any, Iterator
 
 class Wavefront:
-    @staticmethod   
-    def from_gr2_json(file_path: str) -> list[Any]: 
-        data = []
-        with open(f"{file_path}.gr2_json", "r") as f:
-            gr2_json = json.loads(re.sub(r"\-nan\(ind\)|\-inf|inf", "0", f.read()))
+    CHUNK_ROWS = 1 << 16
+    BUFFER_SIZE = 1 << 20
 
-        for mesh in gr2_json["meshes"]:
+    @staticmethod   
+    def from_gr2_json(file_path: str) -> Iterator[Any]: 
+        # one mesh at a time, vertex attributes come back as float32 arrays
+        # and faces as int64 arrays
+        for mesh in Gr2Json.meshes(f"{file_path}.gr2_json"):
             vertex = mesh["vertex"]
-            data.append(
-                {
-                    "name": mesh["name"],
-                    "position": vertex["position"],
-                    "tangent": vertex.get("tangent", []),  # unsupported
-                    "normal": vertex.get("normal", []),
-                    "texcoord0": vertex["texcoord0"],
-                    "indices": [
-                        {"name": i["name"], "faces": i["faces"]}
-                        for i in mesh["indices"]
-                    ],
-                } 
-            )
-        return data
+            yield {
+                "name": mesh["name"],
+                "position": vertex["position"],
+                "tangent": vertex.get("tangent", []),  # unsupported
+                "normal": vertex.get("normal", []),
+                "texcoord0": vertex["texcoord0"],
+                "indices": [
+                    {"name": i["name"], "faces": i["faces"]}
+                    for i in mesh["indices"]
+                ],
+            }
 
     @staticmethod 
     def to_obj(file_path: str) -> None:
         Gr2ToJson().run(file_path) 
         meshes = Wavefront.from_gr2_json(file_path)
+        Wavefront.write_obj(meshes, f"{file_path.replace('.gr2', '')}.obj")
+
+        os.remove(file_path) 
+        os.remove(f"{file_path}.gr2_json")
 
-        plaintext = []
+    @staticmethod
+    def write_obj(meshes: Iterator[Any], obj_path: str) -> None:
+        # each block of rows is formatted by a single % over a repeated line
+        # template and written straight out, instead of one string per line
         model_offset = 1
 
-        for mesh in meshes:
-            plaintext.append(Wavefront.o(mesh["name"]))
-
-            for i in range(0, len(mesh["position"]), 3):
-                plaintext.append(Wavefront.v(mesh["position"][i : i + 3]))
-
-            for i in range(0, len(mesh["texcoord0"]), 2):
-                plaintext.append(Wavefront.vt(mesh["texcoord0"][i : i + 2]))
-
-            if mesh["normal"]:
-                for i in range(0, len(mesh["normal"]), 3):
-                    plaintext.append(Wavefront.vn(mesh["normal"][i : i + 3]))
-
-            plaintext.append(Wavefront.s())
-
-            for indice in mesh["indices"]:
-                plaintext.append(Wavefront.usemtl(indice["name"]))
-                faces = indice["faces"]
-                texcoords = mesh["texcoord0"]
-                for i in range(0, len(faces), 3):
-                    v1 = faces[i] + model_offset
-                    v2 = faces[i + 1] + model_offset
-                    v3 = faces[i + 2] + model_offset
-                    plaintext.append(
-                        Wavefront.f(
-                            v1=v1,
-                            v2=v2,
-                            v3=v3,
-                        )
+        with open(obj_path, "w", buffering=Wavefront.BUFFER_SIZE) as f:
+            for mesh in meshes:
+                f.write(f"{Wavefront.o(mesh['name'])}\n")
+
+                position = Wavefront._rows(mesh["position"], 3, np.float32)
+                texcoord = Wavefront._rows(mesh["texcoord0"], 2, np.float32)
+                normal = Wavefront._rows(mesh["normal"], 3, np.float32)
+                Wavefront._write_rows(f, "v %s %s %s\n", position)
+                Wavefront._write_rows(f, "vt %s %s\n", texcoord)
+                Wavefront._write_rows(f, "vn %s %s %s\n", normal)
+
+                f.write(f"{Wavefront.s()}\n")
+
+                for indice in mesh["indices"]:
+                    f.write(f"{Wavefront.usemtl(indice['name'])}\n")
+                    faces = Wavefront._rows(indice["faces"], 3, np.int64)
+                    # v/vt/vn share the vertex index
+                    Wavefront._write_rows(
+                        f,
+                        "f %d/%d/%d %d/%d/%d %d/%d/%d\n",
+                        np.repeat(faces + model_offset, 3, axis=1),
                     )
 
-            model_offset += len(mesh["position"]) // 3
-
-        with open(f"{file_path.replace('.gr2', '')}.obj", "w") as f:
-            f.write("\n".join(plaintext))
-
-        os.remove(file_path) 
-        os.remove(f"{file_path}.gr2_json")
+                model_offset += len(position)
 
     @staticmethod
-    def o(name: str) -> str:
-        return f"o {name}"
+    def _rows(values: Any, columns: int, dtype: Any) -> np.ndarray:
+        values = np.asarray(values, dtype=dtype).ravel()
+        return values[: len(values) // columns * columns].reshape(-1, columns)
 
     @staticmethod
-    def v(*v: Any) -> str:
-        return f"v {' '.join(map(str, *v))}"
+    def _write_rows(f: Any, line: str, rows: np.ndarray) -> None:
+        for start in range(0, len(rows), Wavefront.CHUNK_ROWS):
+            chunk = rows[start : start + Wavefront.CHUNK_ROWS]
+            if chunk.dtype.kind == "f":
+                chunk = Wavefront._floats(chunk)
+            f.write((line * len(chunk)) % tuple(chunk.ravel().tolist()))
 
     @staticmethod
-    def vn(*n: Any) -> str: 
-        return f"vn {' '.join(map(str, *n))}"
+    def _floats(values: np.ndarray) -> np.ndarray:
+        # the shortest text that reads back as the same float32, laid out
+        # like str(float) as the gr2_json values used to be printed; numpy
+        # switches to an exponent sooner, those few go through float
+        text = values.astype(str)
+        exponent = np.char.find(text, "e") != -1
+        text[exponent] = [repr(float(value)) for value in text[exponent]]
+        return text
 
     @staticmethod
-    def vt(*vt: Any) -> str:
-        return f"vt {' '.join(map(str, *vt))}"
+    def o(name: str) -> str:
+        return f"o {name}"
 
     @staticmethod
     def usemtl(mtl: str) -> str:
@@ -96,7 +100,3 @@ class Wavefront:
     @staticmethod
     def s() -> str:
         return f"s 1" 
-
-    @staticmethod
-    def f(v1: int, v2: int, v3: int) -> str:
-        return f"f {v1}/{v1}/{v1} {v2}/{v2}/{v2} {v3}/{v3}/{v3}"
@@ -1,38 +1,28 @@
 import os, subprocess
 import threading
-import time
-from typing import Any
+from typing import Any, Optional
 
 
 class Plugins:
+    # windows only, 0 keeps the plugins runnable elsewhere
+    CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
     def __init__(self, *plugin: Any) -> None:
         self.cwd = "tools"
         self.exe = os.path.join(self.cwd, *plugin)
 
     def run(self, *args: Any) -> Any:
-        stdout = subprocess.run(
+        stdout = self.call(*args).stdout
+        return stdout
+
+    def call(self, *args: Any) -> subprocess.CompletedProcess:
+        return subprocess.run(
             [self.exe, *args],
-            creationflags=subprocess.CREATE_NO_WINDOW,
+            creationflags=Plugins.CREATE_NO_WINDOW,
             check=False,
             capture_output=True,
             text=True,
-        ).stdout
-        return stdout
-
-    def _read_output(self, pipe: Any) -> None:
-        for line in iter(pipe.readline, ""):
-            print(line, end="")
-
-    def write(self, proc: Any, command: str) -> None:
-        threading.Thread(
-            target=self._read_output, args=(proc.stdout,), daemon=True
-        ).start()
-        threading.Thread(
-            target=self._read_output, args=(proc.stderr,), daemon=True
-        ).start()
-
-        proc.stdin.write(command)
-        proc.stdin.flush()
+        )
 
 
 class Gr2ToJson(Plugins):
@@ -60,21 +50,39 @@ class BlackReader(Plugins):
 
 
 class NvttExport(Plugins):
-    def __init__(self, proc: Any) -> None:
-        super().__init__("nvidia", "nvtt_export.exe")
-        self.proc = proc
-
-    def run(self, *args: Any) -> None:
-        filename = os.path.splitext(args[0])[0]
-        dir_path = os.path.dirname(args[0])
-        out = os.path.join(dir_path, f"{filename}.png")
+    # concurrent nvtt_export processes, see configure
+    _jobs = threading.BoundedSemaphore(os.cpu_count() or 4)
 
-        self.write(self.proc, f'{self.exe} "{args[0]}" -o "{out}"\n')
+    def __init__(self) -> None:
+        super().__init__("nvidia", "nvtt_export.exe")
 
-        while not os.path.exists(out):
-            time.sleep(0.01)
+    @staticmethod
+    def configure(jobs: Optional[int] = None) -> None:
+        if jobs:
+            NvttExport._jobs = threading.BoundedSemaphore(max(1, int(jobs)))
+
+    def run(self, *args: Any) -> Optional[str]:
+        # returns an error message, the dds is only removed once the png
+        # has been written and the process exited cleanly
+        out = f"{os.path.splitext(args[0])[0]}.png"
+
+        try:
+            with NvttExport._jobs:
+                result = self.call(args[0], "-o", out)
+        except OSError as e:
+            return f"could not run {self.exe}: {e}"
+
+        if result.returncode != 0 or not os.path.isfile(out):
+            output = (result.stderr or result.stdout or "").strip()
+            error = (
+                f"nvtt_export exited with {result.returncode}"
+                if result.returncode != 0
+                else f"nvtt_export did not write {out}"
+            )
+            return f"{error}: {output}" if output else error
 
         os.remove(args[0])
+        return None
 
 
 class Ww2Ogg(Plugins):
@@ -82,17 +90,17 @@ class Ww2Ogg(Plugins):
         super().__init__("ww2ogg", "ww2ogg.exe")
 
     def run(self, *args: Any) -> Any:
-        filename = os.path.splitext(args[0])
-        dest = os.path.dirname(args[0])
-        old = os.path.join(dest, f"{filename[0]}{filename[1]}")
-        new = os.path.join(dest, f"{filename[0]}.ogg")
-        stdout = super().run(
-            old,
-            "-o",
-            new,
-            "--pcb",
-            os.path.join(self.cwd, "ww2ogg", "packed_codebooks_aoTuV_603.bin"),
-        )
+        new = f"{os.path.splitext(args[0])[0]}.ogg"
+        try:
+            stdout = super().run(
+                args[0],
+                "-o",
+                new,
+                "--pcb",
+                os.path.join(self.cwd, "ww2ogg", "packed_codebooks_aoTuV_603.bin"),
+            )
+        except OSError as e:
+            return f"could not run {self.exe}: {e}", new
         if "Parse error" in stdout:
             return stdout, new
         return None, new
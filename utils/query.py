@@ -0,0 +1,134 @@
+import re, shlex
+from typing import Any, List, Sequence, Tuple
+
+
+class QueryError(ValueError):
+    pass
+
+
+class Term:
+    __slots__ = ("kind", "value", "negate")
+
+    def __init__(self, kind: str, value: Any, negate: bool = False) -> None:
+        self.kind = kind
+        self.value = value
+        self.negate = negate
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Term) and (self.kind, self.value, self.negate) == (
+            other.kind,
+            other.value,
+            other.negate,
+        )
+
+    def __repr__(self) -> str:
+        return f"Term({self.kind!r}, {self.value!r}, {self.negate!r})"
+
+
+class Query:
+    TEXT = "text"
+    NAME = "name"
+    ALIAS = "alias"
+    PATH = "path"
+    EXT = "ext"
+    SIZE = "size"
+
+    KEYS = (NAME, ALIAS, PATH, EXT, SIZE)
+    UNITS = {"": 1, "b": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+    SIZE_RE = re.compile(r"^(>=|<=|>|<|=)?(\d+(?:\.\d+)?)([kmg]?)b?$")
+    MAX_SIZE = (1 << 64) - 1
+
+    @staticmethod
+    def parse(text: str) -> List[Term]:
+        # ext:dds size:>4mb path:dx9/model/ship alias:punisher, anything
+        # else is a plain substring; a leading "-" negates a term
+        try:
+            tokens = shlex.split(text)
+        except ValueError:
+            tokens = text.split()
+
+        terms: List[Term] = []
+        for token in tokens:
+            token = token.lower()
+            negate = token.startswith("-") and len(token) > 1
+            if negate:
+                token = token[1:]
+
+            key, sep, value = token.partition(":")
+            if sep and key in Query.KEYS:
+                if not value:
+                    continue
+                terms.append(Term(key, Query._value(key, value), negate))
+            elif sep and key == "res":
+                terms.append(Term(Query.PATH, Query.respath(value), negate))
+            else:
+                terms.append(Term(Query.TEXT, token, negate))
+        return terms
+
+    @staticmethod
+    def _value(key: str, value: str) -> Any:
+        if key == Query.EXT:
+            return tuple(ext.lstrip(".") for ext in value.split(",") if ext)
+        if key == Query.SIZE:
+            return Query.size_range(value)
+        if key == Query.PATH:
+            return Query.respath(value)
+        return value
+
+    @staticmethod
+    def respath(value: str) -> str:
+        # accepts res:/dx9/..., res/dx9/... or dx9/...
+        if value.startswith("res:"):
+            value = value[4:]
+        value = value.lstrip("/")
+        return value[4:] if value.startswith("res/") else value
+
+    @staticmethod
+    def size_range(value: str) -> Tuple[int, int]:
+        if ".." in value:
+            low, high = value.split("..", 1)
+            return Query._size(low)[0], Query._size(high)[1]
+        return Query._size(value)
+
+    @staticmethod
+    def _size(value: str) -> Tuple[int, int]:
+        match = Query.SIZE_RE.match(value)
+        if match is None:
+            raise QueryError(f"invalid size: {value}")
+        op, number, unit = match.groups()
+        size = int(float(number) * Query.UNITS[unit])
+        if op == ">":
+            return size + 1, Query.MAX_SIZE
+        elif op == ">=":
+            return size, Query.MAX_SIZE
+        elif op == "<":
+            return 0, max(size - 1, 0)
+        elif op == "<=":
+            return 0, size
+        return size, size
+
+    @staticmethod
+    def refines(previous: Sequence[Term], terms: Sequence[Term]) -> bool:
+        # true when everything matching terms also matches previous, so the
+        # previous hits can be narrowed instead of searched again
+        if not previous:
+            return False
+        return all(any(Query._implies(term, old) for term in terms) for old in previous)
+
+    @staticmethod
+    def _implies(term: Term, old: Term) -> bool:
+        if term == old:
+            return True
+        if term.kind != old.kind or term.negate or old.negate:
+            return False
+        if term.kind in (Query.NAME, Query.ALIAS):
+            return old.value in term.value
+        if term.kind == Query.TEXT:
+            return old.value in term.value and ("/" in old.value) == ("/" in term.value)
+        if term.kind == Query.PATH:
+            return term.value.startswith(old.value)
+        if term.kind == Query.EXT:
+            return set(term.value) <= set(old.value)
+        if term.kind == Query.SIZE:
+            return old.value[0] <= term.value[0] and term.value[1] <= old.value[1]
+        return False
@@ -0,0 +1,146 @@
+import os, hashlib, threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+class ResFileCache:
+    LOCK_STRIPES = 64
+
+    def __init__(
+        self, root: str, max_size: int, shared_cache_location: str = ""
+    ) -> None:
+        # same <folder>/<hash> layout as EVE's SharedCache ResFiles, so the
+        # local client's cache can be read as a second source
+        self.root = os.path.join(root, "ResFiles")
+        self.max_size = max_size
+        self.shared_root = ""
+        self.set_shared_cache(shared_cache_location)
+        self.total_size: Optional[int] = None
+        self._lock = threading.Lock()
+        self._hash_locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        # entries handed out and not released yet are never evicted
+        self._pins: Dict[str, int] = {}
+        self._verified: Set[str] = set()
+
+    def set_shared_cache(self, location: str) -> None:
+        self.shared_root = os.path.join(location, "ResFiles") if location else ""
+
+    def path(self, resfile_hash: str) -> str:
+        folder, name = resfile_hash.split("/", 1)
+        return os.path.join(self.root, folder, name)
+
+    @contextmanager
+    def locked(self, resfile_hash: str) -> Iterator[None]:
+        with self._hash_locks[hash(resfile_hash) % self.LOCK_STRIPES]:
+            yield
+
+    def fits(self, size: int) -> bool:
+        # anything bigger than the cap would only evict everything else
+        return size <= self.max_size
+
+    def acquire(self, resfile_hash: str, size: int, md5: str = "") -> Optional[str]:
+        # a hit is pinned until release(), checked against its md5 the first
+        # time it is seen in a session
+        path = self.path(resfile_hash)
+        candidates = [path]
+        if self.shared_root:
+            folder, name = resfile_hash.split("/", 1)
+            candidates.append(os.path.join(self.shared_root, folder, name))
+
+        for candidate in candidates:
+            with self._lock:
+                try:
+                    if os.path.getsize(candidate) != size:
+                        continue
+                except OSError:
+                    continue
+                self._pin(candidate)
+            if md5 and candidate not in self._verified:
+                if ResFileCache._md5(candidate) != md5:
+                    self.release(candidate)
+                    if candidate == path:
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+                    continue
+                self._verified.add(candidate)
+            if candidate == path:
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+            return candidate
+        return None
+
+    def pin(self, path: str) -> None:
+        with self._lock:
+            self._pin(path)
+
+    def _pin(self, path: str) -> None:
+        self._pins[path] = self._pins.get(path, 0) + 1
+
+    def release(self, path: str) -> None:
+        with self._lock:
+            count = self._pins.pop(path, 1) - 1
+            if count:
+                self._pins[path] = count
+
+    def verified(self, path: str) -> None:
+        self._verified.add(path)
+
+    @staticmethod
+    def _md5(path: str) -> str:
+        md5 = hashlib.md5()
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    md5.update(chunk)
+        except OSError:
+            return ""
+        return md5.hexdigest()
+
+    def reserve(self, resfile_hash: str) -> str:
+        path = self.path(resfile_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def add(self, size: int) -> None:
+        with self._lock:
+            if self.total_size is None:
+                self.total_size = sum(size for _, _, size in self._entries())
+            else:
+                self.total_size += size
+            if self.total_size > self.max_size:
+                self._evict()
+
+    def _entries(self) -> List[Tuple[float, str, int]]:
+        entries: List[Tuple[float, str, int]] = []
+        if not os.path.isdir(self.root):
+            return entries
+        for folder in os.scandir(self.root):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.is_file() and not entry.name.endswith(".part"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def _evict(self) -> None:
+        # least recently used first, down to 90% of the cap so eviction does
+        # not rescan the cache on every add
+        target = int(self.max_size * 0.9)
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= target:
+                break
+            if path in self._pins:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self.total_size = total
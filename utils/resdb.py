@@ -0,0 +1,107 @@
+import os, json, sqlite3, threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
+
+
+class ResDB:
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path: str) -> None:
+        # one read-only connection shared by the GUI and loader threads,
+        # lookups are cached since the view asks for the same rows repeatedly
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.get = lru_cache(maxsize=4096)(self._get)
+
+    @staticmethod
+    def build(json_path: str, db_path: str) -> None:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data: Dict[str, Any] = json.load(f)
+
+        temp = f"{db_path}.tmp"
+        if os.path.exists(temp):
+            os.remove(temp)
+        conn = sqlite3.connect(temp)
+        try:
+            conn.execute(
+                "CREATE TABLE files ("
+                "name TEXT PRIMARY KEY, aliases TEXT, description TEXT"
+                ") WITHOUT ROWID"
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                (
+                    (
+                        name,
+                        json.dumps(entry.get("aliases") or []),
+                        entry.get("description") or "",
+                    )
+                    for name, entry in data.items()
+                ),
+            )
+            conn.execute(f"PRAGMA user_version = {ResDB.SCHEMA_VERSION}")
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(temp, db_path)
+
+    @staticmethod
+    def open(json_path: str = "./db.json", db_path: str = "./db.sqlite") -> "ResDB":
+        # db.json is the source of truth in the repo, the packaged build
+        # only ships the converted table
+        try:
+            stale = not os.path.isfile(db_path) or (
+                os.path.isfile(json_path)
+                and os.path.getmtime(json_path) > os.path.getmtime(db_path)
+            )
+            if stale and os.path.isfile(json_path):
+                ResDB.build(json_path, db_path)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"could not build {db_path}: {e}")
+        return ResDB(db_path)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            try:
+                conn = sqlite3.connect(
+                    f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+                )
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version != ResDB.SCHEMA_VERSION:
+                    conn.close()
+                    return None
+                self._conn = conn
+            except sqlite3.Error:
+                return None
+        return self._conn
+
+    def _query(self, sql: str, *args: Any) -> List[Any]:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return []
+            return conn.execute(sql, args).fetchall()
+
+    def _get(self, name: str) -> Optional[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT aliases, description FROM files WHERE name = ?", name
+        )
+        if not rows:
+            return None
+        aliases, description = rows[0]
+        return {"aliases": json.loads(aliases), "description": description}
+
+    def aliases(self, name: str) -> List[Any]:
+        entry = self.get(name)
+        return entry["aliases"] if entry else []
+
+    def description(self, name: str) -> str:
+        entry = self.get(name)
+        return entry["description"] if entry else ""
+
+    def alias_names(self) -> Set[str]:
+        return {
+            name
+            for (name,) in self._query("SELECT name FROM files WHERE aliases != '[]'")
+        }
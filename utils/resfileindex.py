@@ -0,0 +1,315 @@
+import os, json, time, hashlib, threading
+import requests
+from typing import Any, Callable, Dict, List, Optional, Union
+from utils.cdn import CDNSession, VerificationError
+from utils.resindex import ResIndexTable
+
+CLIENTS: Dict[str, Dict[str, Any]] = {
+    "tq": {"name": "Tranquility", "id": "TQ"},
+    "sisi": {"name": "Singularity", "id": "SISI"},
+    "serenity": {"name": "Serenity", "id": "SERENITY"},
+    "duality": {"name": "Duality", "id": "DUALITY"},
+    "infinity": {"name": "Infinity", "id": "INFINITY"},
+    "sharedCache": {"name": "Local", "id": None},
+}
+CHINESE_CLIENTS = ("serenity", "infinity")
+
+
+class ResIndexError(Exception):
+    pass
+
+
+class ProtectedClientError(ResIndexError):
+    pass
+
+
+class ResFileIndex:
+    def __init__(self, chinese_client: bool = False, event_logger: Any = None):
+        self.chinese_client = chinese_client
+        self.event_logger = event_logger
+
+        if not chinese_client:
+            self.binaries_url = "https://binaries.eveonline.com"
+            self.resources_url = "https://resources.eveonline.com"
+        else:
+            self.chinese_url = os.environ.get("CHINESE_RESINDEX_CDN")
+            self.binaries_url = f"{os.environ.get('CHINESE_CDN')}/binaries"
+            self.resources_url = f"{os.environ.get('CHINESE_CDN')}/resources"
+
+    def fetch_client(self, client: Dict[str, Any], timeout: int = 10):
+        base_url = self.chinese_url if self.chinese_client else self.binaries_url
+        response: Any = None
+        url = f"{base_url}/{client}"
+        os.makedirs("resindex", exist_ok=True)
+        cache_path = os.path.join("resindex", str(client))
+        cached: Any = ResFileIndex._read_json(cache_path)
+        headers: Dict[str, str] = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            response = CDNSession.get(url, headers=headers, timeout=timeout)
+            if response.status_code == 304 and cached is not None:
+                self.event_logger.add(f"Client not modified: {response.url}")
+                client = cached["client"]
+            elif response.status_code == 200:
+                client = response.json()
+                self.event_logger.add(f"Requesting client: {response.url}")
+                ResFileIndex._write_file(
+                    cache_path,
+                    json.dumps(
+                        {
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                            "client": client,
+                        }
+                    ).encode("utf-8"),
+                )
+            else:
+                return None
+            if not self._is_protected(client):
+                return self._get_build(client)
+            else:
+                return None
+        except requests.exceptions.MissingSchema:
+            self.event_logger.add(f"Connection failed.")
+        except Exception:
+            self.event_logger.add(f"Connection failed to: {url}")
+
+    @staticmethod
+    def resindexfile_object(content: str):
+        resfile_list: List[Dict[str, Any]] = []
+        for line in sorted(filter(bool, content.lstrip().splitlines())):
+            data = line.lower().split(",")
+            resfile_list.append(
+                {
+                    "res_path": data[0].split(":/")[1],
+                    "resfile_hash": data[1],
+                    "md5": data[2],
+                    "size": data[3],
+                }
+            )
+
+        return resfile_list
+
+    @staticmethod
+    def manifest_resfileindex(manifest: str) -> Optional[Dict[str, Any]]:
+        # the resfileindex entry of a build manifest, None when the manifest
+        # doesn't parse or doesn't name one
+        try:
+            resfileindex = next(
+                (
+                    resfile
+                    for resfile in ResFileIndex.resindexfile_object(manifest)
+                    if resfile["res_path"].startswith("resfileindex.txt")
+                ),
+                None,
+            )
+            if resfileindex is not None:
+                int(resfileindex["size"])
+        except (IndexError, ValueError):
+            return None
+        return resfileindex
+
+    @staticmethod
+    def get_soundbankinfo(content: Any) -> Union[Dict[str, Any], None]:
+        return next(
+            (bnk for bnk in content if "soundbanksinfo.json" in bnk["res_path"]),
+            None,
+        )
+
+    @staticmethod
+    def get_soundbank_index(bankfileinfo: Any) -> Dict[str, Dict[str, str]]:
+        # media id -> resolved path and owning soundbank, built once per load
+        # so every wem resolves with a single lookup
+        index: Dict[str, Dict[str, str]] = {}
+        info = bankfileinfo["SoundBanksInfo"]
+        if "StreamedFiles" in info:
+            for bank in info["StreamedFiles"]:
+                index[bank["Id"]] = {
+                    "path": bank["Path"].replace("\\", "/").lower(),
+                    "bank": "",
+                }
+        else:
+            for bank in info["SoundBanks"]:
+                for media in bank.get("Media", []):
+                    index[media["Id"]] = {
+                        "path": media["CachePath"].lower(),
+                        "bank": bank["ShortName"],
+                    }
+        return index
+
+    @staticmethod
+    def is_verified(path: str, resfile: Union[Dict[str, Any], None]) -> bool:
+        if resfile is None or not os.path.isfile(path):
+            return False
+        if os.path.getsize(path) != int(resfile["size"]):
+            return False
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                md5.update(chunk)
+        return md5.hexdigest() == resfile["md5"]
+
+    @staticmethod
+    def _read_json(path: str) -> Any:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return ResFileIndex.manifest_resfileindex(f.read())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_file(path: str, content: bytes) -> None:
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(content)
+        os.replace(temp, path)
+
+    def fetch_resindexfile(self, build: int) -> str:
+        # builds are immutable, so the build manifest is kept on disk and the
+        # resfileindex is only fetched again when it fails verification
+        base_url = self.chinese_url if self.chinese_client else self.binaries_url
+        os.makedirs("resindex", exist_ok=True)
+
+        manifest_path = os.path.join("resindex", f"eveonline_{build}.txt")
+        resfileindex: Any = None
+        if os.path.isfile(manifest_path):
+            resfileindex = ResFileIndex._read_manifest(manifest_path)
+            if resfileindex is None:
+                self.event_logger.add(f"Resindex manifest is corrupt: {manifest_path}")
+        if resfileindex is None:
+            response = CDNSession.get(f"{base_url}/eveonline_{build}.txt")
+            self.event_logger.add(
+                f"Requesting resindex: {base_url}/eveonline_{build}.txt"
+            )
+            if response.status_code != 200:
+                return ""
+            # only kept once it parses, an error page served with a 200 is
+            # fetched again next time instead of being trusted for good
+            resfileindex = ResFileIndex.manifest_resfileindex(response.text)
+            if resfileindex is None:
+                return ""
+            ResFileIndex._write_file(manifest_path, response.text.encode("utf-8"))
+
+        resfileindex_file = f"{build}_resfileindex.txt"
+        resfileindex_file_path = os.path.join("resindex", resfileindex_file)
+
+        # hashed only when the parsed table cached from it doesn't match its
+        # mtime and size anymore
+        if ResIndexTable.is_current(
+            ResFileIndex.table_path(build), build, resfileindex_file_path
+        ) or ResFileIndex.is_verified(resfileindex_file_path, resfileindex):
+            self.event_logger.add(f"Resindex already on disk: {resfileindex_file}")
+            return resfileindex_file
+
+        # verified while streaming and only moved into place when it matches,
+        # an error page or a truncated body is never parsed and cached
+        url = f"{self.binaries_url}/{resfileindex['resfile_hash']}"
+        for attempt in range(CDNSession.RETRIES + 1):
+            try:
+                status = CDNSession.download(
+                    url,
+                    resfileindex_file_path,
+                    size=int(resfileindex["size"]),
+                    md5=resfileindex["md5"],
+                )
+            except VerificationError as e:
+                self.event_logger.add(
+                    f"Resindex failed verification: {resfileindex_file} ({e}),"
+                    " re-trying..."
+                )
+                time.sleep(CDNSession.backoff(attempt))
+                continue
+            if status != 200:
+                raise ResIndexError(f"{status} error: {url}")
+            return resfileindex_file
+        # the manifest may be what's wrong (a cut off size or md5), it is
+        # fetched again on the next load
+        os.remove(manifest_path)
+        raise ResIndexError(f"Resindex failed verification: {resfileindex_file}")
+
+    @staticmethod
+    def table_path(build: int) -> str:
+        return f"./resindex/{build}_resfileindex.bin"
+
+    @staticmethod
+    def client_file(key: str) -> Optional[str]:
+        client_id = CLIENTS[key]["id"]
+        return f"eveclient_{client_id}.json" if client_id else None
+
+    def load_table(
+        self,
+        client: Any,
+        shared_cache_location: str,
+        download: Callable[[Optional[str], str, Optional[int], Optional[str]], Any],
+    ) -> ResIndexTable:
+        if client is None:
+            build = 0
+            resfileindex_path = os.path.join(
+                shared_cache_location, "tq", "resfileindex.txt"
+            )
+            bnk_path = "./resindex/soundbanksinfo.json"
+            cache_path = "./resindex/sharedcache_resfileindex.bin"
+            error = "Invalid Shared Cache location. Check config.json"
+        else:
+            build = self.fetch_client(client)
+            if build is None:
+                raise ProtectedClientError(f"{client} is protected or unreachable")
+            resfileindex_file: str = self.fetch_resindexfile(build=build)
+            resfileindex_path = os.path.join("resindex", resfileindex_file)
+            bnk_path = f"./resindex/{build}_soundbanksinfo.json"
+            cache_path = ResFileIndex.table_path(build)
+            error = f"Could not load resfileindex for build {build}"
+
+        table = ResIndexTable.load(cache_path, build, resfileindex_path)
+        if table is not None:
+            self.event_logger.add(f"Using cached resfileindex: {cache_path}")
+            return table
+
+        try:
+            with open(resfileindex_path, "r", encoding="utf-8") as f:
+                content = f.read()
+        except OSError:
+            raise ResIndexError(error)
+
+        resfileindex = ResFileIndex.resindexfile_object(content)
+
+        bnk_info = ResFileIndex.get_soundbankinfo(resfileindex)
+        if not ResFileIndex.is_verified(bnk_path, bnk_info):
+            download(
+                bnk_info["resfile_hash"] if bnk_info else None,
+                bnk_path,
+                int(bnk_info["size"]) if bnk_info else None,
+                bnk_info["md5"] if bnk_info else None,
+            )
+
+        # the soundbank info only names the wems, without it they keep their
+        # ids and the table isn't cached so the next load tries again
+        soundbanks: Optional[Dict[str, Dict[str, str]]] = None
+        try:
+            with open(bnk_path, "r", encoding="utf-8") as f:
+                soundbanks = ResFileIndex.get_soundbank_index(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.event_logger.add(f"Could not read soundbank info: {bnk_path} ({e})")
+
+        table = ResIndexTable.from_resfiles(resfileindex, soundbanks or {})
+        if soundbanks is not None:
+            table.save(cache_path, build, resfileindex_path)
+        return table
+
+    def _is_protected(self, client: Any) -> bool:
+        return bool(client["protected"])
+
+    def _get_build(self, client: Any) -> int:
+        return int(client["build"])
@@ -0,0 +1,114 @@
+import os, shutil, time
+import requests
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from utils.cdn import CDNSession, VerificationError
+from utils.rescache import ResFileCache
+
+
+class ResFileStore:
+    def __init__(
+        self,
+        resources_url: str,
+        event_logger: Any,
+        cache: Optional[ResFileCache] = None,
+    ) -> None:
+        self.resources_url = resources_url
+        self.event_logger = event_logger
+        self.cache = cache
+
+    @staticmethod
+    def shared_path(shared_cache_location: str, item: Any) -> str:
+        folder, resfile_hash = item.resfile_hash.split("/", 1)
+        return os.path.join(shared_cache_location, "ResFiles", folder, resfile_hash)
+
+    @staticmethod
+    def copy_shared(shared_cache_location: str, item: Any, dest_path: str) -> Any:
+        shutil.copy(ResFileStore.shared_path(shared_cache_location, item), dest_path)
+        return item.name
+
+    def download_itemless(
+        self,
+        resfile_hash: Optional[str],
+        dest_path: str,
+        size: Optional[int] = None,
+        md5: Optional[str] = None,
+    ) -> None:
+        url = None
+        try:
+            url = f"{self.resources_url}/{resfile_hash}"
+            status = CDNSession.download(url, dest_path, size=size, md5=md5)
+            if status == 404:
+                self.event_logger.add(f"404 error: {url}")
+                return
+        except VerificationError as e:
+            self.event_logger.add(f"Download failed verification: {url} ({e})")
+        except:
+            self.event_logger.add(f"Request failed: {url}")
+
+    def download(self, item: Any, dest_path: str) -> Any:
+        if self.cache is None or not self.cache.fits(item.size):
+            return self._download(item, dest_path)
+
+        with self.cached(item) as cached:
+            if cached is None:
+                return
+            shutil.copyfile(cached, dest_path)
+        return item.name
+
+    @contextmanager
+    def cached(self, item: Any) -> Iterator[Optional[str]]:
+        # resfile hashes are content addresses, so anything already cached
+        # (by any tab, or by the local client's SharedCache) is reused; the
+        # entry can't be evicted until the block using it is done
+        cache = self.cache
+        if cache is None or not cache.fits(item.size):
+            yield None
+            return
+        with cache.locked(item.resfile_hash):
+            cached = cache.acquire(item.resfile_hash, item.size, item.md5)
+            if cached is None:
+                # pinned before it exists, so it can't be evicted as it lands
+                reserved = cache.reserve(item.resfile_hash)
+                cache.pin(reserved)
+                try:
+                    downloaded = self._download(item, reserved)
+                except BaseException:
+                    cache.release(reserved)
+                    raise
+                if downloaded is None:
+                    cache.release(reserved)
+                else:
+                    cached = reserved
+                    cache.verified(cached)
+                    cache.add(item.size)
+        try:
+            yield cached
+        finally:
+            if cached is not None:
+                cache.release(cached)
+
+    def _download(self, item: Any, dest_path: str) -> Any:
+        # connection errors and 5xx are retried by the session, a body that
+        # fails verification is retried here with the same backoff
+        url = f"{self.resources_url}/{item.resfile_hash}"
+        for attempt in range(CDNSession.RETRIES + 1):
+            try:
+                status = CDNSession.download(
+                    url, dest_path, size=item.size, md5=item.md5
+                )
+                if status == 200:
+                    return item.name
+                elif status == 404:
+                    self.event_logger.add(f"404 error: {item.name}")
+                    return
+                self.event_logger.add(f"{status} error: {item.name}, re-trying...")
+            except VerificationError as e:
+                self.event_logger.add(
+                    f"resfile doesn't match: {dest_path} ({e}), re-trying..."
+                )
+            except requests.exceptions.RequestException:
+                self.event_logger.add(f"Request failed: {url}")
+                return
+            time.sleep(CDNSession.backoff(attempt))
+        self.event_logger.add(f"Giving up on: {item.name}")
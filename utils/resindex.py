@@ -0,0 +1,163 @@
+import os, struct, threading
+from array import array
+from typing import Any, Dict, List, Optional
+
+
+class ResIndexTable:
+    MAGIC = b"CYRX"
+    VERSION = 2
+    HEADER = struct.Struct("<4sIqqqI")
+    SECTION = struct.Struct("<Q")
+
+    def __init__(
+        self,
+        paths: List[str],
+        hashes: List[str],
+        md5s: List[str],
+        sizes: "array[int]",
+        banks: List[str],
+    ) -> None:
+        self.paths = paths
+        self.hashes = hashes
+        self.md5s = md5s
+        self.sizes = sizes
+        self.banks = banks
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @staticmethod
+    def from_resfiles(
+        resfiles: List[Dict[str, Any]], soundbanks: Dict[str, Dict[str, str]]
+    ) -> "ResIndexTable":
+        paths: List[str] = []
+        banks: List[str] = []
+        for resfile in resfiles:
+            res_path = resfile["res_path"]
+            bank = ""
+            if ".wem" in res_path:
+                search_id = os.path.basename(res_path).split(".")[0]
+                media = soundbanks.get(search_id)
+                if media is not None:
+                    res_path = media["path"]
+                    bank = media["bank"]
+            paths.append(res_path)
+            banks.append(bank)
+
+        return ResIndexTable(
+            paths,
+            [resfile["resfile_hash"] for resfile in resfiles],
+            [resfile.get("md5", "") for resfile in resfiles],
+            array("Q", (int(resfile["size"]) for resfile in resfiles)),
+            banks,
+        )
+
+    @staticmethod
+    def _source_key(source_path: str) -> tuple:
+        stat = os.stat(source_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _matches(data: Any, build: int, source_key: tuple) -> bool:
+        header = ResIndexTable.HEADER
+        if len(data) < header.size:
+            return False
+        magic, version, cached_build, mtime, size, _ = header.unpack_from(data)
+        return (
+            magic == ResIndexTable.MAGIC
+            and version == ResIndexTable.VERSION
+            and cached_build == build
+            and (mtime, size) == source_key
+        )
+
+    def save(self, path: str, build: int, source_path: str) -> None:
+        mtime, size = ResIndexTable._source_key(source_path)
+        sections = [
+            "\n".join(self.paths).encode("utf-8"),
+            "\n".join(self.hashes).encode("utf-8"),
+            "\n".join(self.md5s).encode("utf-8"),
+            "\n".join(self.banks).encode("utf-8"),
+            self.sizes.tobytes(),
+        ]
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(
+                ResIndexTable.HEADER.pack(
+                    ResIndexTable.MAGIC,
+                    ResIndexTable.VERSION,
+                    build,
+                    mtime,
+                    size,
+                    len(self),
+                )
+            )
+            for section in sections:
+                f.write(ResIndexTable.SECTION.pack(len(section)))
+                f.write(section)
+        os.replace(temp, path)
+
+    @staticmethod
+    def is_current(path: str, build: int, source_path: str) -> bool:
+        # only reads the header, a cache is written right after its source
+        # was verified so a match vouches for the source as well
+        try:
+            source_key = ResIndexTable._source_key(source_path)
+            with open(path, "rb") as f:
+                data = f.read(ResIndexTable.HEADER.size)
+        except OSError:
+            return False
+        return ResIndexTable._matches(data, build, source_key)
+
+    @staticmethod
+    def load(path: str, build: int, source_path: str) -> Optional["ResIndexTable"]:
+        # a cache is only valid for the exact build and source file it was
+        # parsed from, anything else falls back to parsing the text index
+        try:
+            source_key = ResIndexTable._source_key(source_path)
+            with open(path, "rb") as f:
+                data = memoryview(f.read())
+        except OSError:
+            return None
+
+        header = ResIndexTable.HEADER
+        if not ResIndexTable._matches(data, build, source_key):
+            return None
+        count = header.unpack_from(data)[-1]
+
+        # a truncated or corrupt cache is rebuilt from the source like a
+        # stale one
+        try:
+            sections: List[memoryview] = []
+            offset = header.size
+            for _ in range(5):
+                (length,) = ResIndexTable.SECTION.unpack_from(data, offset)
+                offset += ResIndexTable.SECTION.size
+                if offset + length > len(data):
+                    return None
+                sections.append(data[offset : offset + length])
+                offset += length
+
+            def lines(section: memoryview) -> List[str]:
+                return str(section, "utf-8").split("\n") if count else []
+
+            sizes = array("Q")
+            sizes.frombytes(sections[4])
+            table = ResIndexTable(
+                lines(sections[0]),
+                lines(sections[1]),
+                lines(sections[2]),
+                sizes,
+                lines(sections[3]),
+            )
+        except (struct.error, ValueError):
+            return None
+        if not (
+            len(table.paths)
+            == len(table.hashes)
+            == len(table.md5s)
+            == len(table.banks)
+            == len(sizes)
+            == count
+        ):
+            return None
+        return table
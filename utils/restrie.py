@@ -0,0 +1,180 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from utils.resindex import ResIndexTable
+
+
+class ResDirectory:
+    __slots__ = ("name", "parent", "row", "children", "dirs", "size")
+
+    def __init__(self, name: str, parent: Optional["ResDirectory"] = None) -> None:
+        self.name = name
+        self.parent = parent
+        self.row = 0
+        self.children: List[Any] = []
+        self.dirs: Dict[str, "ResDirectory"] = {}
+        self.size = 0
+
+    def add(self, child: Any) -> None:
+        child.row = len(self.children)
+        self.children.append(child)
+
+    def directory(self, name: str) -> "ResDirectory":
+        node = self.dirs.get(name)
+        if node is None:
+            node = ResDirectory(name, self)
+            self.dirs[name] = node
+            self.add(node)
+        return node
+
+    @property
+    def path(self) -> str:
+        segments: List[str] = []
+        node: Optional[ResDirectory] = self
+        while node is not None and node.parent is not None:
+            segments.append(node.name)
+            node = node.parent
+        return "/".join(reversed(segments))
+
+
+class ResFile:
+    __slots__ = ("name", "parent", "row", "resfile_hash", "md5", "size", "_respath")
+
+    def __init__(
+        self,
+        name: str,
+        parent: ResDirectory,
+        resfile_hash: str,
+        size: int,
+        md5: str = "",
+        respath: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.parent = parent
+        self.row = 0
+        self.resfile_hash = resfile_hash
+        self.md5 = md5
+        self.size = size
+        # only stored when it differs from the position in the tree
+        # (soundbank media), otherwise rebuilt from the parents on demand
+        self._respath = respath
+
+    @property
+    def respath(self) -> str:
+        if self._respath is not None:
+            return self._respath
+        directory = self.parent.path
+        return f"{directory}/{self.name}" if directory else self.name
+
+
+class ResBank(ResFile):
+    __slots__ = ("children",)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # the embedded media, only listed once the bank has been read
+        self.children: List["ResBankMedia"] = []
+
+
+class ResBankMedia(ResFile):
+    __slots__ = ("offset",)
+
+    def __init__(self, media_id: int, bank: ResBank, offset: int, size: int) -> None:
+        # a slice of the bank rather than a resfile of its own, the hash only
+        # has to keep exports from grouping media of the same bank together
+        super().__init__(
+            f"{media_id}.wem",
+            bank,  # type: ignore
+            resfile_hash=f"{bank.resfile_hash}#{media_id}",
+            size=size,
+            respath=f"{bank.respath.rsplit('.', 1)[0]}/{media_id}.wem",
+        )
+        self.offset = offset
+
+
+class ResTrie:
+    @staticmethod
+    def is_junk(name: str) -> bool:
+        return "_lowdetail" in name or "_mediumdetail" in name
+
+    @staticmethod
+    def iter_files(node: Any) -> Iterator[ResFile]:
+        if isinstance(node, ResFile):
+            yield node
+            return
+        stack: List[ResDirectory] = [node]
+        while stack:
+            for child in stack.pop().children:
+                if isinstance(child, ResDirectory):
+                    stack.append(child)
+                else:
+                    yield child
+
+    @staticmethod
+    def compute_sizes(root: ResDirectory) -> None:
+        # reversed pre-order visits every directory after all of its
+        # subdirectories, so each total is summed exactly once
+        order: List[ResDirectory] = []
+        stack: List[ResDirectory] = [root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.dirs.values())
+
+        for node in reversed(order):
+            node.size = sum(child.size for child in node.children)
+
+    @staticmethod
+    def build(
+        table: ResIndexTable,
+        on_progress: Optional[Callable[[int, int], Any]] = None,
+    ) -> ResDirectory:
+        root = ResDirectory("res:")
+        total = len(table)
+        step = max(1, total // 100)
+
+        for i, (res_path, resfile_hash, md5, size, soundbank_directory) in enumerate(
+            zip(table.paths, table.hashes, table.md5s, table.sizes, table.banks)
+        ):
+            if on_progress is not None and i % step == 0:
+                on_progress(i, total)
+
+            path_segments = res_path.split("/")
+            file_name = path_segments[-1]
+
+            # filter junk
+            if ResTrie.is_junk(file_name):
+                continue
+
+            parent = root
+            if soundbank_directory:
+                parent = parent.directory("soundbanks")
+                if res_path.startswith("sfx"):
+                    parent = parent.directory(soundbank_directory)
+
+            for segment in path_segments[:-1]:
+                parent = parent.directory(segment)
+
+            parent.add(
+                (ResBank if file_name.endswith(".bnk") else ResFile)(
+                    file_name,
+                    parent,
+                    resfile_hash=resfile_hash,
+                    size=size,
+                    md5=md5,
+                    respath=res_path if soundbank_directory else None,
+                )
+            )
+
+        ResTrie.compute_sizes(root)
+
+        if on_progress is not None:
+            on_progress(total, total)
+
+        return root
+
+    @staticmethod
+    def add_media(bank: ResBank, media: List[Tuple[int, int, int]]) -> None:
+        bank.children = []
+        for row, (media_id, offset, size) in enumerate(media):
+            child = ResBankMedia(media_id, bank, offset, size)
+            child.row = row
+            bank.children.append(child)
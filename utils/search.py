@@ -0,0 +1,274 @@
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Set, Tuple
+from utils.restrie import ResTrie, ResDirectory, ResFile
+from utils.query import Query, Term
+from utils.resdb import ResDB
+
+
+class SearchIndex:
+    DENSE = 16
+    COST = {
+        Query.SIZE: 0,
+        Query.EXT: 1,
+        Query.NAME: 2,
+        Query.ALIAS: 3,
+        Query.TEXT: 4,
+        Query.PATH: 5,
+    }
+
+    def __init__(self, root: ResDirectory, db: Optional[ResDB] = None):
+        # files are laid out shortest name first, which is the order results
+        # are ranked in, so a left to right scan returns them already sorted
+        self.root = root
+        self.files: List[ResFile] = sorted(
+            ResTrie.iter_files(root), key=lambda f: len(f.name)
+        )
+        self.directories: List[ResDirectory] = []
+        stack: List[ResDirectory] = [root]
+        while stack:
+            node = stack.pop()
+            self.directories.append(node)
+            stack.extend(node.dirs.values())
+
+        # aliases get their own haystack with one row per distinct name:
+        # db.json only covers a few thousand names, and keeping its non-latin
+        # text out of the filename haystack keeps that one byte wide
+        self.keys = [file.name.lower() for file in self.files]
+        self.names, self.name_offsets = SearchIndex._pack(self.keys)
+        self.sizes = array("Q", (file.size for file in self.files))
+        self.exts: List[str] = []
+        self.by_ext: Dict[str, List[int]] = {}
+        for entry, key in enumerate(self.keys):
+            ext = key.rpartition(".")[2] if "." in key else ""
+            entries = self.by_ext.get(ext)
+            if entries is None:
+                entries = self.by_ext[ext] = []
+            else:
+                ext = self.exts[entries[0]]
+            entries.append(entry)
+            self.exts.append(ext)
+        named: Dict[str, List[int]] = {}
+        alias_names = db.alias_names() if db is not None else set()
+        for entry, file in enumerate(self.files if alias_names else ()):
+            if file.name in alias_names:
+                named.setdefault(file.name, []).append(entry)
+        self.alias_keys: List[str] = []
+        self.alias_entries: List[List[int]] = []
+        self.alias_rows: Dict[int, int] = {}
+        for name, entries in named.items():
+            aliases = [
+                alias.lower().replace("\n", " ")
+                for alias in db.aliases(name)  # type: ignore
+                if isinstance(alias, str)
+            ]
+            if aliases:
+                for entry in entries:
+                    self.alias_rows[entry] = len(self.alias_keys)
+                self.alias_keys.append("\t".join(aliases))
+                self.alias_entries.append(entries)
+        self.aliases, self.alias_offsets = SearchIndex._pack(self.alias_keys)
+        self.directory_keys = [node.name.lower() for node in self.directories]
+        self.directory_names, self.directory_offsets = SearchIndex._pack(
+            self.directory_keys
+        )
+        self._paths: Optional[Tuple[List[str], str, "array[int]"]] = None
+        # previous query and its hits, narrowed instead of rescanned when
+        # the next query extends it
+        self._last: Tuple[List[Term], List[int]] = ([], [])
+        self._last_directories: Tuple[str, List[int]] = ("", [])
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @staticmethod
+    def _pack(keys: List[str]) -> Tuple[str, "array[int]"]:
+        # one newline separated haystack plus the start offset of every
+        # entry, str.find does the matching and bisect maps hits to entries
+        offsets = array("Q", accumulate((len(key) + 1 for key in keys), initial=0))
+        return "\n".join(keys) + "\n", offsets
+
+    @staticmethod
+    def _scan(
+        keys: List[str], haystack: str, offsets: "array[int]", query: str
+    ) -> List[int]:
+        entries: List[int] = []
+        limit = len(keys) // SearchIndex.DENSE
+        find = haystack.find
+        pos = find(query)
+        while pos != -1:
+            entry = bisect_right(offsets, pos) - 1
+            entries.append(entry)
+            if len(entries) > limit:
+                # a query hitting a large share of the entries is cheaper to
+                # test per key than to keep walking hit by hit
+                entries.extend(
+                    index
+                    for index, key in enumerate(keys[entry + 1 :], entry + 1)
+                    if query in key
+                )
+                break
+            pos = find(query, offsets[entry + 1])
+        return entries
+
+    def _path_haystack(self) -> Tuple[List[str], str, "array[int]"]:
+        if self._paths is None:
+            paths = [file.respath for file in self.files]
+            self._paths = (paths, *SearchIndex._pack(paths))
+        return self._paths
+
+    def _text_entries(self, value: str) -> List[int]:
+        if "/" in value:
+            return SearchIndex._scan(*self._path_haystack(), value)
+        entries = SearchIndex._scan(self.keys, self.names, self.name_offsets, value)
+        aliased = self._alias_entries(value)
+        if aliased:
+            entries = sorted(set(entries).union(aliased))
+        return entries
+
+    def _alias_entries(self, value: str) -> List[int]:
+        alias_entries = self.alias_entries
+        return [
+            entry
+            for row in SearchIndex._scan(
+                self.alias_keys, self.aliases, self.alias_offsets, value
+            )
+            for entry in alias_entries[row]
+        ]
+
+    def _seed(self, term: Term) -> Optional[List[int]]:
+        # hits for a positive term straight from an index, in rank order
+        if term.negate:
+            return None
+        if term.kind == Query.TEXT:
+            return self._text_entries(term.value)
+        if term.kind == Query.NAME:
+            return SearchIndex._scan(
+                self.keys, self.names, self.name_offsets, term.value
+            )
+        if term.kind == Query.ALIAS:
+            return sorted(self._alias_entries(term.value))
+        if term.kind == Query.EXT:
+            if len(term.value) == 1:
+                return list(self.by_ext.get(term.value[0], ()))
+            return sorted(
+                entry for ext in term.value for entry in self.by_ext.get(ext, ())
+            )
+        if term.kind == Query.PATH:
+            return self._narrow(
+                SearchIndex._scan(*self._path_haystack(), term.value), term
+            )
+        return None
+
+    def _narrow(self, entries: List[int], term: Term) -> List[int]:
+        kind, value, negate = term.kind, term.value, term.negate
+        if kind == Query.SIZE:
+            sizes = self.sizes
+            low, high = value
+            return [e for e in entries if (low <= sizes[e] <= high) != negate]
+        if kind == Query.EXT:
+            exts = self.exts
+            wanted = set(value)
+            return [e for e in entries if (exts[e] in wanted) != negate]
+        if kind == Query.PATH:
+            paths = self._path_haystack()[0]
+            return [e for e in entries if paths[e].startswith(value) != negate]
+        if kind == Query.TEXT and "/" in value:
+            paths = self._path_haystack()[0]
+            return [e for e in entries if (value in paths[e]) != negate]
+
+        keys, alias_keys, alias_rows = self.keys, self.alias_keys, self.alias_rows
+        if kind == Query.NAME:
+            return [e for e in entries if (value in keys[e]) != negate]
+        if kind == Query.ALIAS:
+            return [
+                e
+                for e in entries
+                if (e in alias_rows and value in alias_keys[alias_rows[e]]) != negate
+            ]
+        return [
+            e
+            for e in entries
+            if (
+                value in keys[e]
+                or (e in alias_rows and value in alias_keys[alias_rows[e]])
+            )
+            != negate
+        ]
+
+    def _evaluate(self, terms: List[Term]) -> List[int]:
+        # the first term with an index behind it seeds the candidates, the
+        # rest narrow them cheapest column first
+        terms = list(terms)
+        entries: Optional[List[int]] = None
+        for term in terms:
+            entries = self._seed(term)
+            if entries is not None:
+                terms.remove(term)
+                break
+        if entries is None:
+            entries = list(range(len(self.files)))
+        for term in sorted(terms, key=lambda t: SearchIndex.COST[t.kind]):
+            if not entries:
+                break
+            entries = self._narrow(entries, term)
+        return entries
+
+    def search(self, query: str) -> List[ResFile]:
+        # names and aliases by default, full res paths once a term contains
+        # a separator; see Query for the key:value filters
+        terms = Query.parse(query)
+        if not terms:
+            self._last = ([], [])
+            return []
+        last, last_entries = self._last
+        if last == terms:
+            entries = last_entries
+        elif Query.refines(last, terms):
+            entries = last_entries
+            for term in sorted(terms, key=lambda t: SearchIndex.COST[t.kind]):
+                if term not in last:
+                    entries = self._narrow(entries, term)
+        else:
+            entries = self._evaluate(terms)
+        self._last = (terms, entries)
+        files = self.files
+        return [files[entry] for entry in entries]
+
+    def visible(self, query: str, results: List[ResFile]) -> Set[Any]:
+        visible: Set[Any] = set(results)
+        visible.add(self.root)
+        nodes: Set[Any] = {file.parent for file in results}
+        # directories are only matched by name for a single plain term, the
+        # way the tree search always worked
+        terms = Query.parse(query)
+        term = terms[0] if len(terms) == 1 else None
+        if (
+            term is not None
+            and term.kind == Query.TEXT
+            and not term.negate
+            and "/" not in term.value
+        ):
+            query = term.value
+            last, last_entries = self._last_directories
+            if last == query:
+                entries = last_entries
+            elif last and last in query:
+                keys = self.directory_keys
+                entries = [entry for entry in last_entries if query in keys[entry]]
+            else:
+                entries = SearchIndex._scan(
+                    self.directory_keys,
+                    self.directory_names,
+                    self.directory_offsets,
+                    query,
+                )
+            self._last_directories = (query, entries)
+            directories = self.directories
+            nodes.update(directories[entry] for entry in entries)
+        for node in nodes:
+            while node is not None and node not in visible:
+                visible.add(node)
+                node = node.parent
+        return visible
@@ -0,0 +1,496 @@
+import os, struct, zlib
+from typing import Dict, List, Optional, Tuple
+
+
+class WemError(ValueError):
+    pass
+
+
+class BitReader:
+    def __init__(self, data: bytes) -> None:
+        # vorbis bit order, least significant bit of each byte first
+        self.size = len(data) * 8
+        self.data = bytes(data) + bytes(8)
+        self.position = 0
+
+    def read(self, bits: int) -> int:
+        if self.position + bits > self.size:
+            raise WemError("read past the end of a packet")
+        start = self.position >> 3
+        value = int.from_bytes(self.data[start : start + 8], "little")
+        value >>= self.position & 7
+        self.position += bits
+        return value & ((1 << bits) - 1)
+
+
+class BitWriter:
+    def __init__(self) -> None:
+        self.out = bytearray()
+        self.value = 0
+        self.bits = 0
+
+    def write(self, value: int, bits: int) -> None:
+        self.value |= value << self.bits
+        self.bits += bits
+        if self.bits >= 64:
+            size = self.bits >> 3
+            self.out += (self.value & ((1 << size * 8) - 1)).to_bytes(size, "little")
+            self.value >>= size * 8
+            self.bits -= size * 8
+
+    def getvalue(self) -> bytes:
+        return bytes(self.out) + self.value.to_bytes((self.bits + 7) >> 3, "little")
+
+    def total(self) -> Tuple[int, int]:
+        # the written bits as one integer, to be replayed into another writer
+        return int.from_bytes(self.getvalue(), "little"), len(self.out) * 8 + self.bits
+
+
+class Wem:
+    CODEBOOKS = os.path.join("tools", "ww2ogg", "packed_codebooks_aoTuV_603.bin")
+    VENDOR = b"converted from Audiokinetic Wwise by Cyno Exporter"
+    VORBIS = 0xFFFF
+    # mod signals of the granule-less layouts whose packets are stored as is,
+    # any other value means the packet type and window bits were stripped
+    UNMODIFIED = (0x4A, 0x4B, 0x69, 0x70)
+    SERIAL = 1
+    PAGE_SIZE = 4096
+    BOS = 0x2
+    EOS = 0x4
+    CONTINUED = 0x1
+    REVERSED = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+    _library: Optional[List[bytes]] = None
+    _codebooks: Dict[int, Tuple[int, int]] = {}
+
+    @staticmethod
+    def to_ogg(path: str) -> str:
+        # the wem is only removed once the ogg has been written
+        with open(path, "rb") as f:
+            ogg = Wem.convert(f.read())
+        out = f"{os.path.splitext(path)[0]}.ogg"
+        with open(out, "wb") as f:
+            f.write(ogg)
+        os.remove(path)
+        return out
+
+    @staticmethod
+    def convert(data: bytes) -> bytes:
+        # the work of ww2ogg and revorb in one pass: the vorbis headers are
+        # rebuilt from the wem's stripped setup, packets get their type and
+        # window bits back and granules are counted from the block sizes,
+        # data can be any buffer, nothing but the packets is copied out of it
+        chunks = Wem._chunks(data)
+        if b"fmt " not in chunks or b"data" not in chunks:
+            raise WemError("missing fmt or data chunk")
+        fmt, fmt_size = chunks[b"fmt "]
+        data_offset, data_size = chunks[b"data"]
+        if fmt_size < 0x12:
+            raise WemError("fmt chunk too small")
+        codec, channels, sample_rate, bytes_per_second = struct.unpack_from(
+            "<HHII", data, fmt
+        )
+        if codec != Wem.VORBIS:
+            raise WemError(f"not a vorbis wem (codec {codec:#x})")
+
+        if b"vorb" in chunks:
+            vorb, vorb_size = chunks[b"vorb"]
+        elif fmt_size == 0x42:
+            vorb, vorb_size = fmt + 0x18, -1
+        else:
+            raise WemError("missing vorb chunk")
+        if vorb_size in (-1, 0x2A):
+            header = 2
+            modified = Wem._u32(data, vorb + 0x4) not in Wem.UNMODIFIED
+            setup_offset, audio_offset = struct.unpack_from("<II", data, vorb + 0x10)
+            uid = vorb + 0x24
+        elif vorb_size in (0x32, 0x34):
+            header = 6
+            modified = False
+            setup_offset, audio_offset = struct.unpack_from("<II", data, vorb + 0x18)
+            uid = vorb + 0x2C
+        else:
+            raise WemError(f"unsupported vorb chunk size {vorb_size:#x}")
+        sample_count = Wem._u32(data, vorb)
+        blocksize_0, blocksize_1 = data[uid + 4], data[uid + 5]
+
+        comments: List[str] = []
+        if b"smpl" in chunks and chunks[b"smpl"][1] >= 0x34:
+            smpl = chunks[b"smpl"][0]
+            if Wem._u32(data, smpl + 0x1C):
+                start, end = struct.unpack_from("<II", data, smpl + 0x2C)
+                end = end + 1 if end else sample_count
+                comments = [f"LoopStart={start}", f"LoopEnd={end}"]
+
+        end = data_offset + min(data_size, len(data) - data_offset)
+        setup, next_offset = Wem._packet(data, data_offset + setup_offset, header, end)
+        if next_offset != data_offset + audio_offset:
+            raise WemError("the first audio packet doesn't follow the setup packet")
+        setup_header, blockflags = Wem._setup(setup, channels)
+
+        ogg = OggWriter(Wem.SERIAL)
+        ogg.packet(
+            struct.pack(
+                "<B6sIBIiIiBB",
+                1,
+                b"vorbis",
+                0,
+                channels,
+                sample_rate,
+                0,
+                bytes_per_second * 8,
+                0,
+                blocksize_0 | blocksize_1 << 4,
+                1,
+            ),
+            0,
+        )
+        ogg.flush()
+        comment = [struct.pack("<B6sI", 3, b"vorbis", len(Wem.VENDOR)), Wem.VENDOR]
+        comment.append(struct.pack("<I", len(comments)))
+        for text in comments:
+            comment += [struct.pack("<I", len(text)), text.encode("utf-8")]
+        ogg.packet(b"".join(comment) + b"\x01", 0)
+        ogg.packet(setup_header, 0)
+        ogg.flush()
+
+        mode_bits = (len(blockflags) - 1).bit_length()
+        mode_mask = (1 << mode_bits) - 1
+        sizes = (1 << blocksize_0, 1 << blocksize_1)
+        offset = next_offset
+        granule = last = 0
+        previous = False
+        while offset < end:
+            packet, next_offset = Wem._packet(data, offset, header, end)
+            if packet:
+                if modified:
+                    value = int.from_bytes(packet, "little")
+                    mode = value & mode_mask
+                else:
+                    mode = packet[0] >> 1 & mode_mask
+                if mode >= len(blockflags):
+                    raise WemError(f"invalid mode {mode} in an audio packet")
+                long = blockflags[mode]
+                if modified:
+                    # packet type 0 and the mode, then for long windows the
+                    # previous and next window types, the rest is shifted
+                    bits = 1 + mode_bits
+                    rebuilt = mode << 1
+                    if long:
+                        following = False
+                        if next_offset + header < end and Wem._u16(data, next_offset):
+                            next_mode = data[next_offset + header] & mode_mask
+                            following = (
+                                next_mode < len(blockflags) and blockflags[next_mode]
+                            )
+                        rebuilt |= previous << bits | following << bits + 1
+                        bits += 2
+                    rebuilt |= value >> mode_bits << bits
+                    size = (len(packet) * 8 - mode_bits + bits + 7) >> 3
+                    packet = rebuilt.to_bytes(size, "little")
+                previous = long
+                if last:
+                    granule += (last + sizes[long]) // 4
+                last = sizes[long]
+            if ogg.size >= Wem.PAGE_SIZE:
+                ogg.flush()
+            ogg.packet(packet, granule)
+            offset = next_offset
+        ogg.flush(eos=True)
+        return ogg.getvalue()
+
+    @staticmethod
+    def _u16(data: bytes, offset: int) -> int:
+        return struct.unpack_from("<H", data, offset)[0]
+
+    @staticmethod
+    def _u32(data: bytes, offset: int) -> int:
+        return struct.unpack_from("<I", data, offset)[0]
+
+    @staticmethod
+    def _chunks(data: bytes) -> Dict[bytes, Tuple[int, int]]:
+        if data[:4] == b"RIFX":
+            raise WemError("big endian wem is not supported")
+        if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+            raise WemError("not a riff wave file")
+        limit = min(len(data), Wem._u32(data, 4) + 8)
+        chunks: Dict[bytes, Tuple[int, int]] = {}
+        offset = 12
+        while offset + 8 <= limit:
+            tag, size = struct.unpack_from("<4sI", data, offset)
+            chunks[tag] = (offset + 8, size)
+            offset += 8 + size
+        return chunks
+
+    @staticmethod
+    def _packet(data: bytes, offset: int, header: int, end: int) -> Tuple[bytes, int]:
+        # 2 byte size, or size plus a 4 byte granule in older layouts
+        if offset + header > end:
+            raise WemError("truncated packet header")
+        start = offset + header
+        stop = start + Wem._u16(data, offset)
+        if stop > end:
+            raise WemError("truncated packet")
+        return data[start:stop], stop
+
+    @staticmethod
+    def _book(book: int, count: int) -> None:
+        if book >= count:
+            raise WemError(f"invalid codebook {book}")
+
+    @staticmethod
+    def _setup(packet: bytes, channels: int) -> Tuple[bytes, List[bool]]:
+        # wwise keeps codebooks as ids into the packed library and drops
+        # the fields that are always the same, everything else is copied
+        r = BitReader(packet)
+        w = BitWriter()
+        w.write(int.from_bytes(b"\x05vorbis", "little"), 56)
+
+        def copy(bits: int) -> int:
+            value = r.read(bits)
+            w.write(value, bits)
+            return value
+
+        count = copy(8) + 1
+        for _ in range(count):
+            w.write(*Wem._codebook(r.read(10)))
+        # time domain transforms, a single unused one
+        w.write(0, 6)
+        w.write(0, 16)
+
+        floors = copy(6) + 1
+        for _ in range(floors):
+            w.write(1, 16)  # floor type, always floor 1
+            classes = [copy(4) for _ in range(copy(5))]
+            dimensions: List[int] = []
+            for _ in range(max(classes, default=-1) + 1):
+                dimensions.append(copy(3) + 1)
+                subclasses = copy(2)
+                if subclasses:
+                    Wem._book(copy(8), count)
+                for _ in range(1 << subclasses):
+                    Wem._book(copy(8) - 1, count)
+            copy(2)
+            rangebits = copy(4)
+            for number in classes:
+                for _ in range(dimensions[number]):
+                    copy(rangebits)
+
+        residues = copy(6) + 1
+        for _ in range(residues):
+            residue_type = r.read(2)
+            if residue_type > 2:
+                raise WemError(f"invalid residue type {residue_type}")
+            w.write(residue_type, 16)
+            copy(24)
+            copy(24)
+            copy(24)
+            classifications = copy(6) + 1
+            Wem._book(copy(8), count)
+            cascade = []
+            for _ in range(classifications):
+                low = copy(3)
+                high = copy(5) if copy(1) else 0
+                cascade.append(high << 3 | low)
+            for books in cascade:
+                for k in range(8):
+                    if books >> k & 1:
+                        Wem._book(copy(8), count)
+
+        mappings = copy(6) + 1
+        channel_bits = (channels - 1).bit_length()
+        for _ in range(mappings):
+            w.write(0, 16)  # mapping type
+            submaps = copy(4) + 1 if copy(1) else 1
+            if copy(1):
+                for _ in range(copy(8) + 1):
+                    magnitude, angle = copy(channel_bits), copy(channel_bits)
+                    if magnitude == angle or max(magnitude, angle) >= channels:
+                        raise WemError("invalid channel coupling")
+            if copy(2):
+                raise WemError("mapping reserved field is set")
+            if submaps > 1:
+                for _ in range(channels):
+                    if copy(4) >= submaps:
+                        raise WemError("invalid mapping mux")
+            for _ in range(submaps):
+                copy(8)
+                if copy(8) >= floors:
+                    raise WemError("invalid floor in mapping")
+                if copy(8) >= residues:
+                    raise WemError("invalid residue in mapping")
+
+        blockflags: List[bool] = []
+        for _ in range(copy(6) + 1):
+            blockflags.append(bool(copy(1)))
+            w.write(0, 16)  # window type
+            w.write(0, 16)  # transform type
+            if copy(8) >= mappings:
+                raise WemError("invalid mapping in mode")
+        w.write(1, 1)
+
+        if (r.position + 7) >> 3 != len(packet):
+            raise WemError("setup packet size mismatch")
+        return w.getvalue(), blockflags
+
+    @staticmethod
+    def _codebook(id: int) -> Tuple[int, int]:
+        # rebuilt codebooks only depend on the library, so they're kept
+        if id not in Wem._codebooks:
+            library = Wem._load_library()
+            if id >= len(library):
+                raise WemError(f"invalid codebook id {id}")
+            data = library[id]
+            r = BitReader(data)
+            w = BitWriter()
+            Wem._rebuild_codebook(r, w)
+            if data and r.position // 8 + 1 != len(data):
+                raise WemError(f"codebook {id} size mismatch")
+            Wem._codebooks[id] = w.total()
+        return Wem._codebooks[id]
+
+    @staticmethod
+    def _load_library() -> List[bytes]:
+        if Wem._library is None:
+            try:
+                with open(Wem.CODEBOOKS, "rb") as f:
+                    data = f.read()
+            except OSError as e:
+                raise WemError(f"could not read {Wem.CODEBOOKS}: {e}")
+            # codebooks back to back, then the offset of each and the end
+            table = Wem._u32(data, len(data) - 4)
+            offsets = struct.unpack_from(f"<{(len(data) - table) // 4}I", data, table)
+            Wem._library = [
+                data[start:stop] for start, stop in zip(offsets, offsets[1:])
+            ]
+        return Wem._library
+
+    @staticmethod
+    def _rebuild_codebook(r: BitReader, w: BitWriter) -> None:
+        dimensions = r.read(4)
+        entries = r.read(14)
+        w.write(0x564342, 24)
+        w.write(dimensions, 16)
+        w.write(entries, 24)
+
+        ordered = r.read(1)
+        w.write(ordered, 1)
+        if ordered:
+            w.write(r.read(5), 5)
+            entry = 0
+            while entry < entries:
+                bits = (entries - entry).bit_length()
+                number = r.read(bits)
+                w.write(number, bits)
+                entry += number
+            if entry > entries:
+                raise WemError("codebook entry count overflow")
+        else:
+            length_bits = r.read(3)
+            sparse = r.read(1)
+            if not 0 < length_bits <= 5:
+                raise WemError("invalid codeword length size")
+            w.write(sparse, 1)
+            for _ in range(entries):
+                if sparse:
+                    present = r.read(1)
+                    w.write(present, 1)
+                    if not present:
+                        continue
+                w.write(r.read(length_bits), 5)
+
+        lookup = r.read(1)
+        w.write(lookup, 4)
+        if lookup:
+            w.write(r.read(32), 32)  # minimum value
+            w.write(r.read(32), 32)  # delta value
+            value_bits = r.read(4) + 1
+            w.write(value_bits - 1, 4)
+            w.write(r.read(1), 1)  # sequence flag
+            for _ in range(Wem._quantvals(entries, dimensions)):
+                w.write(r.read(value_bits), value_bits)
+
+    @staticmethod
+    def _quantvals(entries: int, dimensions: int) -> int:
+        # largest value whose dimensions-th power doesn't exceed entries
+        if not dimensions:
+            raise WemError("codebook without dimensions")
+        vals = entries >> (entries.bit_length() - 1) * (dimensions - 1) // dimensions
+        while True:
+            if vals**dimensions <= entries < (vals + 1) ** dimensions:
+                return vals
+            vals += -1 if vals**dimensions > entries else 1
+
+
+class OggWriter:
+    def __init__(self, serial: int) -> None:
+        self.serial = serial
+        self.pages: List[bytes] = []
+        self.lacing = bytearray()
+        self.body: List[bytes] = []
+        self.size = 0
+        self.granule = -1
+        self.continued = False
+
+    def packet(self, packet: bytes, granule: int) -> None:
+        # packets larger than a page's 255 segments carry over to the next
+        lacing = bytes([255]) * (len(packet) // 255) + bytes([len(packet) % 255])
+        if len(self.lacing) == 255:
+            # a full page is closed first, so the next one only has the
+            # continued flag when it really carries on a packet
+            self.flush()
+        while True:
+            room = 255 - len(self.lacing)
+            taken = lacing[:room]
+            size = sum(taken)
+            self.lacing += taken
+            self.body.append(packet[:size])
+            self.size += size
+            packet, lacing = packet[size:], lacing[room:]
+            if not lacing:
+                break
+            self.flush()
+            self.continued = True
+        self.granule = granule
+
+    def flush(self, eos: bool = False) -> None:
+        if not self.lacing and not eos:
+            return
+        flags = Wem.CONTINUED if self.continued else 0
+        if not self.pages:
+            flags |= Wem.BOS
+        if eos:
+            flags |= Wem.EOS
+        page = bytearray(
+            struct.pack(
+                "<4sBBqIIIB",
+                b"OggS",
+                0,
+                flags,
+                self.granule,
+                self.serial,
+                len(self.pages),
+                0,
+                len(self.lacing),
+            )
+        )
+        page += self.lacing
+        for body in self.body:
+            page += body
+        struct.pack_into("<I", page, 22, OggWriter.crc(page))
+        self.pages.append(bytes(page))
+        self.lacing = bytearray()
+        self.body = []
+        self.size = 0
+        self.granule = -1
+        self.continued = False
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.pages)
+
+    @staticmethod
+    def crc(page: bytes) -> int:
+        # ogg's crc is zlib's polynomial unreflected with no initial or final
+        # xor, so it's zlib's crc over bit reversed bytes, bit reversed back
+        crc = zlib.crc32(bytes(page).translate(Wem.REVERSED), 0xFFFFFFFF) ^ 0xFFFFFFFF
+        return int(f"{crc:032b}"[::-1], 2)